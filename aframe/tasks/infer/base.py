@@ -36,6 +36,12 @@ class InferParameters(law.Task):
     )
     zero_lag = luigi.BoolParameter(default="true")
     return_timeseries = luigi.BoolParameter(default="false")
+    stream_postprocessing = luigi.BoolParameter(
+        default="false",
+        description="If `True`, postprocess inference outputs into events "
+        "as they arrive rather than after each sequence completes. "
+        "Incompatible with `return_timeseries`.",
+    )
     output_dir = PathParameter(default=paths().results_dir)
     train_task = luigi.TaskParameter()
 
@@ -239,7 +245,11 @@ class InferBase(
 
         with client:
             outputs = infer(
-                client, sequence, postprocessor, self.return_timeseries
+                client,
+                sequence,
+                postprocessor,
+                self.return_timeseries,
+                self.stream_postprocessing,
             )
         if self.return_timeseries:
             background, foreground, background_ts, foreground_ts = outputs
@@ -0,0 +1,110 @@
+"""
+Benchmark the rate at which `WaveformPolarizationSet.from_parameters`
+generates waveforms as a function of the number of worker processes.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+
+from ledger.injections import BilbyParameterSet, WaveformPolarizationSet
+from utils.logging import configure_logging
+
+
+def sample_parameters(num_signals: int, seed: int = 0) -> BilbyParameterSet:
+    rng = np.random.default_rng(seed)
+
+    def uniform(low, high):
+        return rng.uniform(low, high, size=(num_signals,))
+
+    return BilbyParameterSet(
+        mass_1=uniform(30, 50),
+        mass_2=uniform(10, 30),
+        a_1=uniform(0, 0.9),
+        a_2=uniform(0, 0.9),
+        tilt_1=uniform(0, np.pi),
+        tilt_2=uniform(0, np.pi),
+        phi_12=uniform(0, 2 * np.pi),
+        phi_jl=uniform(0, 2 * np.pi),
+        ra=uniform(0, 2 * np.pi),
+        dec=uniform(-np.pi / 2, np.pi / 2),
+        redshift=uniform(0.1, 1),
+        psi=uniform(0, np.pi),
+        theta_jn=uniform(0, np.pi),
+        phase=uniform(0, 2 * np.pi),
+    )
+
+
+def main(
+    num_signals: int = 1000,
+    num_workers: tuple[int, ...] = (1, 2, 4, 8),
+    chunk_size: int | None = None,
+    sample_rate: float = 2048,
+    waveform_duration: float = 8,
+    waveform_approximant: str = "IMRPhenomPv2",
+    minimum_frequency: float = 20,
+    reference_frequency: float = 20,
+    right_pad: float = 1,
+    seed: int = 0,
+):
+    """
+    Args:
+        num_signals:
+            Number of waveforms to generate for each
+            number of workers
+        num_workers:
+            Numbers of worker processes to benchmark
+        chunk_size:
+            Number of waveforms generated by each task.
+            If left as `None`, the default of 4 chunks
+            per worker will be used.
+        sample_rate:
+            Sample rate of the waveforms in Hz
+        waveform_duration:
+            Length of the waveforms in seconds
+        waveform_approximant:
+            Name of the waveform approximant to use
+        minimum_frequency:
+            Minimum frequency of the waveforms in Hz
+        reference_frequency:
+            Reference frequency of the waveforms in Hz
+        right_pad:
+            Time from the coalescence point of each
+            waveform to its right edge in seconds
+        seed:
+            Random seed used to sample waveform parameters
+    """
+    configure_logging()
+    params = sample_parameters(num_signals, seed)
+    logging.info(
+        f"Generating {num_signals} {waveform_approximant} waveforms "
+        f"of {waveform_duration}s at {sample_rate}Hz"
+    )
+
+    baseline = None
+    for workers in num_workers:
+        start = time.perf_counter()
+        WaveformPolarizationSet.from_parameters(
+            params,
+            minimum_frequency,
+            reference_frequency,
+            sample_rate,
+            waveform_duration,
+            waveform_approximant,
+            right_pad,
+            num_workers=workers,
+            chunk_size=chunk_size,
+        )
+        elapsed = time.perf_counter() - start
+        rate = num_signals / elapsed
+        baseline = baseline or rate
+        logging.info(
+            f"{workers} worker(s): {elapsed:0.2f}s, {rate:0.1f} "
+            f"waveforms/s, speedup {rate / baseline:0.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -1,11 +1,8 @@
 import copy
-import warnings
 from dataclasses import dataclass
-from multiprocessing import Pool, cpu_count
 from typing import List, Tuple, TypeVar
 
 import numpy as np
-from tqdm import tqdm
 
 from ledger.injections import InterferometerResponseSet
 from ledger.ledger import Ledger, metadata, parameter
@@ -14,12 +11,56 @@ SECONDS_IN_YEAR = 31556952
 F = TypeVar("F", np.ndarray, float)
 
 
-def process_chunk(args):
-    chunk_times, vetos, i = args
-    mask = np.logical_and(
-        vetos[:, :1] < chunk_times, vetos[:, 1:] > chunk_times
-    )
-    return i, mask.any(axis=0)
+def merge_vetos(vetos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge a set of `(start, stop)` veto intervals into
+    the sorted, disjoint set of intervals covering the
+    same times. Intervals are treated as open, so ones
+    which only touch at their endpoints aren't merged
+    and empty intervals are dropped.
+
+    Returns:
+        The starts and stops of the merged intervals
+    """
+    vetos = np.asarray(vetos, dtype=np.float64).reshape(-1, 2)
+    vetos = vetos[vetos[:, 0] < vetos[:, 1]]
+    if not len(vetos):
+        return np.zeros((0,)), np.zeros((0,))
+
+    vetos = vetos[np.argsort(vetos[:, 0], kind="stable")]
+    starts, stops = vetos[:, 0], np.maximum.accumulate(vetos[:, 1])
+
+    # a new merged interval begins wherever a veto
+    # starts at or after the end of all the ones before it
+    new = np.ones(len(vetos), dtype=bool)
+    new[1:] = starts[1:] >= stops[:-1]
+    first = np.where(new)[0]
+    last = np.append(first[1:] - 1, len(vetos) - 1)
+    return starts[first], stops[last]
+
+
+def _nearest(times: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    For each of `targets`, find the index of the element of `times`
+    closest to it, breaking ties in favor of the earliest index as
+    `np.abs(targets[:, None] - times).argmin(axis=-1)` would, in
+    O((N + M) log N) time and O(N + M) memory using a sorted search
+    """
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+
+    # the nearest element is either the first one at or after
+    # each target, or the first occurrence of the value before it
+    right = np.searchsorted(times, targets, side="left")
+    has_left, has_right = right > 0, right < len(times)
+    left = np.searchsorted(times, times[np.maximum(right - 1, 0)], "left")
+    right = np.minimum(right, len(times) - 1)
+
+    left_diff = np.where(has_left, targets - times[left], np.inf)
+    right_diff = np.where(has_right, times[right] - targets, np.inf)
+    use_right = right_diff < left_diff
+    use_right |= (right_diff == left_diff) & (order[right] < order[left])
+    return np.where(use_right, order[right], order[left])
 
 
 @dataclass
@@ -44,6 +85,15 @@ class EventSet(Ledger):
     shift: np.ndarray = parameter()
     Tb: float = metadata(default=0)
 
+    def __post_init__(self):
+        super().__post_init__()
+        # sorted copy of the detection statistics, built
+        # lazily and reset whenever the object is reinitialized
+        # (e.g. after appending), along with the detection
+        # statistic array it was built from
+        self._sorted_stats = None
+        self._sorted_source = None
+
     @classmethod
     def compare_metadata(cls, key, ours, theirs):
         # accumulate background time when merging or appending
@@ -51,35 +101,39 @@ class EventSet(Ledger):
             return ours + theirs
         return super().compare_metadata(key, ours, theirs)
 
+    @property
+    def sorted_detection_statistic(self) -> np.ndarray:
+        """
+        The detection statistics of this set in ascending order,
+        computed once and cached for all subsequent threshold
+        calculations until the detection statistics change.
+
+        Changes are detected by the identity of the
+        `detection_statistic` array, so it's assumed not to be
+        modified in place: assign a new array to it instead
+        (e.g. `events.detection_statistic = stats`), otherwise
+        the stale sorted statistics will be returned.
+        """
+        stats = self.detection_statistic
+        if self._sorted_stats is None or self._sorted_source is not stats:
+            if self.is_sorted_by("detection_statistic"):
+                self._sorted_stats = stats
+            else:
+                self._sorted_stats = np.sort(stats)
+            self._sorted_source = stats
+        return self._sorted_stats
+
     def get_shift(self, shift: np.ndarray) -> "EventSet":
         # downselect to all events from a given shift
-        mask = self.shift == shift
-        if self.shift.ndim == 2:
-            mask = mask.all(axis=-1)
-        return self[mask]
+        return self.select_by("shift", shift)
 
     def nb(self, threshold: F) -> F:
         """
         The number of events with a detection statistic
         greater than or equal to `threshold`
         """
-        if self.is_sorted_by("detection_statistic"):
-            return len(self) - np.searchsorted(
-                self.detection_statistic, threshold
-            )
-        warnings.warn(
-            "Detection statistic is not sorted. This function "
-            "may take a long time for large datasets. To sort, "
-            "use the sort_by() function of this object.",
-            stacklevel=2,
-        )
-        try:
-            len(threshold)
-        except TypeError:
-            return (self.detection_statistic >= threshold).sum()
-        else:
-            stats = self.detection_statistic[:, None]
-            return (stats >= threshold).sum(0)
+        stats = self.sorted_detection_statistic
+        return len(stats) - np.searchsorted(stats, threshold)
 
     @property
     def min_far(self):
@@ -122,22 +176,12 @@ class EventSet(Ledger):
         """
         livetime = self.Tb
         num_events = livetime * far
-        if self.is_sorted_by("detection_statistic"):
-            return self.detection_statistic[-int(num_events)]
-        warnings.warn(
-            "Detection statistic is not sorted. This function "
-            "may take a long time for large datasets. To sort, "
-            "use the sort_by() function of this object.",
-            stacklevel=2,
-        )
-        det_stats = np.sort(self.detection_statistic)
-        return det_stats[-int(num_events)]
+        return self.sorted_detection_statistic[-int(num_events)]
 
     def apply_vetos(
         self,
         vetos: List[Tuple[float, float]],
         idx: int,
-        chunk_size: int = 500000,
         inplace: bool = False,
         return_mask: bool = False,
     ):
@@ -146,26 +190,14 @@ class EventSet(Ledger):
         shifts = self.shift[:, idx]
         times = self.detection_time + shifts
 
-        # array of False, no vetoes applied yet
+        # merge the vetoes into disjoint sorted intervals
+        # so that we only need to check each event against
+        # the last interval that starts before it
+        starts, stops = merge_vetos(vetos)
         veto_mask = np.zeros(len(times), dtype=bool)
-
-        # split times into chunks;
-        # keep track of the index of the chunk
-        # for mp purposes so we can unpack the results later
-        chunks = [
-            (times[idx : idx + chunk_size], vetos, i)
-            for i, idx in enumerate(range(0, len(times), chunk_size))
-        ]
-
-        num_cpus = min(cpu_count(), len(chunks))
-        with Pool(num_cpus) as pool:
-            results = pool.imap_unordered(process_chunk, chunks)
-
-            # combine results
-            with tqdm(total=len(chunks)) as pbar:
-                for i, result in results:
-                    veto_mask[i * chunk_size : (i + 1) * chunk_size] = result
-                    pbar.update()
+        if len(starts):
+            i = np.searchsorted(starts, times, side="left") - 1
+            veto_mask = (i >= 0) & (times < stops[np.maximum(i, 0)])
 
         if inplace:
             result = self[~veto_mask]
@@ -189,32 +221,52 @@ class RecoveredInjectionSet(EventSet, InterferometerResponseSet):
 
     @classmethod
     def recover(cls, events: EventSet, injections: InterferometerResponseSet):
-        obj = cls()
-        for shift in np.unique(events.shift, axis=0):
+        # group the events and injections by shift
+        # up front rather than masking both for each shift
+        event_groups = events.group_by("shift")
+        if not event_groups:
+            obj = cls()
+            obj.Tb = events.Tb
+            return obj
+        injection_groups = injections.group_by("shift")
+
+        event_idx = [np.array([], dtype=int)]
+        injection_idx = [np.array([], dtype=int)]
+        for shift in sorted(event_groups):
             # get the all events and injections at the current shift
-            evs = events.get_shift(shift)
-            injs = injections.get_shift(shift)
+            evs = event_groups[shift]
+            try:
+                injs = injection_groups[shift]
+            except KeyError:
+                continue
 
             # for each injection, find the event closest to it in time
             # TODO: should this just look _after_ the event?
-            diffs = np.abs(injs.injection_time[:, None] - evs.detection_time)
-            idx = diffs.argmin(axis=-1)
-            evs = evs[idx]
-
-            # create a RecoveredInjection object for just this
-            # shift and then append it onto our running ledger
-            fields = set(cls.__dataclass_fields__)
-            fields &= set(injs.__dataclass_fields__)
-
-            kwargs = {k: getattr(injs, k) for k in fields}
-            kwargs["num_injections"] = len(injs)
-
-            subobj = cls(
-                detection_statistic=evs.detection_statistic,
-                detection_time=evs.detection_time,
-                **kwargs,
+            idx = _nearest(
+                events.detection_time[evs], injections.injection_time[injs]
             )
-            obj.append(subobj)
-
-        obj.Tb = events.Tb
-        return obj
+            event_idx.append(evs[idx])
+            injection_idx.append(injs)
+
+        event_idx = np.concatenate(event_idx)
+        injection_idx = np.concatenate(injection_idx)
+
+        # create a RecoveredInjection object for
+        # all the injections at every shift at once
+        fields = set(cls.__dataclass_fields__)
+        fields &= set(injections.__dataclass_fields__)
+
+        kwargs = {}
+        for key in fields:
+            value = getattr(injections, key)
+            if cls.__dataclass_fields__[key].metadata["kind"] != "metadata":
+                value = value[injection_idx]
+            kwargs[key] = value
+        kwargs["num_injections"] = len(injection_idx)
+
+        return cls(
+            detection_statistic=events.detection_statistic[event_idx],
+            detection_time=events.detection_time[event_idx],
+            Tb=events.Tb,
+            **kwargs,
+        )
@@ -1,5 +1,6 @@
-from concurrent.futures import Executor, as_completed
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, make_dataclass
+from multiprocessing import shared_memory
 from typing import Dict, List, Optional
 
 import h5py
@@ -378,6 +379,95 @@ class _WaveformGenerator:
         return unstacked
 
 
+def _generate_into(
+    waveform_generator: _WaveformGenerator,
+    param_list: List[Dict[str, float]],
+    stacked: np.ndarray,
+) -> None:
+    """
+    Generate the waveforms for each set of parameters in
+    `param_list`, writing their plus and cross polarizations
+    into the rows of `stacked[0]` and `stacked[1]`, respectively
+    """
+    for i, params in enumerate(param_list):
+        polars = waveform_generator(params)
+        stacked[0, i] = polars["plus"]
+        stacked[1, i] = polars["cross"]
+
+
+def _generate_chunk(
+    waveform_generator: _WaveformGenerator,
+    param_list: List[Dict[str, float]],
+    name: str,
+    shape: tuple,
+    start: int,
+) -> None:
+    """
+    Generate a chunk of waveforms into the shared memory
+    block `name`, which holds an array of shape `shape`
+    whose rows from `start` onward belong to this chunk
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        stacked = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        stop = start + len(param_list)
+        _generate_into(waveform_generator, param_list, stacked[:, start:stop])
+        del stacked
+    finally:
+        shm.close()
+
+
+def _generate_parallel(
+    waveform_generator: _WaveformGenerator,
+    param_list: List[Dict[str, float]],
+    shape: tuple,
+    ex: Executor,
+    num_workers: int,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Split the waveforms to generate into chunks which are
+    dispatched to the `num_workers` workers of `ex`, each of
+    which writes its waveforms directly into a shared array
+    of shape `shape`, so that the waveforms don't need to be
+    serialized and sent back from the workers
+    """
+    if not param_list:
+        return np.zeros(shape)
+
+    if chunk_size is None:
+        chunk_size = -(-len(param_list) // (4 * max(num_workers, 1)))
+
+    nbytes = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        shared = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        futures = []
+        for start in range(0, len(param_list), chunk_size):
+            future = ex.submit(
+                _generate_chunk,
+                waveform_generator,
+                param_list[start : start + chunk_size],
+                shm.name,
+                shape,
+                start,
+            )
+            futures.append(future)
+
+        # raise any errors from the workers
+        for future in as_completed(futures):
+            future.result()
+
+        # copy out of the shared block once so
+        # that it can be released immediately
+        stacked = shared.copy()
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return stacked
+
+
 @dataclass
 class WaveformPolarizationSet(InjectionMetadata, BilbyParameterSet):
     cross: np.ndarray = waveform()
@@ -401,7 +491,46 @@ class WaveformPolarizationSet(InjectionMetadata, BilbyParameterSet):
         waveform_approximant: str,
         right_pad: float,
         ex: Optional[Executor] = None,
+        num_workers: int = 1,
+        chunk_size: Optional[int] = None,
     ):
+        """
+        Generate the polarizations of the waveforms specified
+        by a set of parameters
+
+        Args:
+            params:
+                The parameters of the waveforms to generate
+            minimum_frequency:
+                Minimum frequency of the waveforms in Hz
+            reference_frequency:
+                Frequency at which the waveform parameters
+                are defined in Hz
+            sample_rate:
+                Sample rate of the waveforms in Hz
+            waveform_duration:
+                Length of the waveforms in seconds
+            waveform_approximant:
+                Name of the waveform approximant to use
+            right_pad:
+                Time from the coalescence point of each
+                waveform to its right edge in seconds
+            ex:
+                Executor to generate waveforms with in parallel.
+                Waveforms are generated in chunks and written
+                directly into shared memory rather than being
+                sent back from the workers.
+            num_workers:
+                Number of workers to generate waveforms with. If
+                `ex` isn't specified and this is greater than 1,
+                a process pool with this many workers is used.
+                Otherwise, this should be the number of workers
+                of `ex`.
+            chunk_size:
+                Number of waveforms each task generates when
+                running in parallel. Defaults to splitting the
+                waveforms into 4 chunks per worker.
+        """
         if waveform_duration < right_pad:
             raise ValueError(
                 "Right padding must be less than waveform duration; "
@@ -418,26 +547,34 @@ class WaveformPolarizationSet(InjectionMetadata, BilbyParameterSet):
         )
 
         waveform_length = int(sample_rate * waveform_duration)
-        polarizations = {
-            "plus": np.zeros((len(params), waveform_length)),
-            "cross": np.zeros((len(params), waveform_length)),
-        }
-
         lal_params = params.convert_to_lal_param_set(reference_frequency)
         param_list = transpose(lal_params.generation_params)
+
         # give flexibility if we want to parallelize or not
-        if ex is None:
-            for i, polars in enumerate(map(waveform_generator, param_list)):
-                for key, value in polars.items():
-                    polarizations[key][i] = value
+        shape = (2, len(params), waveform_length)
+        if ex is None and num_workers > 1:
+            with ProcessPoolExecutor(num_workers) as ex:
+                stacked = _generate_parallel(
+                    waveform_generator,
+                    param_list,
+                    shape,
+                    ex,
+                    num_workers,
+                    chunk_size,
+                )
+        elif ex is not None:
+            stacked = _generate_parallel(
+                waveform_generator,
+                param_list,
+                shape,
+                ex,
+                num_workers,
+                chunk_size,
+            )
         else:
-            futures = ex.map(waveform_generator, param_list)
-            idx_map = dict(zip(futures, len(futures)))
-            for f in as_completed(futures):
-                i = idx_map.pop(f)
-                polars = f.result()
-                for key, value in polars.items():
-                    polarizations[key][i] = value
+            stacked = np.zeros(shape)
+            _generate_into(waveform_generator, param_list, stacked)
+        polarizations = dict(zip(["plus", "cross"], stacked))
 
         d = {k: getattr(params, k) for k in params.__dataclass_fields__}
         polarizations.update(d)
@@ -526,10 +663,7 @@ class InterferometerResponseSet(WaveformSet):
         )
 
     def get_shift(self, shift):
-        mask = self.shift == shift
-        if self.shift.ndim == 2:
-            mask = mask.all(axis=-1)
-        return self[mask]
+        return self.select_by("shift", shift)
 
     def get_times(
         self, start: Optional[float] = None, end: Optional[float] = None
@@ -551,16 +685,19 @@ class InterferometerResponseSet(WaveformSet):
         start: Optional[float] = None,
         end: Optional[float] = None,
         shifts: Optional[float] = None,
+        lazy: bool = False,
     ):
         """
         Similar wildcard behavior in loading. Additional
         kwargs to be able to load data for just a particular
         segment since the slice method below will make copies
         and you could start to run out of memory fast.
+        If none of these are specified, `lazy` can be used
+        to defer reading any data, as in `Ledger.read`.
         """
         with h5py.File(fname, "r") as f:
             if all(i is None for i in [start, end, shifts]):
-                return cls._load_with_idx(f, None)
+                return cls._load_with_idx(f, None, lazy=lazy)
 
             left_pad = f.attrs["duration"] - f.attrs["right_pad"]
             times = f["parameters"]["injection_time"][:]
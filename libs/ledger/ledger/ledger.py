@@ -2,7 +2,7 @@ import os
 import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Optional, Union
+from typing import Dict, Iterable, Optional, Union
 
 import h5py
 import numpy as np
@@ -34,6 +34,227 @@ def metadata(default=None, default_factory=None):
     return field(metadata={"kind": "metadata"}, **kwargs)
 
 
+def _get_runs(idx: np.ndarray):
+    """
+    Split a sorted array of unique indices into runs of
+    consecutive indices, returning the start and stop of each
+    """
+    breaks = np.where(np.diff(idx) != 1)[0] + 1
+    starts = idx[np.concatenate([[0], breaks])]
+    stops = idx[np.concatenate([breaks - 1, [len(idx) - 1]])] + 1
+    return starts, stops
+
+
+def _read_chunks(
+    dataset: h5py.Dataset, unique_idx: np.ndarray, values: np.ndarray
+) -> None:
+    """
+    Read the rows at the sorted, unique indices `unique_idx` of
+    a chunked dataset into `values`, reading each chunk that
+    contains any of the rows just once, in file order
+    """
+    block_size = dataset.chunks[0]
+    buffer = np.empty((block_size,) + dataset.shape[1:], dtype=dataset.dtype)
+
+    # find the boundaries between indices in different chunks
+    blocks = unique_idx // block_size
+    breaks = np.where(np.diff(blocks) != 0)[0] + 1
+    breaks = np.concatenate([[0], breaks, [len(unique_idx)]])
+    for i, j in zip(breaks[:-1], breaks[1:]):
+        start = blocks[i] * block_size
+        size = min(block_size, len(dataset) - start)
+        dataset.read_direct(
+            buffer,
+            source_sel=np.s_[start : start + size],
+            dest_sel=np.s_[:size],
+        )
+        values[i:j] = buffer[unique_idx[i:j] - start]
+
+
+def read_rows(dataset: h5py.Dataset, idx: np.ndarray) -> np.ndarray:
+    """
+    Read the rows of an HDF5 dataset at the indices `idx`,
+    which may be unsorted and contain duplicates. Rather than
+    selecting each row individually, which h5py does one
+    hyperslab at a time, the requested rows are read in
+    file order and scattered into place. For chunked
+    datasets, each chunk containing any requested rows
+    is read once in its entirety. Otherwise, the rows are
+    grouped into runs of consecutive indices that are each
+    read with a single contiguous slice.
+    """
+    idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+    idx = np.where(idx < 0, idx + len(dataset), idx)
+    shape = dataset.shape[1:]
+    if not len(idx):
+        return np.zeros((0,) + shape, dtype=dataset.dtype)
+
+    unique_idx, inv_idx = np.unique(idx, return_inverse=True)
+    values = np.empty((len(unique_idx),) + shape, dtype=dataset.dtype)
+    if dataset.chunks is not None:
+        _read_chunks(dataset, unique_idx, values)
+        return values[inv_idx.reshape(-1)]
+
+    position = 0
+    for start, stop in zip(*_get_runs(unique_idx)):
+        size = stop - start
+        dataset.read_direct(
+            values,
+            source_sel=np.s_[start:stop],
+            dest_sel=np.s_[position : position + size],
+        )
+        position += size
+    return values[inv_idx.reshape(-1)]
+
+
+def sample_chunk_aligned(
+    n: int, N: int, block_size: int, replace: bool = False
+) -> np.ndarray:
+    """
+    Sample `N` of the indices `0` to `n - 1` by drawing
+    random blocks of `block_size` consecutive indices, then
+    sampling `N` indices from the union of those blocks,
+    in random order. Aligning `block_size` with the chunks
+    of a dataset means only the chunks of the drawn blocks
+    need to be read, at the cost of correlating which
+    indices get sampled together.
+
+    Args:
+        n: The number of indices to sample from
+        N: The number of indices to sample
+        block_size: The number of indices in each block
+        replace:
+            Whether to sample with replacement or not. If
+            `True`, blocks are also drawn with replacement.
+    """
+    num_blocks = -(-n // block_size)
+    num_draws = -(-N // block_size)
+    if not replace:
+        # account for the last block potentially
+        # having fewer indices than the rest
+        num_draws = min(num_draws + 1, num_blocks)
+    blocks = np.random.choice(num_blocks, size=(num_draws,), replace=replace)
+
+    idx = blocks[:, None] * block_size + np.arange(block_size)
+    idx = idx[idx < n]
+    return np.random.choice(idx, size=(N,), replace=replace)
+
+
+class LazyColumn(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    Array-like proxy for a dataset in an HDF5 archive which
+    only reads data from the archive when it's accessed.
+    Indexing the column reads just the requested rows, with
+    fancy indices read as contiguous runs (see `read_rows`).
+    Any other use of the column, e.g. arithmetic or calling
+    array methods, reads the full dataset once and caches it.
+
+    Args:
+        fname:
+            Path to the HDF5 archive containing the dataset
+        name:
+            Full name of the dataset within the archive
+    """
+
+    def __init__(self, fname: PATH, name: str) -> None:
+        self.fname = fname
+        self.name = name
+        with h5py.File(fname, "r") as f:
+            dataset = f[name]
+            self.shape = dataset.shape
+            self.dtype = dataset.dtype
+        self._data = None
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "LazyColumn(fname={}, name={}, shape={}, dtype={})".format(
+            self.fname, self.name, self.shape, self.dtype
+        )
+
+    def materialize(self) -> np.ndarray:
+        """Read the full dataset into memory, if it hasn't been already"""
+        if self._data is None:
+            with h5py.File(self.fname, "r") as f:
+                self._data = f[self.name][:]
+        return self._data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.materialize()
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = [
+            i.materialize() if isinstance(i, LazyColumn) else i for i in inputs
+        ]
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getattr__(self, name):
+        # defer any other array attributes and
+        # methods to the materialized data
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __getitem__(self, idx):
+        if self._data is not None:
+            return self._data[idx]
+
+        rest = ()
+        if isinstance(idx, tuple):
+            idx, rest = idx[0], idx[1:]
+
+        with h5py.File(self.fname, "r") as f:
+            dataset = f[self.name]
+            if isinstance(idx, (int, np.integer)) or idx is Ellipsis:
+                value = dataset[idx]
+            elif isinstance(idx, slice) and (idx.step or 1) > 0:
+                value = dataset[idx]
+            else:
+                if isinstance(idx, slice):
+                    idx = np.arange(len(self))[idx]
+                idx = np.asarray(idx)
+                if idx.dtype == bool:
+                    idx = np.where(idx)[0]
+                value = read_rows(dataset, idx).reshape(
+                    idx.shape + self.shape[1:]
+                )
+
+        if rest:
+            value = value[(slice(None),) * (value.ndim - self.ndim + 1) + rest]
+        return value
+
+
+def _open_lazy(dataset: h5py.Dataset):
+    """
+    Memory-map contiguous, unfiltered datasets directly
+    and wrap all others in a `LazyColumn` proxy, so that
+    no data is read until it's needed
+    """
+    if dataset.chunks is None and dataset.size:
+        offset = dataset.id.get_offset()
+        if offset is not None:
+            return np.memmap(
+                dataset.file.filename,
+                mode="r",
+                dtype=dataset.dtype,
+                offset=offset,
+                shape=dataset.shape,
+            )
+    return LazyColumn(dataset.file.filename, dataset.name)
+
+
 def _iter_open(files: Iterable[Path], mode: str, clean: bool = True):
     for fname in files:
         with h5py.File(fname, mode) as f:
@@ -63,6 +284,10 @@ class Ledger:
                 )
         self._length = _length or 0
 
+        # cache of indices grouped by the values of
+        # a given attribute, see `group_by` below
+        self._groups = {}
+
     def __len__(self):
         return self._length
 
@@ -107,6 +332,45 @@ class Ledger:
             )
         return (value[:-1] <= value[1:]).all()
 
+    def group_by(self, attr: str) -> Dict[tuple, np.ndarray]:
+        """
+        Map each unique value of `attr` (or each unique row, if
+        `attr` is 2D) to the indices at which it occurs, in
+        ascending order. Computed with one sort of `attr` rather
+        than one mask per value, and cached until the object is
+        reinitialized or `attr` is replaced.
+        """
+        value = getattr(self, attr)
+        try:
+            source, groups = self._groups[attr]
+        except KeyError:
+            source = None
+        if source is value:
+            return groups
+
+        groups = {}
+        if len(value):
+            rows = value.reshape(len(value), -1)
+            uniques, labels = np.unique(rows, axis=0, return_inverse=True)
+            labels = labels.reshape(-1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=len(uniques))
+            splits = np.split(order, np.cumsum(counts)[:-1])
+            groups = dict(zip(map(tuple, uniques.tolist()), splits))
+        self._groups[attr] = (value, groups)
+        return groups
+
+    def select_by(self, attr: str, value):
+        """
+        Downselect to the entries whose value of `attr`
+        is equal to `value`, using the cached groups
+        of `attr` to avoid masking the whole object
+        """
+        shape = getattr(self, attr).shape[1:]
+        key = tuple(np.broadcast_to(value, shape).reshape(-1).tolist())
+        idx = self.group_by(attr).get(key, np.array([], dtype=int))
+        return self[idx]
+
     def sort_by(self, attr: str):
         if self.is_sorted_by(attr):
             warnings.warn(
@@ -115,28 +379,63 @@ class Ledger:
         idx = np.argsort(getattr(self, attr))
         return self[idx]
 
-    def write(self, fname: PATH, chunks=None) -> None:
+    def _get_kind(self, key, attr):
+        try:
+            return attr.metadata["kind"]
+        except KeyError as exc:
+            raise TypeError(
+                f"Couldn't save field {key} with no annotation"
+            ) from exc
+
+    def _create_dataset(
+        self,
+        f: h5py.File,
+        key: str,
+        kind: str,
+        value: np.ndarray,
+        chunks=None,
+        resizable: bool = False,
+    ) -> None:
+        group = self._get_group(f, kind + "s")
+
+        # only chunk waveforms, not parameters, unless
+        # we need to be able to resize the dataset later,
+        # which h5py only supports for chunked datasets
+        chunks = chunks if kind == "waveform" else None
+        kwargs = {}
+        if resizable:
+            kwargs["maxshape"] = (None,) + value.shape[1:]
+            chunks = chunks or True
+        group.create_dataset(key, data=value, chunks=chunks, **kwargs)
+
+    def write(self, fname: PATH, chunks=None, resizable: bool = False) -> None:
         """
-        TODO: implement this with an append mode
+        Write the ledger to an HDF5 archive, overwriting
+        any existing data in it. To add to an existing
+        archive instead, see `append_to_file`.
+
+        Args:
+            fname: The file to write to
+            chunks:
+                Shape to chunk waveforms into for efficient reading
+            resizable:
+                If `True`, make all datasets chunked and resizable
+                along their first axis so that more entries can
+                later be added with `append_to_file`
         """
+        # writing marks the end of any appends, so
+        # release the spare capacity they've left
+        self.compact()
         with h5py.File(fname, "w") as f:
             f.attrs["length"] = len(self)
             for key, attr in self.__dataclass_fields__.items():
                 value = getattr(self, key)
-
-                try:
-                    kind = attr.metadata["kind"]
-                except KeyError as exc:
-                    raise TypeError(
-                        f"Couldn't save field {key} with no annotation"
-                    ) from exc
-
-                if kind == "parameter":
-                    params = self._get_group(f, "parameters")
-                    params.create_dataset(key, data=value)
-                elif kind == "waveform":
-                    waveforms = self._get_group(f, "waveforms")
-                    waveforms.create_dataset(key, data=value, chunks=chunks)
+                kind = self._get_kind(key, attr)
+                if kind in ("parameter", "waveform"):
+                    value = np.asarray(value)
+                    self._create_dataset(
+                        f, key, kind, value, chunks, resizable
+                    )
                 elif kind == "metadata":
                     if value is not None:
                         f.attrs[key] = value
@@ -146,8 +445,105 @@ class Ledger:
                         "for field {}".format(kind, key)
                     )
 
+    def append_to_file(self, fname: PATH, chunks=None) -> None:
+        """
+        Add the entries of this ledger to the end of those in
+        an HDF5 archive, resizing each dataset in place rather
+        than rewriting the archive. Metadata is combined with
+        the archive's using `compare_metadata`, just as in
+        `append`. If `fname` doesn't exist yet, it's created
+        with resizable datasets so that it can be appended to
+        repeatedly, e.g. to accumulate the results from many
+        shifts without holding all of them in memory.
+
+        Args:
+            fname: The file to append to
+            chunks:
+                Shape to chunk waveforms into if the
+                file needs to be created
+        """
+        if not os.path.exists(fname):
+            self.write(fname, chunks=chunks, resizable=True)
+            return
+
+        with h5py.File(fname, "a") as f:
+            length = f.attrs["length"]
+
+            # check that every field can be appended before
+            # changing anything, so that a failed append
+            # doesn't leave the archive partially updated
+            metadata, fields = {}, []
+            for key, attr in self.__dataclass_fields__.items():
+                theirs = getattr(self, key)
+                kind = self._get_kind(key, attr)
+                if kind == "metadata":
+                    # use the class default for metadata
+                    # that wasn't written, as in `aggregate`
+                    if key in f.attrs:
+                        ours = f.attrs[key]
+                    else:
+                        try:
+                            ours = getattr(type(self), key)
+                        except AttributeError:
+                            ours = attr.default_factory()
+                    metadata[key] = self.compare_metadata(key, ours, theirs)
+                    continue
+                elif kind not in ("parameter", "waveform"):
+                    raise TypeError(
+                        "Couldn't save unknown annotation {} "
+                        "for field {}".format(kind, key)
+                    )
+
+                theirs = np.asarray(theirs)
+                dataset = f.get(f"{kind}s/{key}")
+                if dataset is None or (
+                    not len(dataset) and dataset.shape[1:] != theirs.shape[1:]
+                ):
+                    # an empty ledger doesn't know the shape of
+                    # its entries, so let the first non-empty
+                    # ledger written to the file decide it
+                    fields.append((key, kind, theirs, True))
+                    continue
+                elif dataset.maxshape[0] is not None:
+                    raise ValueError(
+                        "Can't append to dataset {} in archive {} "
+                        "since it isn't resizable. Write it with "
+                        "`resizable=True` to be able to append.".format(
+                            dataset.name, fname
+                        )
+                    )
+                elif dataset.shape[1:] != theirs.shape[1:]:
+                    raise ValueError(
+                        "Can't append {} with shape {} to dataset "
+                        "{} with shape {}".format(
+                            key, theirs.shape, dataset.name, dataset.shape
+                        )
+                    )
+                fields.append((key, kind, theirs, False))
+
+            for key, kind, theirs, create in fields:
+                group = self._get_group(f, kind + "s")
+                if create:
+                    if key in group:
+                        del group[key]
+                    self._create_dataset(f, key, kind, theirs, chunks, True)
+                else:
+                    dataset = group[key]
+                    dataset.resize(length + len(theirs), axis=0)
+                    dataset[length:] = theirs
+
+            for key, value in metadata.items():
+                if value is not None:
+                    f.attrs[key] = value
+            f.attrs["length"] = length + len(self)
+
     @classmethod
-    def _load_with_idx(cls, f: h5py.File, idx: Optional[np.ndarray] = None):
+    def _load_with_idx(
+        cls,
+        f: h5py.File,
+        idx: Optional[np.ndarray] = None,
+        lazy: bool = False,
+    ):
         def _try_get(group: str, field: str):
             try:
                 group = f[group]
@@ -188,9 +584,9 @@ class Ledger:
             else:
                 value = _try_get(kind + "s", key)
                 if idx is not None:
-                    unique_idx, inv_idx = np.unique(idx, return_inverse=True)
-                    value = value[unique_idx]
-                    value = value[inv_idx]
+                    value = read_rows(value, idx)
+                elif lazy:
+                    value = _open_lazy(value)
                 else:
                     value = value[:]
 
@@ -198,12 +594,31 @@ class Ledger:
         return cls(**kwargs)
 
     @classmethod
-    def read(cls, fname: PATH):
+    def read(cls, fname: PATH, lazy: bool = False):
+        """
+        Load a ledger from an HDF5 archive
+
+        Args:
+            fname: The file to read from
+            lazy:
+                If `True`, don't read any parameters or waveforms
+                up front. Contiguous datasets are memory-mapped,
+                and all others are loaded as `LazyColumn` proxies
+                which only read data from the file as it's
+                accessed. The file must not be modified
+                while the returned object is in use.
+        """
         with h5py.File(fname, "r") as f:
-            return cls._load_with_idx(f, None)
+            return cls._load_with_idx(f, None, lazy=lazy)
 
     @classmethod
-    def sample_from_file(cls, fname: PATH, N: int, replace: bool = False):
+    def sample_from_file(
+        cls,
+        fname: PATH,
+        N: int,
+        replace: bool = False,
+        chunk_aligned: bool = False,
+    ):
         """Helper method for out-of-memory dataloading
 
         TODO: future extension - add a `weights` callable
@@ -217,6 +632,13 @@ class Ledger:
                 Whether to draw with replacement or not.
                 If `False`, `N` must be less than the total
                 number of samples contained in the file.
+            chunk_aligned:
+                If `True` and the file contains chunked
+                datasets, draw samples from randomly selected
+                chunks rather than from the whole file (see
+                `sample_chunk_aligned`), so that fewer chunks
+                need to be read. Samples from the same chunk
+                are more likely to be drawn together.
         """
 
         with h5py.File(fname, "r") as f:
@@ -226,12 +648,37 @@ class Ledger:
                     "Not enough waveforms to sample without replacement"
                 )
 
-            # technically faster in the replace=True case to
-            # just do a randint but they're both O(10^-5)s
-            # so gonna go for the simpler implementation
-            idx = np.random.choice(n, size=(N,), replace=replace)
+            block_size = None
+            if chunk_aligned:
+                block_size = cls._get_block_size(f)
+
+            if block_size is not None:
+                idx = sample_chunk_aligned(n, N, block_size, replace)
+            else:
+                # technically faster in the replace=True case to
+                # just do a randint but they're both O(10^-5)s
+                # so gonna go for the simpler implementation
+                idx = np.random.choice(n, size=(N,), replace=replace)
             return cls._load_with_idx(f, idx)
 
+    @classmethod
+    def _get_block_size(cls, f: h5py.File) -> Optional[int]:
+        """
+        Find the largest number of rows in any one chunk of
+        the datasets in an archive, or `None` if none of the
+        datasets are chunked
+        """
+        block_size = None
+        for key, attr in cls.__dataclass_fields__.items():
+            kind = attr.metadata["kind"]
+            if kind == "metadata":
+                continue
+
+            chunks = f[kind + "s"][key].chunks
+            if chunks is not None:
+                block_size = max(block_size or 0, chunks[0])
+        return block_size
+
     @classmethod
     def compare_metadata(cls, key, ours, theirs):
         if ours is None:
@@ -246,7 +693,58 @@ class Ledger:
             )
         return ours
 
+    def _extend(self, key: str, ours: np.ndarray, theirs: np.ndarray):
+        """
+        Concatenate `theirs` onto the end of the field `key`,
+        using a buffer with spare capacity for the field so
+        that repeated appends only reallocate and copy the
+        existing entries when that capacity runs out. Since
+        capacity doubles each time, appending `N` entries in
+        total takes O(N) time rather than O(N^2). Fields are
+        always views of the first `len(self)` buffer entries,
+        so writing past them won't affect the entries of any
+        existing views, though they do share memory (see `append`).
+        """
+        theirs = np.asarray(theirs)
+        buffers = self.__dict__.setdefault("_buffers", {})
+        try:
+            buffer, view = buffers[key]
+        except KeyError:
+            buffer = view = None
+
+        if ours.shape[1:] != theirs.shape[1:]:
+            # let numpy raise the appropriate error
+            return np.concatenate([ours, theirs])
+
+        length = len(ours) + len(theirs)
+        dtype = np.result_type(ours, theirs)
+        if ours is not view or buffer.dtype != dtype or len(buffer) < length:
+            # only reuse the buffer if the field hasn't been
+            # replaced since our last append, otherwise start
+            # a new one and copy the existing entries into it
+            buffer = np.empty((2 * length,) + ours.shape[1:], dtype=dtype)
+            buffer[: len(ours)] = ours
+
+        buffer[len(ours) : length] = theirs
+        view = buffer[:length]
+        buffers[key] = (buffer, view)
+        return view
+
     def append(self, other) -> None:
+        """
+        Add the entries of `other` to the end of this ledger
+        in place, combining metadata with `compare_metadata`.
+
+        To make repeated appends cheap, each field is extended
+        into a buffer with spare capacity, and becomes a view
+        of the filled part of it. Arrays taken from a field
+        before a later append can then share memory with the
+        field afterwards, so writing into them will modify the
+        ledger. Copy them first if they need to be modified.
+        The spare capacity, up to as many entries as the ledger
+        holds, is kept until `compact` is called, which `write`
+        does automatically.
+        """
         if not isinstance(other, type(self)):
             raise TypeError(
                 "unsupported operand type(s) for |: '{}' and '{}'".format(
@@ -264,11 +762,27 @@ class Ledger:
             elif len(ours) == 0:
                 new_dict[key] = theirs
             else:
-                new_dict[key] = np.concatenate([ours, theirs])
+                new_dict[key] = self._extend(key, ours, theirs)
 
         self.__dict__.update(new_dict)
         self.__post_init__()
 
+    def compact(self) -> None:
+        """
+        Copy each field extended by `append` out of its buffer
+        into an array of exactly its length, releasing the
+        buffer's spare capacity and any memory shared with
+        arrays taken from the field before it was appended to.
+        Call this once done appending to a ledger that will be
+        kept in memory.
+        """
+        buffers = self.__dict__.pop("_buffers", {})
+        for key, (_, view) in buffers.items():
+            # fields that have since been replaced
+            # don't share memory with the buffer
+            if getattr(self, key) is view:
+                setattr(self, key, view.copy())
+
     @classmethod
     def aggregate(
         cls,
@@ -1,3 +1,5 @@
+import warnings
+
 import numpy as np
 import pytest
 
@@ -43,10 +45,28 @@ class TestEventSet:
         assert not obj.is_sorted_by("detection_statistic")
         with pytest.raises(ValueError):
             obj.is_sorted_by("shift")
-        with pytest.warns():
-            obj.nb(5)
-        with pytest.warns():
-            obj.threshold_at_far(0)
+
+        # threshold calculations on unsorted objects
+        # should use a cached sorted view without warning
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert obj.nb(5) == 5
+            assert (obj.nb(np.array([5, 5.5])) == np.array([5, 4])).all()
+            assert obj.threshold_at_far(0.01) == 9
+        assert obj.sorted_detection_statistic is obj.sorted_detection_statistic
+
+        # the cached view should be rebuilt once the object changes
+        subobj = obj[5:]
+        assert subobj.nb(2) == 3
+        other = events.EventSet(
+            np.array([20]), np.array([10]), np.array([[0, 0]]), 1
+        )
+        subobj.append(other)
+        assert subobj.nb(2) == 4
+
+        # as should reassigning the detection statistics
+        subobj.detection_statistic = subobj.detection_statistic + 100
+        assert subobj.nb(2) == len(subobj)
 
         obj = obj.sort_by("detection_statistic")
         assert obj.is_sorted_by("detection_statistic")
@@ -131,6 +151,24 @@ class TestEventSet:
         assert all(result.detection_statistic == expected.detection_statistic)
         assert result.Tb == expected.Tb
 
+        # overlapping, touching, unsorted and empty vetoes
+        # should give the same mask as checking each one
+        vetos = np.array(
+            [[2.5, 3.5], [0.5, 1.0], [1.0, 1.5], [3, 4.5], [2, 2], [0, 0.8]]
+        )
+        _, mask = obj.apply_vetos(vetos, idx=0, return_mask=True)
+        expected = (vetos[:, :1] < times) & (vetos[:, 1:] > times)
+        assert (mask == expected.any(axis=0)).all()
+
+        result = obj.apply_vetos(np.zeros((0, 2)), idx=0)
+        assert len(result) == len(obj)
+
+    def test_merge_vetos(self):
+        vetos = [(3, 4), (0, 2), (1, 1.5), (2, 3), (5, 5), (3.5, 6)]
+        starts, stops = events.merge_vetos(vetos)
+        assert (starts == np.array([0, 2, 3])).all()
+        assert (stops == np.array([2, 3, 6])).all()
+
 
 class TestRecoveredInjectionSet:
     @pytest.fixture
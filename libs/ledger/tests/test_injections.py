@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 import numpy as np
 import pytest
 
-from ledger.injections import BilbyParameterSet, _WaveformGenerator
+from ledger.injections import (
+    BilbyParameterSet,
+    WaveformPolarizationSet,
+    _WaveformGenerator,
+)
 
 
 @pytest.fixture
@@ -156,6 +161,30 @@ class TestWaveformGenerator:
         )
 
 
+def test_parallel_waveform_generation(bilby_param_set, reference_frequency):
+    params = bilby_param_set[np.zeros((5,), dtype=int)]
+    params.mass_1 = params.mass_1 + np.arange(5)
+
+    args = (params, 20, reference_frequency, 512, 4, "IMRPhenomPv2", 1)
+    expected = WaveformPolarizationSet.from_parameters(*args)
+    assert len(expected) == 5
+    assert expected.plus.shape == (5, 2048)
+    assert (expected.plus[1:] != expected.plus[:1]).any()
+
+    with ThreadPoolExecutor(2) as ex:
+        threaded = WaveformPolarizationSet.from_parameters(
+            *args, ex=ex, chunk_size=2
+        )
+        chunked = WaveformPolarizationSet.from_parameters(
+            *args, ex=ex, num_workers=2
+        )
+    pooled = WaveformPolarizationSet.from_parameters(*args, num_workers=2)
+    for waveforms in [threaded, chunked, pooled]:
+        assert (waveforms.plus == expected.plus).all()
+        assert (waveforms.cross == expected.cross).all()
+        assert (waveforms.mass_1 == expected.mass_1).all()
+
+
 class TestLigoResponseSet:
     @pytest.fixture
     def duration(self):
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from unittest.mock import patch
 
+import h5py
 import numpy as np
 import pytest
 
@@ -23,6 +24,23 @@ class TestInjectionSet:
             else:
                 assert truth.all()
 
+        # test lazy reading, indexing rows before
+        # and after the full column is materialized
+        new = obj.__class__.read(fname, lazy=True)
+        idx = np.array([2, 0, 1, 2])
+        for key, field in obj.__dataclass_fields__.items():
+            value = getattr(new, key)
+            old = getattr(obj, key)
+            if field.metadata["kind"] == "metadata":
+                assert value == old
+                continue
+
+            assert len(value) == len(old)
+            assert (value[idx] == old[idx]).all()
+            assert (value[1:] == old[1:]).all()
+            assert (np.asarray(value) == old).all()
+            assert (value[idx] == old[idx]).all()
+
         # make sure we catch the error when we try
         # to sample without replacement
         with pytest.raises(ValueError):
@@ -182,3 +200,218 @@ class TestInjectionSet:
         assert (obj.ids == np.array([3, 2, 1])).all()
         assert obj.is_sorted_by("age")
         assert not obj.is_sorted_by("ids")
+
+    def test_group_by(self, parameter_set):
+        ids = np.array([1, 2, 3, 4, 5])
+        age = np.array([30, 31, 30, 32, 31])
+        obj = parameter_set(ids, age)
+
+        groups = obj.group_by("age")
+        assert sorted(groups) == [(30,), (31,), (32,)]
+        assert (groups[(30,)] == np.array([0, 2])).all()
+        assert (groups[(31,)] == np.array([1, 4])).all()
+        assert obj.group_by("age") is groups
+
+        subobj = obj.select_by("age", 31)
+        assert (subobj.ids == np.array([2, 5])).all()
+        assert len(obj.select_by("age", 33)) == 0
+
+        # groups should be recomputed once the object changes
+        obj.append(parameter_set(np.array([6]), np.array([32])))
+        assert (obj.select_by("age", 32).ids == np.array([4, 6])).all()
+
+    def test_append_amortized(self, parameter_set):
+        obj = parameter_set(np.array([0]), np.array([0]))
+        views = []
+        for i in range(1, 100):
+            views.append(obj.ids)
+            obj.append(parameter_set(np.array([i]), np.array([-i])))
+        assert (obj.ids == np.arange(100)).all()
+        assert (obj.age == -np.arange(100)).all()
+
+        # earlier views of the field shouldn't be
+        # affected by later appends, and only a
+        # handful of buffers should have been allocated
+        for i, view in enumerate(views):
+            assert (view == np.arange(i + 1)).all()
+        bases = {id(view.base) for view in views if view.base is not None}
+        assert len(bases) < 10
+
+        # replacing a field should start a new buffer
+        ids = obj.ids.copy()
+        obj.ids = ids
+        obj.append(parameter_set(np.array([100]), np.array([-100])))
+        assert (obj.ids == np.arange(101)).all()
+        assert (ids == np.arange(100)).all()
+
+        # mismatched shapes should still raise
+        with pytest.raises(ValueError):
+            obj.append(parameter_set(np.ones((1, 2)), np.ones((1, 2))))
+
+    def test_compact(self, parameter_set, tmp_dir):
+        obj = parameter_set(np.arange(3), np.arange(3))
+        obj.append(parameter_set(np.arange(3, 6), np.arange(3, 6)))
+        before = obj.age
+        obj.append(parameter_set(np.array([6]), np.array([6])))
+
+        # appends leave earlier arrays sharing memory with the fields
+        assert np.shares_memory(before, obj.age)
+
+        # until the fields are compacted into their own arrays
+        obj.compact()
+        for field in [obj.ids, obj.age]:
+            assert (field == np.arange(7)).all()
+            assert field.base is None
+        assert not np.shares_memory(before, obj.age)
+        assert "_buffers" not in obj.__dict__
+
+        # which writing does automatically
+        obj.append(parameter_set(np.array([7]), np.array([7])))
+        assert obj.ids.base is not None
+        obj.write(tmp_dir / "compact.hdf5")
+        assert obj.ids.base is None
+        assert (obj.ids == np.arange(8)).all()
+
+    def test_append_to_file(self, parameter_set, tmp_dir):
+        @dataclass
+        class DummyWaveform(parameter_set):
+            waves: np.ndarray = ledger.waveform()
+            count: int = ledger.metadata()
+
+            @classmethod
+            def compare_metadata(cls, key, ours, theirs):
+                if key == "count":
+                    return ours + theirs
+                return super().compare_metadata(key, ours, theirs)
+
+        fname = tmp_dir / "appended.h5"
+        objs = []
+        DummyWaveform(count=0).append_to_file(fname)
+        for i in range(5):
+            obj = DummyWaveform(
+                np.arange(3) + 3 * i,
+                np.random.randint(20, 40, size=3),
+                np.random.randn(3, 10),
+                i,
+            )
+            obj.append_to_file(fname, chunks=(2, 10))
+            objs.append(obj)
+
+        expected = objs[0]
+        for obj in objs[1:]:
+            expected.append(obj)
+        assert expected.count == 10
+
+        new = DummyWaveform.read(fname)
+        assert len(new) == 15
+        assert new.count == 10
+        assert (new.ids == expected.ids).all()
+        assert (new.age == expected.age).all()
+        assert (new.waves == expected.waves).all()
+        with h5py.File(fname, "r") as f:
+            assert f["waveforms"]["waves"].chunks == (2, 10)
+
+        # files written without resizable
+        # datasets shouldn't be appendable
+        expected.write(fname)
+        with pytest.raises(ValueError):
+            objs[1].append_to_file(fname)
+
+        expected.write(fname, resizable=True)
+        objs[1].append_to_file(fname)
+        assert len(DummyWaveform.read(fname)) == 18
+
+    def test_failed_append_to_file(self, parameter_set, tmp_dir):
+        @dataclass
+        class DummyWaveform(parameter_set):
+            waves: np.ndarray = ledger.waveform()
+            label: str = ledger.metadata()
+
+        def make(n, size=10, label="a"):
+            return DummyWaveform(
+                np.arange(n), np.arange(n), np.random.randn(n, size), label
+            )
+
+        fname = tmp_dir / "appended.h5"
+        make(3).append_to_file(fname)
+        with open(fname, "rb") as f:
+            contents = f.read()
+
+        # fields that can't be appended come after ones that
+        # can, so none of them should be changed before failing
+        with pytest.raises(ValueError):
+            make(2, size=5).append_to_file(fname)
+        with pytest.raises(ValueError):
+            make(2, label="b").append_to_file(fname)
+
+        with open(fname, "rb") as f:
+            assert f.read() == contents
+        obj = DummyWaveform.read(fname)
+        assert len(obj) == 3
+        assert obj.label == "a"
+        assert obj.waves.shape == (3, 10)
+
+    def test_lazy_column(self, tmp_dir):
+        data = np.random.randn(100, 8)
+        fname = tmp_dir / "data.h5"
+        with h5py.File(fname, "w") as f:
+            f.create_dataset("waveforms/data", data=data, chunks=(10, 8))
+
+        column = ledger.LazyColumn(fname, "waveforms/data")
+        assert len(column) == 100
+        assert column.shape == (100, 8)
+
+        # indexing should only read the requested rows
+        idx = np.array([50, 3, 4, 5, 50, 99, 0])
+        assert (column[idx] == data[idx]).all()
+        assert (column[idx, 2:4] == data[idx, 2:4]).all()
+        assert (column[-1] == data[-1]).all()
+        assert (column[10:40:3] == data[10:40:3]).all()
+        assert (column[::-1] == data[::-1]).all()
+        mask = data[:, 0] > 0
+        assert (column[mask] == data[mask]).all()
+        assert column._data is None
+
+        # while anything else reads and caches everything
+        assert ((column * 2) == data * 2).all()
+        assert column.mean() == data.mean()
+        assert column._data is not None
+
+        with h5py.File(fname, "r") as f:
+            rows = ledger.read_rows(f["waveforms/data"], idx)
+        assert (rows == data[idx]).all()
+
+    def test_sample_chunk_aligned(self):
+        for replace in [True, False]:
+            idx = ledger.sample_chunk_aligned(103, 25, 10, replace=replace)
+            assert len(idx) == 25
+            assert ((0 <= idx) & (idx < 103)).all()
+            if not replace:
+                assert len(np.unique(idx)) == 25
+
+            # samples should come from at most
+            # one more block than necessary
+            assert len(np.unique(idx // 10)) <= 4
+
+        # without replacement, we should be able to
+        # sample everything, including the partial block
+        idx = ledger.sample_chunk_aligned(103, 103, 10)
+        assert (np.sort(idx) == np.arange(103)).all()
+
+    def test_sample_from_file_chunk_aligned(self, parameter_set, tmp_dir):
+        @dataclass
+        class DummyWaveform(parameter_set):
+            waves: np.ndarray = ledger.waveform()
+
+        ids = np.arange(100)
+        waves = np.random.randn(100, 4)
+        obj = DummyWaveform(ids, ids * 2, waves)
+        fname = tmp_dir / "chunked.h5"
+        obj.write(fname, chunks=(8, 4))
+
+        new = DummyWaveform.sample_from_file(fname, 20, chunk_aligned=True)
+        assert len(new) == 20
+        assert len(np.unique(new.ids)) == 20
+        assert len(np.unique(new.ids // 8)) <= 4
+        assert (new.age == new.ids * 2).all()
+        assert (new.waves == waves[new.ids]).all()
@@ -0,0 +1,109 @@
+"""
+Benchmark the cost of estimating PSDs for a stream of overlapping
+snapshots by recomputing every FFT segment (`PsdEstimator`) and
+by reusing the segments shared with the last snapshot
+(`IncrementalPsdEstimator`), along with the largest relative
+difference between the PSDs the two produce.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+import torch
+
+from utils.logging import configure_logging
+from utils.preprocessing import IncrementalPsdEstimator, PsdEstimator
+
+
+def _time_updates(estimator, snapshots, device):
+    latencies, psds = [], []
+    for snapshot in snapshots:
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        _, psd = estimator(snapshot)
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+        latencies.append(time.perf_counter() - start)
+        psds.append(psd)
+    return np.array(latencies[1:]) * 1e3, torch.stack(psds)
+
+
+def main(
+    psd_lengths: tuple[float, ...] = (8, 32, 64, 128),
+    num_ifos: int = 2,
+    sample_rate: float = 2048,
+    kernel_length: float = 1.5,
+    fduration: float = 1,
+    fftlength: float = 2,
+    inference_sampling_rate: float = 16,
+    batch_size: int = 128,
+    num_updates: int = 20,
+    device: str = "cpu",
+):
+    """
+    Args:
+        psd_lengths:
+            Lengths of data used for PSD estimation in seconds
+        num_ifos:
+            Number of interferometers in each snapshot
+        sample_rate:
+            Sample rate of the data in Hz
+        kernel_length:
+            Length of the network's kernels in seconds
+        fduration:
+            Length of the whitening filter in seconds
+        fftlength:
+            Length of the FFT segments in seconds
+        inference_sampling_rate:
+            Rate at which kernels are sampled in Hz
+        batch_size:
+            Number of kernels produced by each update, which
+            determines how far consecutive snapshots are shifted
+        num_updates:
+            Number of updates to time for each PSD length
+        device:
+            Device on which to estimate the PSDs
+    """
+    configure_logging()
+    stride = int(sample_rate / inference_sampling_rate)
+    update_size = batch_size * stride
+    whiten_size = (batch_size - 1) * stride
+    whiten_size += int((kernel_length + fduration) * sample_rate)
+    length = whiten_size / sample_rate
+
+    for psd_length in psd_lengths:
+        size = int(psd_length * sample_rate) + whiten_size
+        stream = torch.randn(num_ifos, size + num_updates * update_size)
+        stream = stream.double().to(device)
+        snapshots = [
+            stream[:, i * update_size : i * update_size + size]
+            for i in range(num_updates)
+        ]
+
+        kwargs = {"average": "median"}
+        batch = PsdEstimator(length, sample_rate, fftlength, **kwargs)
+        batch, expected = _time_updates(batch.to(device), snapshots, device)
+
+        incremental = IncrementalPsdEstimator(
+            length, sample_rate, fftlength, update_size, fast=True, **kwargs
+        )
+        incremental, psds = _time_updates(
+            incremental.to(device), snapshots, device
+        )
+
+        err = (psds - expected).abs() / expected
+        err = err.max().item()
+        logging.info(
+            f"PSD length {psd_length}s: "
+            f"batch {np.median(batch):0.3f}ms, "
+            f"incremental {np.median(incremental):0.3f}ms per update, "
+            f"speedup {np.median(batch) / np.median(incremental):0.1f}x, "
+            f"max relative error {err:0.2e}"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
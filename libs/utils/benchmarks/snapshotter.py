@@ -0,0 +1,113 @@
+"""
+Benchmark the cost of snapshot updates using concatenation
+(`BackgroundSnapshotter`) and in-place rolling state
+(`RollingSnapshotter`) for a range of PSD lengths and numbers
+of independent streams sharing a device.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+import torch
+
+from utils.logging import configure_logging
+from utils.preprocessing import BackgroundSnapshotter, RollingSnapshotter
+
+
+def _time_updates(snapshotters, states, updates, device):
+    latencies = []
+    for update in updates:
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for i, snapshotter in enumerate(snapshotters):
+            _, states[i] = snapshotter(update, states[i])
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies[1:]) * 1e3
+
+
+def main(
+    psd_lengths: tuple[float, ...] = (8, 32, 64, 128),
+    streams_per_gpu: tuple[int, ...] = (1, 4, 8),
+    num_ifos: int = 2,
+    sample_rate: float = 2048,
+    kernel_length: float = 1.5,
+    fduration: float = 1,
+    inference_sampling_rate: float = 16,
+    batch_size: int = 128,
+    num_updates: int = 50,
+    device: str = "cpu",
+):
+    """
+    Args:
+        psd_lengths:
+            Lengths of data used for PSD estimation in seconds
+        streams_per_gpu:
+            Numbers of independent streams, each with their
+            own snapshot state, to update on each step
+        num_ifos:
+            Number of interferometers in each stream
+        sample_rate:
+            Sample rate of the data in Hz
+        kernel_length:
+            Length of the network's kernels in seconds
+        fduration:
+            Length of the whitening filter in seconds
+        inference_sampling_rate:
+            Rate at which kernels are sampled in Hz
+        batch_size:
+            Number of kernels produced by each update, which
+            determines the length of the updates
+        num_updates:
+            Number of updates to time for each configuration
+        device:
+            Device on which to run the snapshotters
+    """
+    configure_logging()
+    stride = int(sample_rate / inference_sampling_rate)
+    update_size = batch_size * stride
+    # use a batch of 2 for background and
+    # injected data, as in the exported model
+    updates = torch.randn(num_updates, 2, num_ifos, update_size)
+    updates = updates.to(device)
+
+    args = (
+        kernel_length,
+        fduration,
+        sample_rate,
+        inference_sampling_rate,
+    )
+    for psd_length in psd_lengths:
+        for num_streams in streams_per_gpu:
+            concat = BackgroundSnapshotter(psd_length, *args).to(device)
+            state_shape = (2, num_ifos, concat.state_size)
+            states = [torch.zeros(state_shape, device=device)] * num_streams
+            concat = [concat] * num_streams
+            concat = _time_updates(concat, states, updates, device)
+
+            rolling = [
+                RollingSnapshotter(
+                    psd_length,
+                    *args,
+                    update_size=update_size / sample_rate,
+                    num_channels=num_ifos,
+                    batch_size=2,
+                ).to(device)
+                for _ in range(num_streams)
+            ]
+            states = [torch.zeros(state_shape, device=device)] * num_streams
+            rolling = _time_updates(rolling, states, updates, device)
+            logging.info(
+                f"PSD length {psd_length}s, {num_streams} stream(s): "
+                f"concatenation {np.median(concat):0.3f}ms, "
+                f"rolling {np.median(rolling):0.3f}ms per update, "
+                f"speedup {np.median(concat) / np.median(rolling):0.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from utils.integration import boxcar_integrate
+
+
+@pytest.mark.parametrize("window_size", [1, 2, 17, 513, 4097])
+@pytest.mark.parametrize("block_size", [64, 2**16])
+def test_boxcar_integrate(window_size, block_size):
+    x = np.random.randn(20000) + 10
+    expected = np.convolve(x, np.ones(window_size) / window_size, "valid")
+    integrated = boxcar_integrate(x, window_size, block_size)
+    assert integrated.shape == expected.shape
+    assert np.allclose(integrated, expected, rtol=1e-12, atol=0)
+
+    # timeseries that are shorter than the window are empty
+    assert len(boxcar_integrate(x[: window_size - 1], window_size)) == 0
+
+    with pytest.raises(ValueError):
+        boxcar_integrate(x, 0)
+
+
+def test_boxcar_integrate_drift():
+    # make sure round-off doesn't accumulate over long timeseries
+    # with a large offset by comparing a window near the end
+    # to the exact value computed directly
+    x = np.random.randn(2**22) + 1e4
+    integrated = boxcar_integrate(x, 100)
+    assert np.isclose(integrated[-1], x[-100:].mean(), rtol=1e-14, atol=0)
@@ -0,0 +1,111 @@
+import pytest
+import torch
+
+from utils.preprocessing import (
+    BackgroundSnapshotter,
+    BatchWhitener,
+    IncrementalPsdEstimator,
+    PsdEstimator,
+    RollingSnapshotter,
+)
+
+
+@pytest.mark.parametrize("scripted", [False, True])
+def test_rolling_snapshotter(scripted):
+    args = (8, 1.5, 1, 256, 16)
+    expected = BackgroundSnapshotter(*args)
+    snapshotter = RollingSnapshotter(*args, update_size=1, num_channels=2)
+    if scripted:
+        snapshotter = torch.jit.script(snapshotter)
+
+    expected_state = state = torch.zeros((1, 2, expected.state_size))
+    for i in range(40):
+        # include updates smaller than the update size, as well
+        # as states that weren't returned by the last call
+        update = torch.randn(1, 2, 128 if i % 5 else 256).double()
+        if i == 20:
+            state = state.clone()
+
+        x, state = snapshotter(update, state)
+        expected_x, expected_state = expected(update, expected_state)
+        assert x.dtype == expected_x.dtype
+        assert torch.equal(x, expected_x)
+        assert torch.equal(state, expected_state)
+
+    # updates larger than the update size
+    # should fall back to concatenation
+    update = torch.randn(1, 2, 300).double()
+    x, state = snapshotter(update, state)
+    expected_x, _ = expected(update, expected_state)
+    assert torch.equal(x, expected_x)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.parametrize("average", ["mean", "median"])
+def test_incremental_psd_estimator(average, fast):
+    sample_rate, update_size = 128, 128
+    args = (2, sample_rate, 2)
+
+    # use a double precision window so that every bin
+    # affected by detrending is corrected with `fast=True`
+    window = torch.hann_window(2 * sample_rate, dtype=torch.float64)
+    kwargs = {"window": window, "average": average, "fast": fast}
+    expected = PsdEstimator(*args, **kwargs)
+    estimator = IncrementalPsdEstimator(
+        *args, update_size=update_size, **kwargs
+    )
+    assert estimator.shift == 1
+
+    # record how many samples each call computes FFTs for
+    sizes = []
+    compute_ffts = estimator.compute_ffts
+
+    def record(x):
+        sizes.append(x.size(-1))
+        return compute_ffts(x)
+
+    estimator.compute_ffts = record
+
+    # give the data an offset so that `fast=True`
+    # has to correct for it when detrending
+    size = 10 * sample_rate
+    stream = torch.randn(2, size + 20 * update_size).double() + 10
+    for i in range(20):
+        start = i * update_size
+        X = stream[:, start : start + size]
+        if i == 10:
+            # a discontinuity should force a full recompute
+            X = X.clone()
+            X[:, 0] += 1
+
+        x, psd = estimator(X)
+        expected_x, expected_psd = expected(X)
+        assert torch.equal(x, expected_x)
+        torch.testing.assert_close(psd, expected_psd)
+
+    background_size = size - 2 * sample_rate
+    nperseg = estimator.nperseg
+    assert sizes[0] == sizes[10] == background_size
+    for i in range(20):
+        if i not in (0, 10):
+            assert sizes[i] == nperseg
+
+    # updates which aren't a multiple of the
+    # FFT stride can't reuse any segments
+    estimator = IncrementalPsdEstimator(*args, update_size=update_size // 2)
+    assert estimator.shift == 0
+
+
+@pytest.mark.parametrize("highpass", [None, 32])
+def test_batch_whitener_incremental_psd(highpass):
+    args = (1, 128, 16, 8, 1, 2)
+    expected = BatchWhitener(*args, highpass=highpass)
+    whitener = BatchWhitener(*args, highpass=highpass, incremental_psd=True)
+
+    # the incremental estimator should detrend
+    # the same way as the one it replaces
+    fast = expected.psd_estimator.spectral_density.fast
+    assert whitener.psd_estimator.fast == fast == (highpass is not None)
+
+    x = torch.randn(2, 16 * 128).double()
+    torch.testing.assert_close(whitener(x), expected(x))
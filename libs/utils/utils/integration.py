@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def boxcar_integrate(
+    x: np.ndarray, window_size: int, block_size: int = 2**16
+) -> np.ndarray:
+    """
+    Compute the average of every length `window_size` window
+    of `x`, equivalent to a `"valid"` mode convolution of `x`
+    with a normalized boxcar filter, in O(n) time using
+    running sums rather than an O(n * window_size) convolution.
+
+    Sums are accumulated in float64 relative to the local
+    mean and restarted every `block_size` outputs, so that
+    round-off error doesn't grow with the length or offset
+    of `x` as it would for a single running sum over a
+    long timeseries.
+
+    Args:
+        x:
+            1D array to integrate
+        window_size:
+            Number of samples to average over
+        block_size:
+            Number of outputs to compute from
+            each restarted running sum
+
+    Returns:
+        Array of length `len(x) - window_size + 1` whose
+        `i`th element is the mean of `x[i : i + window_size]`
+    """
+    if window_size < 1:
+        raise ValueError(
+            f"Integration window size must be positive, got {window_size}"
+        )
+
+    x = np.asarray(x, dtype=np.float64)
+    num = len(x) - window_size + 1
+    if num <= 0:
+        return np.zeros((0,))
+
+    block_size = max(block_size, window_size)
+    integrated = np.empty((num,))
+    for start in range(0, num, block_size):
+        stop = min(start + block_size, num)
+        block = x[start : stop + window_size - 1]
+
+        # accumulate deviations from the block mean so that
+        # the magnitude of the running sum, and so its
+        # round-off error, stays small for offset data
+        offset = block.mean()
+        sums = np.zeros((len(block) + 1,))
+        np.cumsum(block - offset, out=sums[1:])
+        sums = sums[window_size:] - sums[:-window_size]
+        integrated[start:stop] = sums / window_size + offset
+    return integrated
@@ -1,6 +1,7 @@
 from typing import Callable, Optional, Tuple
 
 import torch
+from ml4gw.spectral import median
 from ml4gw.transforms import SpectralDensity, Whiten
 from ml4gw.utils.slicing import unfold_windows
 
@@ -29,6 +30,114 @@ class BackgroundSnapshotter(torch.nn.Module):
         return x, snapshot
 
 
+class RollingSnapshotter(BackgroundSnapshotter):
+    """
+    `BackgroundSnapshotter` which updates its state in place
+    rather than concatenating the full snapshot with each
+    update. Data is stored in a preallocated buffer holding
+    two copies of the last `state_size` + `update_size`
+    samples laid end to end, and each update is written into
+    both copies, so that the returned kernel and snapshot
+    are always contiguous views into the buffer. Passing the
+    returned snapshot back in on the next call then only
+    requires copying the update. Any other snapshot, e.g.
+    an initial state, is first copied into the buffer.
+
+    Since the outputs are views into the buffer, they'll be
+    overwritten by subsequent calls. Updates larger than
+    `update_size`, or with different batch or channel
+    dimensions than the buffer, fall back to concatenation.
+
+    Args:
+        psd_length:
+            Length of data used for PSD estimation in seconds
+        kernel_length:
+            Length of the kernels analyzed by the network in seconds
+        fduration:
+            Length of the whitening filter in seconds
+        sample_rate:
+            Rate at which the data is sampled in Hz
+        inference_sampling_rate:
+            Rate at which kernels are sampled in Hz
+        update_size:
+            Maximum length of each update in seconds
+        num_channels:
+            Number of channels in the data
+        batch_size:
+            Size of the batch dimension of the data
+    """
+
+    def __init__(
+        self,
+        psd_length,
+        kernel_length,
+        fduration,
+        sample_rate,
+        inference_sampling_rate,
+        update_size: float,
+        num_channels: int,
+        batch_size: int = 1,
+    ) -> None:
+        super().__init__(
+            psd_length,
+            kernel_length,
+            fduration,
+            sample_rate,
+            inference_sampling_rate,
+        )
+        self.buffer_size = self.state_size + int(update_size * sample_rate)
+        self.register_buffer(
+            "buffer",
+            torch.zeros((batch_size, num_channels, 2 * self.buffer_size)),
+            persistent=False,
+        )
+        self.register_buffer("snapshot", torch.zeros((0,)), persistent=False)
+        self.head = 0
+
+    def _write(self, x: Tensor) -> None:
+        # overwrite the oldest samples in both copies of the
+        # buffer, wrapping around to the start if necessary
+        size = x.size(-1)
+        first = min(size, self.buffer_size - self.head)
+        for offset in [0, self.buffer_size]:
+            start = offset + self.head
+            self.buffer[:, :, start : start + first] = x[:, :, :first]
+            if size > first:
+                stop = offset + size - first
+                self.buffer[:, :, offset:stop] = x[:, :, first:]
+        self.head = (self.head + size) % self.buffer_size
+
+    def forward(
+        self, update: Tensor, snapshot: Tensor
+    ) -> Tuple[Tensor, Tensor]:
+        size = self.state_size + update.size(-1)
+        if (
+            size > self.buffer_size
+            or update.shape[:2] != self.buffer.shape[:2]
+            or snapshot.shape[:2] != self.buffer.shape[:2]
+            or snapshot.size(-1) != self.state_size
+        ):
+            x = torch.cat([snapshot, update], dim=-1)
+            return x, x[:, :, -self.state_size :]
+
+        # match the dtype promotion that concatenation would do
+        dtype = torch.promote_types(update.dtype, snapshot.dtype)
+        dtype = torch.promote_types(dtype, self.buffer.dtype)
+        if dtype != self.buffer.dtype:
+            self.buffer = self.buffer.to(dtype)
+
+        # only copy the snapshot into the buffer if it
+        # isn't the snapshot we returned on the last call
+        if snapshot is not self.snapshot:
+            self._write(snapshot)
+        self._write(update)
+
+        end = self.head + self.buffer_size
+        x = self.buffer[:, :, end - size : end]
+        self.snapshot = x[:, :, -self.state_size :]
+        return x, self.snapshot
+
+
 class PsdEstimator(torch.nn.Module):
     """
     Module that takes a sample of data, splits it into
@@ -96,6 +205,204 @@ class PsdEstimator(torch.nn.Module):
         return X, psds
 
 
+class IncrementalPsdEstimator(PsdEstimator):
+    """
+    `PsdEstimator` for streams of overlapping inputs which
+    reuses the FFTs of segments from its last call. If the
+    background data of an input is the background data of
+    the last input shifted by `update_size` samples, and
+    `update_size` is a multiple of the stride between FFT
+    segments, only the FFTs of the segments which weren't in
+    the last input are computed. Otherwise, the FFTs of all
+    segments are computed from scratch. Either way, the PSD
+    is the mean or median of the spectra of all the segments
+    in the background, so the estimated PSDs match those of
+    `PsdEstimator` with the same `fast` setting.
+
+    With `fast=True`, the mean of the whole background is
+    subtracted from each segment rather than each segment's
+    own mean. Since that mean changes with every update, the
+    spectra are cached without detrending, along with the
+    FFTs of the bins that subtracting a constant affects by
+    more than the rounding error of the window, which for
+    the default Hann window are the lowest two. Those bins
+    are recomputed on every call with the mean removed, so
+    the PSDs match those of `PsdEstimator` to within the
+    precision of the window.
+
+    Reusing segments only pays off when computing their FFTs
+    is a large part of the cost of the PSD, since the spectra
+    of every segment still need to be averaged on each call.
+    In `benchmarks/psd.py` on CPU, it's no faster than
+    `PsdEstimator` for PSDs of a few FFT lengths, such as the
+    default 8 seconds of data with 2 second FFTs, and about
+    twice as fast for PSDs of a minute or more. Only enable
+    it for long PSDs, after checking that it's faster on
+    your hardware.
+
+    Args:
+        length:
+            The length, in seconds, of timeseries data
+            to be returned for whitening
+        sample_rate:
+            Rate at which input data has been sampled in Hz
+        fftlength:
+            Length of FFTs to use when computing the PSD
+        update_size:
+            Number of samples by which consecutive inputs
+            are expected to be shifted
+        window:
+            Window to apply to each FFT segment. Defaults
+            to a Hann window
+        overlap:
+            Amount of overlap between FFT windows when
+            computing the PSD. Default value of `None`
+            uses `fftlength / 2`
+        average:
+            Method for aggregating spectra from FFT
+            windows, either `"mean"` or `"median"`
+        fast:
+            If `True`, detrend segments using the mean of the
+            whole background, as `PsdEstimator` does with
+            `fast=True`. Otherwise, detrend each segment
+            individually.
+    """
+
+    def __init__(
+        self,
+        length: float,
+        sample_rate: float,
+        fftlength: float,
+        update_size: int,
+        window: Optional[torch.Tensor] = None,
+        overlap: Optional[float] = None,
+        average: str = "median",
+        fast: bool = False,
+    ) -> None:
+        super().__init__(
+            length,
+            sample_rate,
+            fftlength,
+            window=window,
+            overlap=overlap,
+            average=average,
+            fast=fast,
+        )
+        self.nperseg = self.spectral_density.nperseg
+        self.nstride = self.spectral_density.nstride
+        self.update_size = update_size
+        self.average = average
+        self.fast = fast
+
+        # number of segments each update shifts by,
+        # or 0 if segments can't be reused
+        self.shift = 0
+        if update_size > 0 and not update_size % self.nstride:
+            self.shift = update_size // self.nstride
+
+        # the FFT of the window gives the change in each
+        # segment's FFT from subtracting a constant from it,
+        # so keep the bins where that's larger than the
+        # rounding error of the window itself
+        window = self.spectral_density.window
+        eps = torch.finfo(window.dtype).eps
+        window_fft = torch.fft.rfft(window.double())
+        magnitude = window_fft.abs()
+        bins = torch.where(magnitude > eps * magnitude.max())[0]
+        self.register_buffer("bins", bins, persistent=False)
+        self.register_buffer("window_fft", window_fft[bins], persistent=False)
+
+        # scale the power in each bin to a one-sided density
+        scale = self.spectral_density.scale.double()
+        factors = 2 * scale * torch.ones_like(magnitude)
+        factors[0] = scale
+        if not self.nperseg % 2:
+            factors[-1] = scale
+        self.register_buffer("factors", factors, persistent=False)
+
+        self.register_buffer("background", torch.zeros((0,)), persistent=False)
+        self.register_buffer("spectra", torch.zeros((0,)), persistent=False)
+        self.register_buffer("low", torch.zeros((0,)), persistent=False)
+
+    def compute_ffts(self, x: Tensor) -> Tensor:
+        """
+        Compute the FFT of each windowed segment of `x`,
+        returning a tensor with the segments along its second
+        to last dimension and frequencies along its last.
+        Segments are only detrended if `fast` is `False`.
+        """
+        x = x.unfold(-1, self.nperseg, self.nstride)
+        if not self.fast:
+            x = x - x.mean(dim=-1, keepdim=True)
+        x = x * self.spectral_density.window
+        return torch.fft.rfft(x, dim=-1)
+
+    def compute_spectra(self, ffts: Tensor, factors: Tensor) -> Tensor:
+        return (ffts.real**2 + ffts.imag**2) * factors
+
+    def aggregate(self, spectra: Tensor) -> Tensor:
+        if self.average == "mean":
+            return spectra.mean(dim=-2)
+        return median(spectra, -2)
+
+    def _can_reuse(self, background: Tensor) -> bool:
+        if not self.shift or self.background.shape != background.shape:
+            return False
+        num_segments = self.spectra.size(-2)
+        if self.shift >= num_segments:
+            return False
+
+        # make sure the new background data really is the
+        # old background data shifted by one update
+        old = self.background[..., self.update_size :]
+        new = background[..., : -self.update_size]
+        return bool(torch.equal(old, new))
+
+    def forward(self, X: Tensor) -> Tuple[Tensor, Tensor]:
+        splits = [X.size(-1) - self.size, self.size]
+        background, X = torch.split(X, splits, dim=-1)
+
+        # see `PsdEstimator.forward`
+        if X.ndim == 3 and X.size(0) == 2:
+            background = background[0]
+            X = X[1]
+
+        background = background.double()
+        if self._can_reuse(background):
+            # compute FFTs for just the segments
+            # that start after the last reused one
+            num_segments = self.spectra.size(-2)
+            start = (num_segments - self.shift) * self.nstride
+            ffts = self.compute_ffts(background[..., start:])
+            spectra = self.compute_spectra(ffts, self.factors)
+            spectra = torch.cat(
+                [self.spectra[..., self.shift :, :], spectra], -2
+            )
+            low = ffts[..., self.bins]
+            low = torch.cat([self.low[..., self.shift :, :], low], -2)
+        else:
+            ffts = self.compute_ffts(background)
+            spectra = self.compute_spectra(ffts, self.factors)
+            low = ffts[..., self.bins]
+
+        # keep a copy of the background, since inputs
+        # may be views that get overwritten in place
+        self.background = background.clone()
+        self.spectra = spectra
+        self.low = low
+
+        psds = self.aggregate(spectra)
+        if self.fast:
+            # subtracting the mean from every sample of a
+            # segment subtracts the mean times the FFT of
+            # the window from the segment's FFT
+            mean = background.mean(dim=-1, keepdim=True)
+            low = low - mean[..., None] * self.window_fft
+            low = self.compute_spectra(low, self.factors[self.bins])
+            psds[..., self.bins] = self.aggregate(low)
+        return X, psds
+
+
 class BatchWhitener(torch.nn.Module):
     """Calculate the PSDs and whiten an entire batch of kernels at once"""
 
@@ -111,6 +418,7 @@ class BatchWhitener(torch.nn.Module):
         highpass: Optional[float] = None,
         lowpass: Optional[float] = None,
         return_whitened: bool = False,
+        incremental_psd: bool = False,
     ) -> None:
         super().__init__()
         self.stride_size = int(sample_rate / inference_sampling_rate)
@@ -124,14 +432,27 @@ class BatchWhitener(torch.nn.Module):
         fsize = int(fduration * sample_rate)
         size = strides + self.kernel_size + fsize
         length = size / sample_rate
-        self.psd_estimator = PsdEstimator(
-            length,
-            sample_rate,
-            fftlength=fftlength,
-            overlap=None,
-            average="median",
-            fast=highpass is not None,
-        )
+        if incremental_psd:
+            # consecutive inputs from a snapshotter are
+            # shifted by one batch worth of strides
+            self.psd_estimator = IncrementalPsdEstimator(
+                length,
+                sample_rate,
+                fftlength=fftlength,
+                update_size=int(batch_size * self.stride_size),
+                overlap=None,
+                average="median",
+                fast=highpass is not None,
+            )
+        else:
+            self.psd_estimator = PsdEstimator(
+                length,
+                sample_rate,
+                fftlength=fftlength,
+                overlap=None,
+                average="median",
+                fast=highpass is not None,
+            )
         self.whitener = Whiten(fduration, sample_rate, highpass, lowpass)
 
     def forward(self, x: Tensor) -> Tensor:
@@ -31,6 +31,7 @@ def rejection_sample(
     snr_threshold: float,
     psd: Union[Path, torch.Tensor],
     max_num_samples: int,
+    num_workers: int = 1,
 ) -> Tuple[ResponseSetFields, InjectionParameterSet]:
     # get the detector tensors and vertices
     # for projecting our waveforms
@@ -74,6 +75,7 @@ def rejection_sample(
             waveform_duration,
             waveform_approximant,
             right_pad,
+            num_workers=num_workers,
         )
         polarizations = {
             "cross": torch.Tensor(polarization_set.cross),
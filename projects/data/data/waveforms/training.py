@@ -15,6 +15,7 @@ def training_waveforms(
     reference_frequency: float,
     waveform_approximant: str,
     right_pad: float,
+    num_workers: int = 1,
 ):
     """
     Generates random training waveforms polarizations from a
@@ -43,6 +44,8 @@ def training_waveforms(
             Location of the defining point of the signal within
             the generated waveform relative to the right edge
             of the waveform (in seconds).
+        num_workers:
+            Number of processes to generate waveforms with
 
     Returns:
         An IntrinsicParameterSet generated from the sampled parameters
@@ -61,6 +64,7 @@ def training_waveforms(
         waveform_duration,
         waveform_approximant,
         right_pad,
+        num_workers=num_workers,
     )
     return waveforms
 
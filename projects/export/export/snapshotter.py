@@ -39,6 +39,11 @@ def add_streaming_input_preprocessor(
 ) -> "ExposedTensor":
     """Create a snapshotter model and add it to the repository"""
 
+    # Triton passes the snapshot state into and out of the model
+    # on each request, so the exported graph has to be a pure
+    # function of its inputs. Use the concatenating snapshotter
+    # rather than `RollingSnapshotter`, whose preallocated buffer
+    # would just be baked into the graph as a constant
     snapshotter = BackgroundSnapshotter(
         psd_length=psd_length,
         kernel_length=kernel_length,
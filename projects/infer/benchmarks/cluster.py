@@ -0,0 +1,93 @@
+"""
+Benchmark the vectorized clustering used by `Postprocessor.cluster`
+against the original iterative implementation on a multi-day
+timeseries of simulated network outputs, i.e. on the amount
+of data analyzed for a single timeshift of a typical segment.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+
+from infer.postprocess import Postprocessor
+from utils.logging import configure_logging
+
+
+def iterative_cluster(y: np.ndarray, window_size: int) -> np.ndarray:
+    i = np.argmax(y[:window_size])
+    idx = []
+    while i < len(y):
+        window = y[i + 1 : i + 1 + window_size]
+        if (y[i] <= window).any():
+            i += np.argmax(window) + 1
+        else:
+            idx.append(i)
+            i += window_size + 1
+    return np.array(idx, dtype=int)
+
+
+def _time(f, *args, repeats: int = 1):
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = f(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(
+    days: float = 3,
+    inference_sampling_rate: float = 4,
+    integration_window_length: float = 1,
+    cluster_window_length: float = 8,
+    repeats: int = 3,
+    seed: int = 0,
+):
+    """
+    Args:
+        days:
+            Length of the simulated output timeseries in days
+        inference_sampling_rate:
+            Rate at which inference was performed
+        integration_window_length:
+            Length of the integration window in seconds
+        cluster_window_length:
+            Length of the clustering window in seconds
+        repeats:
+            Number of times to repeat each measurement,
+            with the fastest one being reported
+        seed:
+            Random seed used to generate the outputs
+    """
+    configure_logging()
+    postprocessor = Postprocessor(
+        t0=0,
+        shifts=[0, 1],
+        psd_length=0,
+        fduration=0,
+        inference_sampling_rate=inference_sampling_rate,
+        integration_window_length=integration_window_length,
+        cluster_window_length=cluster_window_length,
+    )
+
+    size = int(days * 86400 * inference_sampling_rate)
+    rng = np.random.default_rng(seed)
+    y = postprocessor.integrate(rng.standard_normal(size))
+    logging.info(f"Clustering {size} outputs ({days} days of data)")
+
+    window_size = postprocessor.cluster_window_size // 2
+    iterative, idx = _time(iterative_cluster, y, window_size)
+    vectorized, events = _time(postprocessor.cluster, y, repeats=repeats)
+    if not (events.detection_statistic == y[idx]).all():
+        raise ValueError("Vectorized clustering produced different events")
+
+    logging.info(f"Found {len(events)} events")
+    logging.info(f"Iterative clustering: {iterative:0.3f}s per shift")
+    logging.info(f"Vectorized clustering: {vectorized:0.3f}s per shift")
+    logging.info(f"Speedup: {iterative / vectorized:0.1f}x")
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
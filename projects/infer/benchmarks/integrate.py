@@ -0,0 +1,76 @@
+"""
+Benchmark the running-sum boxcar integration used by
+`Postprocessor.integrate` against direct convolution
+for a range of integration window lengths.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+
+from utils.integration import boxcar_integrate
+from utils.logging import configure_logging
+
+
+def convolve_integrate(y: np.ndarray, window_size: int) -> np.ndarray:
+    window = np.ones((window_size,)) / window_size
+    return np.convolve(y, window, mode="valid")
+
+
+def _time(f, *args, repeats: int = 1):
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = f(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(
+    hours: float = 24,
+    inference_sampling_rate: float = 16,
+    integration_window_lengths: tuple[float, ...] = (0.5, 1, 2, 8),
+    repeats: int = 3,
+    seed: int = 0,
+):
+    """
+    Args:
+        hours:
+            Length of the simulated output timeseries in hours
+        inference_sampling_rate:
+            Rate at which inference was performed
+        integration_window_lengths:
+            Lengths of the integration windows to
+            benchmark in seconds
+        repeats:
+            Number of times to repeat each measurement,
+            with the fastest one being reported
+        seed:
+            Random seed used to generate the outputs
+    """
+    configure_logging()
+    size = int(hours * 3600 * inference_sampling_rate)
+    rng = np.random.default_rng(seed)
+    y = rng.standard_normal(size)
+    logging.info(f"Integrating {size} outputs ({hours} hours of data)")
+
+    for length in integration_window_lengths:
+        window_size = int(length * inference_sampling_rate) + 1
+        convolve, expected = _time(
+            convolve_integrate, y, window_size, repeats=repeats
+        )
+        running, integrated = _time(
+            boxcar_integrate, y, window_size, repeats=repeats
+        )
+        error = np.abs(integrated - expected).max()
+        logging.info(
+            f"Window of {length}s ({window_size} samples): "
+            f"convolution {convolve:0.3f}s, running sum {running:0.3f}s, "
+            f"speedup {convolve / running:0.1f}x, max error {error:0.2e}"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -16,6 +16,7 @@ def build_parser():
     parser.add_argument("--logfile", type=str, default=None)
     parser.add_argument("--outdir", type=str, default=None)
     parser.add_argument("--force", type=bool, default=False)
+    parser.add_argument("--stream", type=bool, default=False)
 
     parser.add_class_arguments(InferenceClient, "client")
     parser.add_class_arguments(Sequence, "data")
@@ -54,7 +55,9 @@ def main(args=None):
 
     cfg = parser.instantiate_classes(cfg)
     with cfg.client:
-        background, foreground = infer(cfg.client, cfg.data, cfg.postprocessor)
+        background, foreground = infer(
+            cfg.client, cfg.data, cfg.postprocessor, stream=cfg.stream
+        )
 
     if cfg.outdir is not None:
         background.write(background_path)
@@ -10,6 +10,23 @@ from ratelimiter import RateLimiter
 
 from ledger.events import EventSet, RecoveredInjectionSet
 from ledger.injections import InterferometerResponseSet, waveform_class_factory
+from infer.postprocess import Postprocessor
+
+
+def _concat(events: list[EventSet]) -> EventSet:
+    """
+    Combine the events emitted by a streaming postprocessor
+    in one pass, rather than appending them one at a time
+    """
+    Tb = sum(i.Tb for i in events)
+    events = [i for i in events if len(i)]
+    if not events:
+        return EventSet(Tb=Tb)
+
+    kwargs = {}
+    for key in ["detection_statistic", "detection_time", "shift"]:
+        kwargs[key] = np.concatenate([getattr(i, key) for i in events])
+    return EventSet(Tb=Tb, **kwargs)
 
 
 class Sequence:
@@ -110,6 +127,7 @@ class Sequence:
         self._started = {}
         self._done = {}
         self._sequences = {}
+        self._streams = None
         size = len(self) * self.batch_size
         for i in range(2):
             seq_id = self.id + i
@@ -131,6 +149,10 @@ class Sequence:
     def done(self):
         return all(self._done.values())
 
+    @property
+    def streaming(self):
+        return self._streams is not None
+
     @property
     def remainder(self):
         # the number of remaining data points not filling a full batch
@@ -219,7 +241,65 @@ class Sequence:
                 with limiter:
                     yield x, x_inj
 
+    def stream(self, postprocessor: Postprocessor) -> None:
+        """
+        Postprocess the responses for each sequence as
+        they arrive, rather than aggregating the full
+        output timeseries. Once both sequences are
+        complete, the callback will return their
+        `EventSet`s instead of their timeseries.
+
+        Args:
+            postprocessor:
+                Postprocessor object used to convert
+                the outputs of each sequence into events
+        """
+        self._streams, self._events = {}, {}
+        self._responses, self._next_request = {}, {}
+        for seq_id in self._sequences:
+            self._streams[seq_id] = postprocessor.stream()
+            self._events[seq_id] = []
+            self._responses[seq_id] = {}
+            self._next_request[seq_id] = 0
+
+        # no need to hang on to the full timeseries anymore
+        self._sequences = {}
+
+    def _stream_response(self, y, request_id, sequence_id):
+        # responses might not come back in order, so hang
+        # on to them until all the ones before them arrive
+        responses = self._responses[sequence_id]
+        responses[request_id] = y[:, 0]
+
+        stream = self._streams[sequence_id]
+        events = self._events[sequence_id]
+        while self._next_request[sequence_id] in responses:
+            request_id = self._next_request[sequence_id]
+            y = responses.pop(request_id)
+            self._next_request[sequence_id] += 1
+
+            # slice off the dummy data from the last batch
+            # and let the postprocessor know the sequence
+            # is complete so it can flush its remaining events
+            if request_id == len(self) - 1:
+                events.append(stream.update(y[self.slice]))
+                events.append(stream.finalize())
+                self._done[sequence_id] = True
+            else:
+                events.append(stream.update(y))
+
+        if self.done:
+            background = _concat(self._events[self.id])
+            foreground = EventSet()
+            if self.injection_set is not None:
+                foreground = _concat(self._events[self.id + 1])
+            return background, foreground
+
     def __call__(self, y, request_id, sequence_id):
+        if self.streaming:
+            self._started[sequence_id] = True
+            return self._stream_response(y, request_id, sequence_id)
+
         # insert the response at the appropriate
         # spot in the corresponding output array
         start = request_id * self.batch_size
@@ -14,6 +14,7 @@ def infer(
     sequence: Sequence,
     postprocessor: Postprocessor,
     return_timeseries: bool = False,
+    stream: bool = False,
 ):
     """
     Perform inference on a sequence of data.
@@ -27,11 +28,22 @@ def infer(
             Postprocessor object
         return_timeseries:
             If true, return full inference output timeseries
+        stream:
+            If true, postprocess inference outputs as they
+            arrive, rather than waiting for the full output
+            timeseries. Incompatible with `return_timeseries`.
 
     Returns:
         background: Background events
         foreground: Foreground events
     """
+    if stream and return_timeseries:
+        raise ValueError(
+            "Can't return output timeseries when streaming postprocessing"
+        )
+    elif stream:
+        sequence.stream(postprocessor)
+
     logging.info(
         "Beginning inference on sequence {} corresponding "
         "to {}s of data from {} with shifts {} and sample rate {}, beginning "
@@ -83,11 +95,14 @@ def infer(
     while result is None:
         result = client.get()
         time.sleep(1e-1)
-    logging.info("Inference complete, postprocessing output timeseries")
-
-    background_ts, foreground_ts = result
-    background = postprocessor(background_ts)
-    foreground = postprocessor(foreground_ts)
+    if stream:
+        logging.info("Inference and postprocessing complete")
+        background, foreground = result
+    else:
+        logging.info("Inference complete, postprocessing output timeseries")
+        background_ts, foreground_ts = result
+        background = postprocessor(background_ts)
+        foreground = postprocessor(foreground_ts)
 
     logging.info("Recovering injections from foreground events")
     foreground = sequence.recover(foreground)
@@ -3,6 +3,41 @@ from typing import Optional
 import numpy as np
 
 from ledger.events import EventSet
+from utils.integration import boxcar_integrate
+
+
+def _forward_max(y: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Compute the maximum of the `window_size` samples
+    _following_ each sample of `y`, i.e. the max of
+    `y[i + 1 : i + 1 + window_size]`, in O(n) time using
+    the van Herk/Gil-Werman block decomposition. Windows
+    that run off the end of the timeseries are truncated,
+    and empty windows are assigned a value of `-inf`.
+    """
+    n = len(y)
+    if window_size < 1:
+        return np.full(n, -np.inf)
+
+    # pad the shifted timeseries out to an integer
+    # number of blocks, with enough room that the
+    # window starting at the last sample fits
+    num_blocks = (n + window_size - 1) // window_size + 1
+    z = np.full(num_blocks * window_size, -np.inf)
+    if n > 1:
+        z[: n - 1] = y[1:]
+    blocks = z.reshape(num_blocks, window_size)
+
+    # running max from the left and right of each block.
+    # Every window straddles at most one block boundary,
+    # so its max is the max of the suffix of one block
+    # and the prefix of the next
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(-1)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)
+    suffix = suffix[:, ::-1].reshape(-1)
+    return np.maximum(
+        suffix[:n], prefix[window_size - 1 : window_size - 1 + n]
+    )
 
 
 class Postprocessor:
@@ -57,56 +92,74 @@ class Postprocessor:
     def integrate(self, y: np.ndarray) -> np.ndarray:
         """
         Convolve predictions with boxcar filter
-        to get local integration, slicing off of
-        the last values so that timeseries represents
-        integration of _past_ data only.
-        "Full" convolution means first few samples are
-        integrated with 0s, so will have a lower magnitude
-        than they technically should.
+        to get local integration, such that the
+        timeseries represents integration of _past_
+        data only. The first few samples are integrated
+        with 0s, so will have a lower magnitude than
+        they technically should.
         """
         window_size = self.integration_window_size
-        window = np.ones((window_size,)) / window_size
-        integrated = np.convolve(y, window, mode="full")
-        return integrated[: -window_size + 1]
+        y = np.concatenate([np.zeros((window_size - 1,)), y])
+        return boxcar_integrate(y, window_size)
 
-    def cluster(self, y) -> EventSet:
-        # initial our search index to be in the first
-        # half window of the timeseries. Then all we
-        # need to know is whether there's a louder event
-        # in the half window _after_ it to know that it's
-        # the largest within the full window
+    def find_events(
+        self, y: np.ndarray, num: Optional[int] = None, start: int = 0
+    ) -> tuple[np.ndarray, int]:
+        """
+        Find the indices of the events among the first `num`
+        samples of the integrated timeseries `y`, ignoring
+        any that occur before the index `start`. Samples after
+        the first `num` are only used to determine whether the
+        samples before them are the largest in their window.
+
+        Returns:
+            The indices of the events, and the index of the
+            first sample that could be an event after them
+        """
+        # an index is a candidate event if it's strictly
+        # larger than every value in the half window _after_
+        # it. Starting from the beginning of the timeseries,
+        # the first candidate we encounter must be the largest
+        # value within the full window around it, so record it
+        # and skip to the first candidate outside its window
+        num = len(y) if num is None else num
         window_size = int(self.cluster_window_size // 2)
-        i = np.argmax(y[:window_size])
-
-        events, times = [], []
-        while i < len(y):
-            # check if there are any values in the next half
-            # window which are larger than the current index
-            val = y[i]
-            window = y[i + 1 : i + 1 + window_size]
-
-            if (val <= window).any():
-                # if there is a larger value,
-                # move our index to it
-                i += np.argmax(window) + 1
-            else:
-                # otherwise, this must be the largest value
-                # in the full window around it, so record
-                # the value and reset the index to be the
-                # first value outside the current window
-                events.append(val)
-                t = self.t0 + i / self.inference_sampling_rate
-                times.append(t)
-                i += window_size + 1
-
-        # record all this info and some
-        # metadata into a ledger object
-        Tb = len(y) / self.inference_sampling_rate
-        events = np.array(events)
-        times = np.array(times)
+        forward_max = _forward_max(y, window_size)[:num]
+        candidates = np.where(y[:num] > forward_max)[0]
+
+        idx = []
+        for i in candidates.tolist():
+            if i >= start:
+                idx.append(i)
+                start = i + window_size + 1
+        return np.array(idx, dtype=int), start
+
+    def build_events(
+        self, y: np.ndarray, idx: np.ndarray, Tb: float, offset: int = 0
+    ) -> EventSet:
+        """
+        Record the events at the indices `idx` of the integrated
+        timeseries `y`, which begins `offset` samples after `self.t0`,
+        and some metadata into a ledger object
+        """
+        events = y[idx]
+        times = self.t0 + (idx + offset) / self.inference_sampling_rate
         shifts = np.ones((len(events), len(self.shifts))) * self.shifts
         return EventSet(events, times, shifts, Tb)
 
+    def cluster(self, y) -> EventSet:
+        idx, _ = self.find_events(y)
+        Tb = len(y) / self.inference_sampling_rate
+        return self.build_events(y, idx, Tb)
+
+    def stream(self) -> "StreamingPostprocessor":
+        """
+        Create a stateful postprocessor for converting a
+        timeseries of inference outputs into events one
+        chunk at a time, as the outputs become available
+        """
+        return StreamingPostprocessor(self)
+
     def __call__(self, y: Optional[np.ndarray] = None) -> EventSet:
         # in the case where we didn't perform
         # injections on this shift
@@ -117,3 +170,105 @@ class Postprocessor:
         y = self.integrate(y)
         y = self.cluster(y)
         return y
+
+
+class StreamingPostprocessor:
+    def __init__(self, postprocessor: Postprocessor) -> None:
+        """
+        Incrementally integrates and clusters a timeseries of
+        inference outputs that arrives in consecutive chunks,
+        carrying the integration and clustering state across
+        chunk boundaries. Aggregating the `EventSet`s returned
+        by each call to `update` and the final call to `finalize`
+        produces the same events as calling `postprocessor` on
+        the full timeseries, while only holding on to the
+        most recent window of outputs.
+
+        Args:
+            postprocessor:
+                Postprocessor object defining the offset, integration
+                window and clustering window to apply to the outputs
+        """
+        self.postprocessor = postprocessor
+
+        # number of initial outputs which
+        # still need to be sloughed off
+        self._skip = postprocessor.offset
+
+        # raw outputs from the end of the last chunk
+        # that fall in the integration window of the next
+        num_history = postprocessor.integration_window_size - 1
+        self._history = np.zeros((num_history,))
+
+        # integrated outputs from the end of the last chunk whose
+        # cluster windows extend into the next, as well as the index
+        # of the first of these in the full integrated timeseries
+        # and the index of the first sample that could be an event
+        self._pending = np.zeros((0,))
+        self._pending_start = 0
+        self._next_start = 0
+        self.done = False
+
+    def integrate(self, y: np.ndarray) -> np.ndarray:
+        """
+        Integrate a chunk of outputs, using the outputs
+        at the end of the previous chunk to fill the
+        start of the integration window
+        """
+        window_size = self.postprocessor.integration_window_size
+        y = np.concatenate([self._history, y])
+        self._history = y[len(y) - window_size + 1 :]
+        return boxcar_integrate(y, window_size)
+
+    def cluster(self, y: np.ndarray, final: bool = False) -> EventSet:
+        """
+        Record all the events in the integrated outputs seen
+        so far whose full cluster window has been observed.
+        If `final` is `True`, the timeseries is considered
+        complete and all remaining events are recorded.
+        """
+        window_size = int(self.postprocessor.cluster_window_size // 2)
+        y = np.concatenate([self._pending, y])
+        num = len(y) if final else max(len(y) - window_size, 0)
+
+        start = self._next_start - self._pending_start
+        idx, start = self.postprocessor.find_events(y, num, start)
+
+        Tb = num / self.postprocessor.inference_sampling_rate
+        events = self.postprocessor.build_events(
+            y, idx, Tb, self._pending_start
+        )
+
+        self._pending = y[num:]
+        self._next_start = self._pending_start + start
+        self._pending_start += num
+        return events
+
+    def update(self, y: np.ndarray) -> EventSet:
+        """
+        Process the next chunk of inference outputs, returning
+        any events that can be identified from the outputs
+        seen so far.
+        """
+        if self.done:
+            raise ValueError("Can't update a finalized postprocessor")
+
+        if self._skip:
+            num = min(self._skip, len(y))
+            y = y[num:]
+            self._skip -= num
+        if not len(y):
+            return EventSet()
+
+        y = self.integrate(y)
+        return self.cluster(y)
+
+    def finalize(self) -> EventSet:
+        """
+        Indicate that the timeseries is complete,
+        returning any events still left to identify
+        """
+        if self.done:
+            raise ValueError("Postprocessor has already been finalized")
+        self.done = True
+        return self.cluster(np.zeros((0,)), final=True)
@@ -1,4 +1,8 @@
+import numpy as np
+import pytest
+
 from infer.postprocess import Postprocessor
+from ledger.events import EventSet
 
 
 def test_postprocessor():
@@ -12,3 +16,78 @@ def test_postprocessor():
         cluster_window_length=0.2,
     )
     assert postprocessor.t0 == 9.0
+
+
+def _reference_cluster(y, window_size):
+    # original iterative clustering algorithm,
+    # kept to validate the vectorized implementation
+    i = np.argmax(y[:window_size])
+    idx = []
+    while i < len(y):
+        window = y[i + 1 : i + 1 + window_size]
+        if (y[i] <= window).any():
+            i += np.argmax(window) + 1
+        else:
+            idx.append(i)
+            i += window_size + 1
+    return np.array(idx, dtype=int)
+
+
+@pytest.mark.parametrize("cluster_window_length", [0.02, 0.2, 1.0, 8.0])
+@pytest.mark.parametrize("quantize", [False, True])
+def test_postprocessor_cluster(cluster_window_length, quantize):
+    postprocessor = Postprocessor(
+        t0=0.0,
+        shifts=[0.0, 1.0],
+        psd_length=10.0,
+        fduration=1.0,
+        inference_sampling_rate=100.0,
+        integration_window_length=0.5,
+        cluster_window_length=cluster_window_length,
+    )
+    window_size = postprocessor.cluster_window_size // 2
+
+    y = np.random.randn(10000)
+    if quantize:
+        # make sure ties are broken the same way
+        y = np.round(y)
+
+    events = postprocessor.cluster(y)
+    idx = _reference_cluster(y, window_size)
+    assert len(events) == len(idx)
+    assert (events.detection_statistic == y[idx]).all()
+    expected_times = postprocessor.t0 + idx / 100.0
+    assert (events.detection_time == expected_times).all()
+    assert (events.shift == np.array([0.0, 1.0])).all()
+    assert events.Tb == 100.0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 128, 10000])
+def test_streaming_postprocessor(chunk_size):
+    postprocessor = Postprocessor(
+        t0=0.0,
+        shifts=[0.0, 1.0],
+        psd_length=2.0,
+        fduration=1.0,
+        inference_sampling_rate=16.0,
+        integration_window_length=1.0,
+        cluster_window_length=4.0,
+    )
+    y = np.random.randn(4000)
+    expected = postprocessor(y)
+
+    stream = postprocessor.stream()
+    events = EventSet()
+    for i in range(0, len(y), chunk_size):
+        events.append(stream.update(y[i : i + chunk_size]))
+    events.append(stream.finalize())
+
+    assert len(events) == len(expected)
+    assert np.allclose(
+        events.detection_statistic, expected.detection_statistic
+    )
+    assert (events.detection_time == expected.detection_time).all()
+    assert np.isclose(events.Tb, expected.Tb)
+
+    with pytest.raises(ValueError):
+        stream.update(y)
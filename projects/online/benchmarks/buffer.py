@@ -0,0 +1,112 @@
+"""
+Benchmark per-update latency of the ring buffers used by the
+online input and output buffers against concatenating each
+update onto the buffer and slicing off its oldest samples,
+and check that both hold the same data.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+import torch
+
+from online.utils.buffer import InputBuffer, RingBuffer
+from utils.logging import configure_logging
+
+
+class ConcatBuffer:
+    def __init__(self, shape: tuple[int, ...], size: int, device: str):
+        self.size = size
+        self.data = torch.zeros(shape + (size,), device=device)
+
+    def update(self, update: torch.Tensor):
+        self.data = torch.cat([self.data, update], axis=-1)
+        self.data = self.data[..., -self.size :]
+
+
+def _time(f, *args):
+    start = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - start
+
+
+def _report(name, ring, concat):
+    ring, concat = np.array(ring) * 1e6, np.array(concat) * 1e6
+    logging.info(
+        f"{name}: ring buffer median {np.median(ring):0.1f}us, 99th "
+        f"percentile {np.percentile(ring, 99):0.1f}us; concatenation "
+        f"median {np.median(concat):0.1f}us, 99th percentile "
+        f"{np.percentile(concat, 99):0.1f}us"
+    )
+
+
+def main(
+    ifos: tuple[str, ...] = ("H1", "L1", "V1"),
+    sample_rate: float = 2048,
+    input_buffer_length: float = 75,
+    online_inference_rate: float = 512,
+    output_buffer_length: float = 8,
+    num_updates: int = 200,
+    device: str = "cpu",
+    seed: int = 0,
+):
+    """
+    Args:
+        ifos:
+            Interferometers whose strain is stored in the input buffer
+        sample_rate:
+            Sample rate of the strain data in Hz
+        input_buffer_length:
+            Length of the input buffer in seconds
+        online_inference_rate:
+            Rate at which the network outputs are sampled in Hz
+        output_buffer_length:
+            Length of the output buffer in seconds
+        num_updates:
+            Number of 1 second updates to time
+        device:
+            Device on which to allocate the buffers
+        seed:
+            Random seed used to generate updates
+    """
+    configure_logging()
+    torch.manual_seed(seed)
+
+    input_buffer = InputBuffer(
+        ifos=list(ifos),
+        sample_rate=sample_rate,
+        buffer_length=input_buffer_length,
+        fduration=1,
+        amplfi_kernel_length=3,
+        event_position=1,
+        device=device,
+    )
+    reference = ConcatBuffer(
+        (len(ifos),), input_buffer.buffer_size, device=device
+    )
+    ring, concat = [], []
+    for i in range(num_updates):
+        X = torch.randn(len(ifos), int(sample_rate), device=device).double()
+        ring.append(_time(input_buffer.update, X, float(i)))
+        concat.append(_time(reference.update, X))
+    _report("InputBuffer.update", ring, concat)
+    assert (input_buffer.input_buffer == reference.data).all()
+
+    # time the ring buffer alone for the output buffer,
+    # since `OutputBuffer.update` also integrates the outputs
+    size = int(output_buffer_length * online_inference_rate)
+    output_ring = RingBuffer((), size, device=device)
+    reference = ConcatBuffer((), size, device=device)
+    ring, concat = [], []
+    for _ in range(num_updates):
+        y = torch.rand(int(online_inference_rate), device=device)
+        ring.append(_time(output_ring.update, y))
+        concat.append(_time(reference.update, y))
+    _report("Output buffer update", ring, concat)
+    assert (output_ring.data == reference.data).all()
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
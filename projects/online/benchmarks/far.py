@@ -0,0 +1,61 @@
+"""
+Benchmark the time to compute the FAR of a trigger with
+`EventSet.far` and with the `FarTable` used by `Searcher`,
+for backgrounds of increasing size.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+
+from ledger.events import EventSet
+from online.utils.searcher import FarTable
+from utils.logging import configure_logging
+
+
+def _time_lookups(far, values):
+    tick = time.perf_counter()
+    for value in values:
+        far(value)
+    return (time.perf_counter() - tick) / len(values) * 1e6
+
+
+def main(
+    num_events: tuple[int, ...] = (10**4, 10**6, 10**7),
+    num_lookups: int = 1000,
+    Tb: float = 1e7,
+):
+    """
+    Args:
+        num_events:
+            Numbers of events in the background
+        num_lookups:
+            Number of FARs to compute for each background
+        Tb:
+            Livetime of the background in seconds
+    """
+    configure_logging()
+    for n in num_events:
+        background = EventSet(
+            detection_statistic=np.random.randn(n).astype(np.float32),
+            detection_time=np.zeros(n),
+            shift=np.zeros((n, 2)),
+            Tb=Tb,
+        )
+        background = background.sort_by("detection_statistic")
+        table = FarTable.from_background(background)
+
+        # lookups with python floats, as done by `Searcher`
+        values = [float(i) for i in 2 * np.random.randn(num_lookups)]
+        event_set = _time_lookups(background.far, values)
+        lookup = _time_lookups(table.far, values)
+        logging.info(
+            f"{n} background events: EventSet.far {event_set:0.1f}us, "
+            f"FarTable.far {lookup:0.1f}us per lookup"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
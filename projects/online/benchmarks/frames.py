@@ -0,0 +1,95 @@
+"""
+Benchmark the per-frame read latency of the online data iterator
+for 2 and 3 interferometers. Compares reading the strain and state
+vector channels of each interferometer's frame separately and in
+sequence, as the iterator used to, against reading both channels
+in a single pass with the interferometers read concurrently by
+`FrameReader`.
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import jsonargparse
+import numpy as np
+from gwpy.timeseries import TimeSeries, TimeSeriesDict
+
+from online.dataloading.online import FrameReader, read_channel
+from online.dataloading.utils import GWF_SAMPLE_RATE
+from utils.logging import configure_logging
+
+T0 = 1400000000
+IFOS = ["H1", "L1", "V1"]
+
+
+def write_frames(datadir: Path, ifo: str, num_frames: int) -> list[Path]:
+    strain = f"{ifo}:GDS-CALIB_STRAIN"
+    state = f"{ifo}:GDS-CALIB_STATE_VECTOR"
+    fnames = []
+    for t0 in range(T0, T0 + num_frames):
+        data = TimeSeriesDict()
+        data[strain] = TimeSeries(
+            np.random.randn(GWF_SAMPLE_RATE),
+            sample_rate=GWF_SAMPLE_RATE,
+            t0=t0,
+            name=strain,
+        )
+        data[state] = TimeSeries(
+            np.full(16, 3, dtype=np.int32), sample_rate=16, t0=t0, name=state
+        )
+        fname = datadir / f"{ifo[0]}-{ifo}_llhoft-{t0}-1.gwf"
+        data.write(fname)
+        fnames.append(fname)
+    return fnames
+
+
+def main(
+    num_ifos: tuple[int, ...] = (2, 3),
+    num_frames: int = 32,
+):
+    """
+    Args:
+        num_ifos:
+            Numbers of interferometers to read frames for
+        num_frames:
+            Number of 1 second frames to read for each
+    """
+    configure_logging()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        fnames = {ifo: write_frames(tmpdir, ifo, num_frames) for ifo in IFOS}
+        channels = {
+            ifo: [f"{ifo}:GDS-CALIB_STRAIN", f"{ifo}:GDS-CALIB_STATE_VECTOR"]
+            for ifo in IFOS
+        }
+
+        for n in num_ifos:
+            ifos = IFOS[:n]
+            sequential = []
+            for i in range(num_frames):
+                tick = time.perf_counter()
+                for ifo in ifos:
+                    for channel in channels[ifo]:
+                        read_channel(fnames[ifo][i], channel)
+                sequential.append(time.perf_counter() - tick)
+
+            reader = FrameReader()
+            batched = []
+            for i in range(num_frames):
+                tick = time.perf_counter()
+                reader.read([(fnames[ifo][i], channels[ifo]) for ifo in ifos])
+                batched.append(time.perf_counter() - tick)
+            reader.close()
+
+            sequential = np.median(sequential[1:]) * 1e3
+            batched = np.median(batched[1:]) * 1e3
+            logging.info(
+                f"{n} IFOs: sequential {sequential:0.2f}ms, "
+                f"batched {batched:0.2f}ms per frame"
+            )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -0,0 +1,132 @@
+"""
+Benchmark the time per frame of the search loop with frames read
+on the main thread and with frames read ahead on a background
+thread by `PrefetchIterator`. Reading is simulated by sleeping
+for `read_time` and then resampling random 16 kHz frames, and
+each frame is analyzed by a snapshotter and whitener.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+import torch
+
+from online.dataloading.utils import (
+    GWF_SAMPLE_RATE,
+    RESAMPLERS,
+    PrefetchIterator,
+    build_resample_filter,
+)
+from online.utils.snapshotter import OnlineSnapshotter
+from utils.logging import configure_logging
+from utils.preprocessing import BatchWhitener
+
+
+def frame_iterator(num_frames, num_ifos, sample_rate, read_time):
+    factor = int(GWF_SAMPLE_RATE // sample_rate)
+    b, a = build_resample_filter(factor)
+    resampler = RESAMPLERS["streaming"](factor, b, a, GWF_SAMPLE_RATE)
+    for t0 in range(num_frames):
+        time.sleep(read_time)
+        frame = np.random.randn(num_ifos, GWF_SAMPLE_RATE)
+        x = resampler.update(frame)
+        if x is not None:
+            yield torch.Tensor(x.copy()).double(), t0, [True] * num_ifos
+
+
+def run(data_it, snapshotter, whitener, device):
+    state = snapshotter.initial_state
+    latencies = []
+    tick = time.perf_counter()
+    for X, _, _ in data_it:
+        X = X[:2].to(device, non_blocking=True)
+        batch, state = snapshotter(X[None], state)
+        whitener(batch)
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+
+        tock = time.perf_counter()
+        latencies.append(tock - tick)
+        tick = tock
+    return np.array(latencies[1:]) * 1e3
+
+
+def main(
+    read_times: tuple[float, ...] = (0.01, 0.05, 0.1),
+    num_frames: int = 32,
+    num_ifos: int = 2,
+    sample_rate: float = 2048,
+    psd_length: float = 64,
+    kernel_length: float = 1.5,
+    fduration: float = 1,
+    fftlength: float = 2,
+    inference_sampling_rate: float = 16,
+    prefetch_frames: int = 2,
+    device: str = "cpu",
+):
+    """
+    Args:
+        read_times:
+            Simulated times to read each frame from disk in seconds
+        num_frames:
+            Number of 1 second frames to analyze
+        num_ifos:
+            Number of interferometers in each frame
+        sample_rate:
+            Rate to resample the frame data to
+        psd_length:
+            Length of data used for PSD estimation in seconds
+        kernel_length:
+            Length of the network's kernels in seconds
+        fduration:
+            Length of the whitening filter in seconds
+        fftlength:
+            Length of the FFT segments in seconds
+        inference_sampling_rate:
+            Rate at which kernels are sampled in Hz
+        prefetch_frames:
+            Number of frames to read ahead when prefetching
+        device:
+            Device on which to analyze the frames
+    """
+    configure_logging()
+    snapshotter = OnlineSnapshotter(
+        update_size=1,
+        num_channels=2,
+        psd_length=psd_length,
+        kernel_length=kernel_length,
+        fduration=fduration,
+        sample_rate=sample_rate,
+        inference_sampling_rate=inference_sampling_rate,
+    ).to(device)
+    whitener = BatchWhitener(
+        kernel_length=kernel_length,
+        sample_rate=sample_rate,
+        inference_sampling_rate=inference_sampling_rate,
+        batch_size=int(inference_sampling_rate),
+        fduration=fduration,
+        fftlength=fftlength,
+    ).to(device)
+
+    args = (num_frames, num_ifos, sample_rate)
+    for read_time in read_times:
+        serial = frame_iterator(*args, read_time)
+        serial = run(serial, snapshotter, whitener, device)
+
+        pipelined = PrefetchIterator(
+            frame_iterator(*args, read_time),
+            maxsize=prefetch_frames,
+            pin_memory=device.startswith("cuda"),
+        )
+        pipelined = run(pipelined, snapshotter, whitener, device)
+        logging.info(
+            f"Read time {read_time * 1e3:0.0f}ms: "
+            f"serial {np.median(serial):0.1f}ms, "
+            f"pipelined {np.median(pipelined):0.1f}ms per frame"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -0,0 +1,132 @@
+"""
+Benchmark the throughput of `offline_data_iterator` replaying
+frame files one second at a time and with `fast_replay`, and
+check that both produce the same stream of data, up to the
+floating point differences between resampling modes.
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import jsonargparse
+import numpy as np
+import torch
+from gwpy.timeseries import TimeSeries, TimeSeriesDict
+
+from online.dataloading import offline_data_iterator
+from online.dataloading.utils import GWF_SAMPLE_RATE
+from utils.logging import configure_logging
+
+T0 = 1400000000
+
+
+def write_frames(datadir, ifos, duration, frame_length):
+    for ifo in ifos:
+        ifodir = datadir / f"{ifo}_llhoft"
+        ifodir.mkdir()
+        strain = f"{ifo}:GDS-CALIB_STRAIN"
+        state = f"{ifo}:GDS-CALIB_STATE_VECTOR"
+        for t0 in range(T0, T0 + duration, frame_length):
+            # drop out of analysis ready mode for a bit
+            vector = np.full(16 * frame_length, 3, dtype=np.int32)
+            vector[5 * 16 : 7 * 16 + 3] = 1
+
+            data = TimeSeriesDict()
+            data[strain] = TimeSeries(
+                np.random.randn(frame_length * GWF_SAMPLE_RATE),
+                sample_rate=GWF_SAMPLE_RATE,
+                t0=t0,
+                name=strain,
+            )
+            data[state] = TimeSeries(vector, sample_rate=16, t0=t0, name=state)
+            fname = f"{ifo[0]}-{ifo}_llhoft-{t0}-{frame_length}.gwf"
+            data.write(ifodir / fname)
+
+
+def replay(
+    datadir,
+    ifos,
+    sample_rate,
+    chunk_length,
+    settle,
+    resample_mode,
+    fast_replay,
+):
+    data_it = offline_data_iterator(
+        datadir=datadir,
+        channels=[f"{ifo}:GDS-CALIB_STRAIN" for ifo in ifos],
+        ifos=ifos,
+        sample_rate=sample_rate,
+        ifo_suffix="llhoft",
+        state_channels={ifo: f"{ifo}:GDS-CALIB_STATE_VECTOR" for ifo in ifos},
+        resample_mode=resample_mode,
+        fast_replay=fast_replay,
+        chunk_length=chunk_length,
+    )
+
+    # give the loader process time to read the remaining
+    # chunks so that only the iterator's own work is timed
+    X, t0, ready = next(data_it)
+    outputs = [(X, t0, ready)]
+    time.sleep(settle)
+    tick = time.perf_counter()
+    outputs.extend(data_it)
+    return time.perf_counter() - tick, outputs
+
+
+def main(
+    ifos: tuple[str, ...] = ("H1", "L1"),
+    sample_rate: float = 2048,
+    duration: int = 512,
+    frame_length: int = 64,
+    chunk_length: int = 128,
+    settle: float = 10,
+    resample_mode: str = "filtfilt",
+):
+    """
+    Args:
+        ifos:
+            Interferometers to replay data from
+        sample_rate:
+            Rate to resample the frame data to
+        duration:
+            Length of data to replay in seconds
+        frame_length:
+            Length of each frame file in seconds
+        chunk_length:
+            Length of the chunks data is loaded in
+        settle:
+            Time in seconds to wait for all of the data to be
+            loaded before timing each replay
+        resample_mode:
+            Resampling mode to use when replaying
+            data one second at a time
+    """
+    configure_logging()
+    ifos = list(ifos)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        datadir = Path(tmpdir)
+        write_frames(datadir, ifos, duration, frame_length)
+
+        args = (datadir, ifos, sample_rate, chunk_length, settle)
+        slow, expected = replay(*args, resample_mode, False)
+        fast, outputs = replay(*args, "streaming", True)
+
+    assert len(outputs) == len(expected)
+    for (X, t0, ready), (eX, et0, eready) in zip(outputs, expected):
+        assert t0 == et0
+        assert list(ready) == list(eready)
+        torch.testing.assert_close(X, eX)
+
+    seconds = len(expected) - 1
+    logging.info(
+        f"Replayed {seconds}s of data in {slow:0.2f}s one second at a "
+        f"time ({seconds / slow:0.0f}x real time) and {fast:0.2f}s with "
+        f"fast replay ({seconds / fast:0.0f}x real time)"
+    )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -0,0 +1,70 @@
+"""
+Benchmark the per-frame latency of the resampling modes
+used by the frame data iterators, and check that the
+streaming resampler reproduces the `filtfilt` outputs.
+"""
+
+import logging
+import time
+
+import jsonargparse
+import numpy as np
+
+from online.dataloading.utils import (
+    GWF_SAMPLE_RATE,
+    RESAMPLERS,
+    build_resample_filter,
+)
+from utils.logging import configure_logging
+
+
+def main(
+    sample_rate: float = 2048,
+    num_ifos: int = 2,
+    num_frames: int = 64,
+    seed: int = 0,
+):
+    """
+    Args:
+        sample_rate:
+            Rate to resample the frame data to
+        num_ifos:
+            Number of interferometers in each frame
+        num_frames:
+            Number of 1 second frames to resample
+        seed:
+            Random seed used to generate the frame data
+    """
+    configure_logging()
+    factor = int(GWF_SAMPLE_RATE // sample_rate)
+    b, a = build_resample_filter(factor)
+    rng = np.random.default_rng(seed)
+    frames = rng.standard_normal((num_frames, num_ifos, GWF_SAMPLE_RATE))
+
+    outputs = {}
+    for mode, resampler_cls in RESAMPLERS.items():
+        resampler = resampler_cls(factor, b, a, GWF_SAMPLE_RATE)
+        latencies, outputs[mode] = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            x = resampler.update(frame)
+            latencies.append(time.perf_counter() - start)
+            if x is not None:
+                outputs[mode].append(x)
+
+        # ignore the warmup frames which don't produce outputs
+        latencies = np.array(latencies[2:]) * 1e3
+        logging.info(
+            f"{mode}: median latency {np.median(latencies):0.2f}ms, "
+            f"99th percentile {np.percentile(latencies, 99):0.2f}ms "
+            f"per frame of {num_ifos} ifo(s)"
+        )
+
+    expected = np.stack(outputs["filtfilt"])
+    streamed = np.stack(outputs["streaming"])
+    error = np.abs(streamed - expected).max() / np.abs(expected).max()
+    logging.info(f"Max relative error of streaming outputs {error:0.2e}")
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
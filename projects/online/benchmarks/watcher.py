@@ -0,0 +1,118 @@
+"""
+Benchmark frame discovery in a directory holding many frame files.
+For each directory size, reports the time to find the most recent
+frame by listing the directory as `reset_t0` used to, and by
+`FrameWatcher`. Then, for the watcher with and without inotify,
+it reports the delay and CPU time spent waiting for a frame that
+is written while the watcher waits.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import jsonargparse
+import numpy as np
+
+from online.dataloading import watcher as watcher_module
+from online.dataloading.utils import fname_re, is_gwf
+from online.dataloading.watcher import FrameWatcher
+from utils.logging import configure_logging
+
+T0 = 1400000000
+
+
+def list_latest(datadir: Path) -> int:
+    matches = [fname_re.search(i.name) for i in datadir.iterdir()]
+    return max([int(i.group("start")) for i in matches if is_gwf(i)])
+
+
+def time_wait(watcher, datadir, t0, delay):
+    name = f"H-H1_llhoft-{t0}-1.gwf"
+
+    def write():
+        time.sleep(delay)
+        tmp = datadir / f".{name}"
+        tmp.write_bytes(b"")
+        os.rename(tmp, datadir / name)
+        written.append(time.perf_counter())
+
+    written = []
+    thread = threading.Thread(target=write)
+    cpu = time.process_time()
+    thread.start()
+    watcher.wait("H1", name, None)
+    found = time.perf_counter()
+    cpu = time.process_time() - cpu
+    thread.join()
+    return (found - written[0]) * 1e3, cpu * 1e3
+
+
+def main(
+    num_files: tuple[int, ...] = (100, 1000, 10000),
+    num_trials: int = 20,
+    delay: float = 0.1,
+):
+    """
+    Args:
+        num_files:
+            Numbers of frame files in the directory
+        num_trials:
+            Number of times to time each operation
+        delay:
+            Time in seconds after a wait starts at which
+            the frame being waited on is written
+    """
+    configure_logging()
+    for n in num_files:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            datadir = Path(tmpdir)
+            for t0 in range(T0, T0 + n):
+                (datadir / f"H-H1_llhoft-{t0}-1.gwf").touch()
+
+            listing = []
+            for _ in range(num_trials):
+                tick = time.perf_counter()
+                list_latest(datadir)
+                listing.append(time.perf_counter() - tick)
+
+            watcher = FrameWatcher({"H1": datadir})
+            indexed = []
+            for _ in range(num_trials):
+                tick = time.perf_counter()
+                watcher.latest("H1")
+                indexed.append(time.perf_counter() - tick)
+            logging.info(
+                f"{n} files: latest frame found in "
+                f"{np.median(listing) * 1e3:0.3f}ms by listing, "
+                f"{np.median(indexed) * 1e3:0.3f}ms by the watcher"
+            )
+
+            for inotify in [True, False]:
+                if not inotify:
+                    watcher.close()
+                    init = watcher_module._init_inotify
+                    watcher_module._init_inotify = lambda: None
+                    watcher = FrameWatcher({"H1": datadir})
+                    watcher_module._init_inotify = init
+
+                # wait on frames that haven't been written yet
+                start = T0 + n + (1 - inotify) * num_trials
+                results = [
+                    time_wait(watcher, datadir, start + i, delay)
+                    for i in range(num_trials // 4)
+                ]
+                found, cpu = np.median(results, axis=0)
+                logging.info(
+                    f"{n} files, inotify={inotify}: frame found "
+                    f"{found:0.3f}ms after being written, "
+                    f"using {cpu:0.3f}ms of CPU"
+                )
+            watcher.close()
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -2,12 +2,13 @@ import os
 import numpy as np
 from pathlib import Path
 from online.dataloading.utils import (
+    RESAMPLERS,
+    StreamingResampler,
     build_resample_filter,
-    resample,
     parse_frame_name,
     GWF_SAMPLE_RATE,
 )
-from typing import List, Optional, Generator
+from typing import List, Literal, Optional, Generator
 from gwpy.timeseries import TimeSeriesDict
 import logging
 import torch
@@ -188,12 +189,25 @@ def offline_data_iterator(
     sample_rate: float,
     ifo_suffix: str = None,
     state_channels: Optional[dict[str, str]] = None,
+    resample_mode: Literal["filtfilt", "streaming"] = "filtfilt",
+    fast_replay: bool = False,
+    chunk_length: int = 4096,
 ) -> Generator[tuple[torch.Tensor, float, list[bool]], None, None]:
     """
     Similar to `data_iterator` above, but does not
     assume frame files arrive in 1 second frames.
     It does assume the frame files between different
     interferometers match in length.
+
+    If `fast_replay` is `True`, each chunk of `chunk_length`
+    seconds is resampled at once with a `StreamingResampler`,
+    and the readiness of each second is computed from the
+    state vector in a single pass, before the chunk is yielded
+    one second at a time. This produces the same stream as
+    the default mode at a fraction of the cost. Since only
+    the streaming resampler can resample several seconds at
+    once, it's always used in this mode, and a warning is
+    logged if another `resample_mode` was requested.
     """
 
     # build resampling filter
@@ -205,19 +219,18 @@ def offline_data_iterator(
         )
     factor = int(factor)
     b, a = build_resample_filter(factor)
-
-    frame_buffer = np.zeros((len(ifos), 0))
-    # slice corresponds to middle second of
-    # a 3 second buffer; the middle second is
-    # yielded at each step to mitigate resampling
-    # edge effects
-    buffer_slc = slice(-int(2 * sample_rate), -int(sample_rate))
+    if fast_replay and resample_mode != "streaming":
+        logging.warning(
+            f"Fast replay resamples whole chunks of data with the "
+            f"streaming resampler, ignoring resample_mode {resample_mode}"
+        )
+        resample_mode = "streaming"
+    resampler = RESAMPLERS[resample_mode](factor, b, a, GWF_SAMPLE_RATE)
 
     last_ready = [True] * len(ifos)
 
     queue = mp.Queue()
 
-    CHUNK_LENGTH = 4096
     # load chunks in separate process
     loader_process = mp.Process(
         target=chunk_loader_worker,
@@ -227,12 +240,17 @@ def offline_data_iterator(
             ifos,
             channels,
             list(state_channels.values()) if state_channels else [],
-            CHUNK_LENGTH,
+            chunk_length,
             queue,
         ),
     )
 
     loader_process.start()
+    if fast_replay:
+        yield from replay_chunks(
+            queue, resampler, ifos, sample_rate, state_channels is not None
+        )
+        return
 
     while True:
         chunk_data = queue.get()
@@ -245,7 +263,7 @@ def offline_data_iterator(
         # increments from the pre-loaded data
 
         # yield one second per duration
-        for i in range(int(CHUNK_LENGTH)):
+        for i in range(int(chunk_length)):
             ready = [True] * len(ifos)
             logging.debug(f"Reading frames from timestamp {t0}")
             frames = []
@@ -284,19 +302,110 @@ def offline_data_iterator(
                 logging.debug("Read successful")
 
                 frame = np.stack(frames)
-                frame_buffer = np.append(frame_buffer, frame, axis=1)
-                dur = frame_buffer.shape[-1] / GWF_SAMPLE_RATE
-                # Need at least 3 seconds to be able to crop out edge effects
-                # from resampling and just yield the middle second
-                if dur >= 3:
-                    x = resample(frame_buffer, factor, b, a)
-                    x = x[:, buffer_slc]
-                    frame_buffer = frame_buffer[:, GWF_SAMPLE_RATE:]
+                x = resampler.update(frame)
+                if x is not None:
                     # yield last_ready, which corresponds to
                     # the data quality bits of the previous second
-                    # of data, i.e. the middle second of the
-                    # buffer that is being yielded as well
+                    # of data, i.e. the second that the resampler
+                    # returned data for
                     yield torch.Tensor(x.copy()).double(), t0 - 1, last_ready
 
                 last_ready = ready
                 t0 += 1
+
+
+def get_ready(state: np.ndarray) -> np.ndarray:
+    """
+    Compute whether each interferometer was analysis ready in
+    each second from a `(num_ifos, num_seconds * 16)` array of
+    state vector samples, returning a boolean array of shape
+    `(num_ifos, num_seconds)`. An interferometer is ready in a
+    second if the first two bits of its state vector were on
+    for the entire second.
+    """
+    # TODO: parameterize bitmask
+    state = state.reshape(len(state), -1, STATE_VECTOR_SAMPLE_RATE)
+    return ((state & 3) == 3).all(axis=-1)
+
+
+def log_transitions(
+    ifos: List[str], ready: np.ndarray, last_ready: np.ndarray, t0: float
+) -> None:
+    """
+    Log each time an interferometer enters or exits analysis
+    ready mode in a span of data starting at `t0`, where
+    `last_ready` is the readiness of the second before it
+    """
+    ready = np.concatenate([last_ready[:, None], ready], axis=1)
+    for ifo, ifo_ready in zip(ifos, ready):
+        for i in np.flatnonzero(np.diff(ifo_ready)):
+            if ifo_ready[i + 1]:
+                logging.info(f"IFO {ifo} entering analysis ready mode")
+            else:
+                logging.info(f"IFO {ifo} exiting analysis ready mode")
+            logging.debug(f"Transition occurred at {t0 + i}")
+
+
+def replay_chunks(
+    queue: mp.Queue,
+    resampler: StreamingResampler,
+    ifos: List[str],
+    sample_rate: float,
+    use_state: bool,
+) -> Generator[tuple[torch.Tensor, float, list[bool]], None, None]:
+    """
+    Resample chunks of data loaded into `queue` by
+    `chunk_loader_worker` and yield them one second at a
+    time, along with their start times and readiness
+    """
+    size = int(sample_rate)
+    last_ready = np.ones(len(ifos), dtype=bool)
+
+    # start times and readiness of the seconds of
+    # data passed to the last update of the resampler
+    t0s, ready = None, None
+    while True:
+        chunk_data = queue.get()
+        if chunk_data is None:
+            break
+
+        strain, state, t0 = chunk_data
+        logging.info(f"Analysing chunk starting at {t0}")
+        num_seconds = strain.shape[-1] // GWF_SAMPLE_RATE
+        if use_state:
+            chunk_ready = get_ready(state)
+        else:
+            chunk_ready = np.ones((len(ifos), num_seconds), dtype=bool)
+        log_transitions(ifos, chunk_ready, last_ready, t0)
+        last_ready = chunk_ready[:, -1]
+
+        # resample all but the last second of the chunk at once,
+        # then the last second separately, so that the last second
+        # of the last chunk is dropped just like it would be by
+        # resampling one second at a time. One second chunks have
+        # nothing to resample before their last second, and passing
+        # the resampler an empty frame would discard its state.
+        split = strain.shape[-1] - GWF_SAMPLE_RATE
+        frames = [
+            (strain[:, split:], t0 + num_seconds - 1, chunk_ready[:, -1:])
+        ]
+        if split > 0:
+            frames.insert(0, (strain[:, :split], t0, chunk_ready[:, :-1]))
+        for frame, frame_t0, frame_ready in frames:
+            x = resampler.update(frame)
+            if x is not None:
+                # the resampled data corresponds to the
+                # last seconds passed to the previous update
+                num_returned = x.shape[-1] // size
+                offset = len(t0s) - num_returned
+                x = torch.Tensor(x).double()
+                for i in range(num_returned):
+                    yield (
+                        x[:, i * size : (i + 1) * size],
+                        int(t0s[offset + i]),
+                        ready[:, offset + i].tolist(),
+                    )
+
+            num_frame_seconds = frame.shape[-1] // GWF_SAMPLE_RATE
+            t0s = frame_t0 + np.arange(num_frame_seconds)
+            ready = frame_ready
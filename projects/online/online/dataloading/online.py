@@ -1,18 +1,26 @@
 import logging
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Generator
+from typing import TYPE_CHECKING, List, Literal, Optional, Generator
 import numpy as np
 import torch
-from gwpy.timeseries import TimeSeries
+from gwpy.io.gwf import get_channel_type
+from gwpy.timeseries import TimeSeriesDict
 from online.dataloading.utils import (
-    resample,
+    RESAMPLERS,
     build_resample_filter,
     fname_re,
+    parse_frame_name,
     PATH_LIKE,
     GWF_SAMPLE_RATE,
     is_gwf,
 )
+from online.dataloading.watcher import FrameWatcher
+
+if TYPE_CHECKING:
+    from online.utils.latency import LatencyTracer
 
 
 def get_prefix(datadir: Path):
@@ -45,13 +53,11 @@ def get_prefix(datadir: Path):
     return list(prefixes)[0], int(list(durations)[0]), t0
 
 
-def reset_t0(datadir, last_t0):
+def reset_t0(watcher: FrameWatcher, ifo: str, last_t0):
     tick = time.time()
     while True:
-        matches = [fname_re.search(i.name) for i in datadir.iterdir()]
-        t0s = np.array([int(i.group("start")) for i in matches if is_gwf(i)])
-        if t0s.size > 0:
-            t0 = max(t0s)
+        t0 = watcher.latest(ifo)
+        if t0 is not None:
             logging.info(f"Resetting timestamp to {t0}")
             return t0
 
@@ -72,6 +78,8 @@ def data_iterator(
     ifo_suffix: str = None,
     state_channels: Optional[dict[str, str]] = None,
     timeout: Optional[float] = None,
+    resample_mode: Literal["filtfilt", "streaming"] = "filtfilt",
+    tracer: Optional["LatencyTracer"] = None,
 ) -> Generator[tuple[torch.Tensor, float, list[bool]], None, None]:
     if ifo_suffix is not None:
         ifo_dir = "_".join([ifos[0], ifo_suffix])
@@ -80,40 +88,39 @@ def data_iterator(
     prefix, length, t0 = get_prefix(datadir / ifo_dir)
     middle = "_".join(prefix.split("_")[1:])
 
-    # build resampling filter
-    factor = GWF_SAMPLE_RATE / sample_rate
-    if not factor.is_integer():
-        raise ValueError(
-            f"Specified sample rate {sample_rate} must "
-            f"evenly divide the frame sample rate {GWF_SAMPLE_RATE}"
-        )
-    factor = int(factor)
-    b, a = build_resample_filter(factor)
-
-    frame_buffer = np.zeros((len(ifos), 0))
-    # slice corresponds to middle second of
-    # a 3 second buffer; the middle second is
-    # yielded at each step to mitigate resampling
-    # edge effects
-    slc = slice(-int(2 * sample_rate), -int(sample_rate))
-    last_ready = [True] * len(ifos)
-    while True:
-        frames = []
-        logging.debug(f"Reading frames from timestamp {t0}")
-
-        ready = [True] * len(ifos)
-        for i, (ifo, channel) in enumerate(zip(ifos, channels)):
-            prefix = f"{ifo[0]}-{ifo}_{middle}"
-            if ifo_suffix is not None:
-                ifo_dir = "_".join([ifo, ifo_suffix])
-            else:
-                ifo_dir = ifo
-            fname = datadir / ifo_dir / f"{prefix}-{t0}-{length}.gwf"
+    # index the frames in each ifo directory
+    # and get notified as new ones are written
+    directories = {}
+    for ifo in ifos:
+        if ifo_suffix is not None:
+            directories[ifo] = datadir / "_".join([ifo, ifo_suffix])
+        else:
+            directories[ifo] = datadir / ifo
+    watcher = FrameWatcher(directories)
+    reader = FrameReader()
 
-            tick = time.time()
-            while not fname.exists():
-                tock = time.time()
-                if timeout is not None and (tock - tick > timeout):
+    try:
+        # build resampling filter
+        factor = GWF_SAMPLE_RATE / sample_rate
+        if not factor.is_integer():
+            raise ValueError(
+                f"Specified sample rate {sample_rate} must "
+                f"evenly divide the frame sample rate {GWF_SAMPLE_RATE}"
+            )
+        factor = int(factor)
+        b, a = build_resample_filter(factor)
+        resampler = RESAMPLERS[resample_mode](factor, b, a, GWF_SAMPLE_RATE)
+
+        last_ready = [True] * len(ifos)
+        while True:
+            logging.debug(f"Reading frames from timestamp {t0}")
+
+            requests = []
+            for ifo, channel in zip(ifos, channels):
+                prefix = f"{ifo[0]}-{ifo}_{middle}"
+                fname = directories[ifo] / f"{prefix}-{t0}-{length}.gwf"
+
+                if not watcher.wait(ifo, fname.name, timeout):
                     logging.warning(
                         "Couldn't find frame file {} after {}s".format(
                             fname, timeout
@@ -122,88 +129,107 @@ def data_iterator(
 
                     yield None, t0, [False] * len(ifos)
 
-                    frame_buffer = np.zeros((len(ifos), 0))
+                    resampler.reset()
                     last_ready = [False] * len(ifos)
-                    t0 = reset_t0(datadir / ifo, t0 - length)
+                    t0 = reset_t0(watcher, ifo, t0 - length)
                     break
-            else:
-                # we never broke, therefore the filename exists,
-                # so read the strain data as well as its state
-                # vector to see if it's analysis ready
-                x = read_channel(fname, f"{channel}")
-                frames.append(x.value)
-
-                # if state channels were specified,
-                # check that the 3rd bit is on.
-                # If left as `None` set ifo_ready
-                # to True by default.
-                # TODO: parameterize bitmask
-                ifo_ready = True
+
+                # read the state vector from the same file
+                # as the strain data, if one was specified
+                frame_channels = [channel]
                 if state_channels is not None:
-                    state_channel = state_channels[ifo]
-                    state_vector = read_channel(fname, state_channel)
-                    ifo_ready = ((state_vector.value & 3) == 3).all()
-
-                # some useful logging
-                # for when ifos enter and exit
-                # analyis ready mode
-                if not ifo_ready:
-                    if last_ready[i]:
-                        logging.info(f"IFO {ifo} exiting analysis ready mode")
+                    frame_channels.append(state_channels[ifo])
+                requests.append((fname, frame_channels))
+            else:
+                # every ifo's frame was written, so read the strain
+                # data of each along with its state vector at once
+                data = reader.read(requests)
+                logging.debug("Read successful")
+                if tracer is not None:
+                    # frames are written at their modification time,
+                    # so the last one written completes the frame
+                    written = max(os.stat(f).st_mtime for f, _ in requests)
+                    key = t0 + length
+                    tracer.frame(key, "write", written + tracer.offset)
+                    tracer.frame(key, "read")
+
+                frames = []
+                ready = [True] * len(ifos)
+                for i, (ifo, channel) in enumerate(zip(ifos, channels)):
+                    frames.append(data[i][channel].value)
+
+                    # if state channels were specified,
+                    # check that the 3rd bit is on.
+                    # If left as `None` set ifo_ready
+                    # to True by default.
+                    # TODO: parameterize bitmask
+                    ifo_ready = True
+                    if state_channels is not None:
+                        state_vector = data[i][state_channels[ifo]]
+                        ifo_ready = ((state_vector.value & 3) == 3).all()
+
+                    # some useful logging
+                    # for when ifos enter and exit
+                    # analyis ready mode
+                    if not ifo_ready:
+                        if last_ready[i]:
+                            logging.info(
+                                f"IFO {ifo} exiting analysis ready mode"
+                            )
+                        else:
+                            logging.debug(f"IFO {ifo} not analysis ready")
                     else:
-                        logging.debug(f"IFO {ifo} not analysis ready")
-                else:
-                    if not last_ready[i]:
-                        logging.info(f"IFO {ifo} entering analysis ready mode")
+                        if not last_ready[i]:
+                            logging.info(
+                                f"IFO {ifo} entering analysis ready mode"
+                            )
 
-                # mark this ifos readiness in array
-                ready[i] &= ifo_ready
+                    # mark this ifos readiness in array
+                    ready[i] &= ifo_ready
 
-                # continue so that we don't break the ifo for-loop
-                continue
+                frame = np.stack(frames)
+                x = resampler.update(frame)
+                if x is not None:
+                    if tracer is not None:
+                        tracer.frame(t0, "resample")
 
-            # if we're here, the filename didnt' exist and
-            # we broke when resetting t0, so don't bother
-            # to return any data
-            break
-        else:
-            logging.debug("Read successful")
-
-            frame = np.stack(frames)
-            frame_buffer = np.append(frame_buffer, frame, axis=1)
-            dur = frame_buffer.shape[-1] / GWF_SAMPLE_RATE
-            # Need at least 3 seconds to be able to crop out edge effects
-            # from resampling and just yield the middle second
-            if dur >= 3:
-                x = resample(frame_buffer, factor, b, a)
-                x = x[:, slc]
-                frame_buffer = frame_buffer[:, GWF_SAMPLE_RATE:]
-                # yield last_ready, which corresponds to
-                # the data quality bits of the previous second
-                # of data, i.e. the middle second of the
-                # buffer that is being yielded as well
-                yield torch.Tensor(x.copy()).double(), t0 - 1, last_ready
-
-            last_ready = ready
-            t0 += length
+                    # yield last_ready, which corresponds to
+                    # the data quality bits of the previous second
+                    # of data, i.e. the second that the resampler
+                    # returned data for
+                    yield torch.Tensor(x.copy()).double(), t0 - 1, last_ready
 
+                last_ready = ready
+                t0 += length
+    finally:
+        watcher.close()
+        reader.close()
 
-def read_channel(fname: PATH_LIKE, channel: str, num_retries: int = 3):
+
+def read_channels(
+    fname: PATH_LIKE,
+    channels: List[str],
+    types: Optional[dict[str, str]] = None,
+    num_retries: int = 3,
+) -> TimeSeriesDict:
     """
-    Read a channel from a frame file, retrying if the read fails
-    and handling common errors that can occur when reading frame files
+    Read several channels from a frame file in a single pass,
+    retrying if the read fails and handling common errors that
+    can occur when reading frame files. `types` maps channels to
+    their frame data types, saving the reader from looking them
+    up in the file's table of contents.
     """
     for i in range(num_retries):
         try:
-            x = TimeSeries.read(fname, channel=channel)
+            data = TimeSeriesDict.read(fname, channels=channels, type=types)
         except ValueError as e:
             if str(e) == (
                 "Cannot generate TimeSeries with 2-dimensional data"
             ):
                 logging.warning(
-                    "Channel {} from file {} got corrupted and was "
+                    "Channels {} from file {} got corrupted and were "
                     "read as 2D, attempting reread {}".format(
-                        channel, fname, i + 1
+                        channels, fname, i + 1
                     )
                 )
                 time.sleep(1e-1)
@@ -216,8 +242,8 @@ def read_channel(fname: PATH_LIKE, channel: str, num_retries: int = 3):
         except RuntimeError as e:
             if str(e).startswith("Failed to read the core"):
                 logging.warning(
-                    "Channel {} from file {} had corrupted header, "
-                    "attempting reread {}".format(channel, fname, i + 1)
+                    "Channels {} from file {} had corrupted header, "
+                    "attempting reread {}".format(channels, fname, i + 1)
                 )
                 time.sleep(2e-1)
                 continue
@@ -231,19 +257,93 @@ def read_channel(fname: PATH_LIKE, channel: str, num_retries: int = 3):
             else:
                 raise
 
-        if len(x) != x.sample_rate.value:
+        corrupted = [
+            channel
+            for channel, x in data.items()
+            if len(x) != x.sample_rate.value
+        ]
+        if corrupted:
             logging.warning(
-                "Channel {} in file {} got corrupted with "
-                "length {}, attempting reread {}".format(
-                    channel, fname, len(x), i + 1
-                )
+                "Channels {} in file {} got corrupted, "
+                "attempting reread {}".format(corrupted, fname, i + 1)
             )
-            del x
+            del data
             time.sleep(1e-1)
             continue
 
-        return x
+        return data
     else:
         raise ValueError(
-            "Failed to read channel {} in file {}".format(channel, fname)
+            "Failed to read channels {} in file {}".format(channels, fname)
         )
+
+
+def read_channel(fname: PATH_LIKE, channel: str, num_retries: int = 3):
+    """
+    Read a channel from a frame file, retrying if the read fails
+    and handling common errors that can occur when reading frame files
+    """
+    return read_channels(fname, [channel], num_retries=num_retries)[channel]
+
+
+class FrameReader:
+    """
+    Read channels from the frame files of several
+    interferometers concurrently on a thread pool.
+
+    The frame data type of each channel is looked up in the
+    table of contents of the first frame read with a given
+    prefix and cached, so that subsequent reads of frames
+    with that prefix don't have to search the table of
+    contents for each channel.
+
+    Args:
+        num_workers:
+            Number of threads to read frames with. Defaults
+            to one per frame read at a time.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None) -> None:
+        self.num_workers = num_workers
+        self.ex = None
+        self.types = {}
+
+    def get_types(
+        self, fname: Path, channels: List[str]
+    ) -> Optional[dict[str, str]]:
+        prefix, _, _ = parse_frame_name(fname)
+        types = self.types.setdefault(prefix, {})
+        try:
+            for channel in channels:
+                if channel not in types:
+                    types[channel] = get_channel_type(channel, fname)
+        except (ValueError, RuntimeError, OSError):
+            # the frame may be corrupted, so let the read
+            # handle it and look the type up next time
+            return None
+        return {channel: types[channel] for channel in channels}
+
+    def read_one(self, fname: Path, channels: List[str]) -> TimeSeriesDict:
+        types = self.get_types(fname, channels)
+        return read_channels(fname, channels, types)
+
+    def read(
+        self, requests: List[tuple[Path, List[str]]]
+    ) -> List[TimeSeriesDict]:
+        """
+        Read the requested channels from each frame file,
+        where `requests` is a list of `(fname, channels)` pairs
+        """
+        if len(requests) == 1:
+            return [self.read_one(*requests[0])]
+
+        if self.ex is None:
+            num_workers = self.num_workers or len(requests)
+            self.ex = ThreadPoolExecutor(num_workers)
+        futures = [self.ex.submit(self.read_one, *r) for r in requests]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        if self.ex is not None:
+            self.ex.shutdown()
+            self.ex = None
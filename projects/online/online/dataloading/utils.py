@@ -1,5 +1,8 @@
+import logging
 import re
-from typing import Union
+import threading
+from queue import Empty, Full, Queue
+from typing import Iterable, Iterator, Optional, Union
 from scipy import signal
 from gwpy.signal import filter_design
 import numpy as np
@@ -34,6 +37,252 @@ def resample(data: np.ndarray, factor: int, b: float, a: float):
     return signal.filtfilt(b, a, data, axis=1)[:, :: int(factor)]
 
 
+class FiltfiltResampler:
+    """
+    Resample 1 second frames of data by buffering 3 seconds
+    of them, applying `resample` to the whole buffer, and
+    keeping only the middle second to avoid edge effects.
+    Each update then returns the resampled data for the
+    second _before_ the most recent frame, or `None` if
+    there aren't yet enough frames in the buffer.
+
+    Args:
+        factor: Integer factor to downsample by
+        b: Numerator coefficients of the anti-aliasing filter
+        a: Denominator coefficients of the anti-aliasing filter
+        frame_size: Number of samples in each frame
+    """
+
+    def __init__(self, factor: int, b: np.ndarray, a: np.ndarray, frame_size):
+        self.factor = factor
+        self.b = b
+        self.a = a
+        self.frame_size = frame_size
+        self.frame_buffer = None
+
+        # slice corresponds to middle second of
+        # a 3 second buffer; the middle second is
+        # yielded at each step to mitigate resampling
+        # edge effects
+        size = frame_size // factor
+        self.slc = slice(-2 * size, -size)
+
+    def reset(self):
+        self.frame_buffer = None
+
+    def update(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self.frame_buffer is None:
+            self.frame_buffer = np.zeros((len(frame), 0))
+        self.frame_buffer = np.append(self.frame_buffer, frame, axis=1)
+
+        # Need at least 3 frames to be able to crop out edge effects
+        # from resampling and just return the middle one
+        if self.frame_buffer.shape[-1] < 3 * self.frame_size:
+            return None
+
+        x = resample(self.frame_buffer, self.factor, self.b, self.a)
+        self.frame_buffer = self.frame_buffer[:, self.frame_size :]
+        return x[:, self.slc]
+
+
+class StreamingResampler:
+    """
+    Drop-in replacement for `FiltfiltResampler` for FIR
+    anti-aliasing filters which filters each sample only once.
+    Applying an FIR filter forwards and backwards, as `filtfilt`
+    does, is equivalent to convolving with the autocorrelation
+    of the filter, which extends `len(b) - 1` samples to either
+    side. Away from the edges of the buffer, this is all that
+    `FiltfiltResampler` computes, so rather than refiltering
+    3 frames on each update, we keep the previous frame and
+    the end of the one before it as filter state, and only
+    compute the downsampled outputs of the previous frame.
+    These match the outputs of `FiltfiltResampler` up to
+    floating point error. Several consecutive frames can also
+    be passed to a single update, which then returns the
+    resampled data for all of the previous update's frames.
+
+    This reduces the cost of resampling, but not its latency.
+    The last `len(b) - 1` samples of each frame depend on the
+    start of the next one, and downstream consumers expect the
+    outputs of each update to line up with a whole frame, so
+    each frame is still only returned once the following frame
+    arrives. The first frame of a stream is only used as filter
+    state, just as `FiltfiltResampler` discards it.
+
+    Args:
+        factor: Integer factor to downsample by
+        b: Coefficients of the FIR anti-aliasing filter
+        a:
+            Denominator coefficients of the anti-aliasing
+            filter, which must be `[1]` since only FIR
+            filters are supported
+        frame_size: Number of samples in each frame
+    """
+
+    def __init__(self, factor: int, b: np.ndarray, a: np.ndarray, frame_size):
+        if not np.array_equal(np.atleast_1d(a), [1]):
+            raise ValueError(
+                "Streaming resampling only supports FIR filters, "
+                f"but got denominator coefficients {a}"
+            )
+        if frame_size % factor:
+            raise ValueError(
+                f"Frame size {frame_size} must be divisible "
+                f"by resampling factor {factor}"
+            )
+        if len(b) > frame_size:
+            raise ValueError(
+                f"Filter with {len(b)} taps is too long "
+                f"for frames of {frame_size} samples"
+            )
+
+        self.factor = factor
+        self.frame_size = frame_size
+        self.delay = len(b) - 1
+
+        # reverse the kernel so that we can apply it
+        # as a dot product with windows of the input
+        self.kernel = np.convolve(b, b[::-1])[::-1]
+        self.reset()
+
+    def reset(self):
+        self.previous = None
+        self.tail = None
+
+    def update(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        # only return data once we have a frame on either
+        # side of the previous frame, matching the startup
+        # behavior of `FiltfiltResampler`. Frames may span
+        # several `frame_size` intervals, in which case the
+        # first interval of the stream is only used as state
+        x = None
+        if self.previous is not None:
+            if self.tail is not None:
+                x = [self.tail, self.previous]
+            else:
+                x = [self.previous[:, self.frame_size - self.delay :]]
+            x = np.concatenate(x + [frame[:, : self.delay]], axis=1)
+            self.tail = self.previous[:, -self.delay :]
+        self.previous = frame
+        if x is None or x.shape[-1] < len(self.kernel):
+            return None
+
+        windows = np.lib.stride_tricks.sliding_window_view(
+            x, len(self.kernel), axis=-1
+        )
+        return windows[:, :: self.factor] @ self.kernel
+
+
+RESAMPLERS = {
+    "filtfilt": FiltfiltResampler,
+    "streaming": StreamingResampler,
+}
+
+
+class PrefetchIterator:
+    """
+    Run a data iterator on a background thread, keeping up
+    to `maxsize` of its outputs in a bounded queue so that
+    frames can be read and resampled while earlier frames are
+    being analyzed. Exceptions raised by the iterator are
+    re-raised when the item they would have produced is
+    requested. Iterators yield `(X, t0, ready)` tuples, and
+    `X` is moved into pinned memory when `pin_memory` is
+    `True` so that it can be copied to the GPU asynchronously.
+
+    Args:
+        data_it:
+            Iterator producing `(X, t0, ready)` tuples
+        maxsize:
+            Maximum number of items to read ahead
+        pin_memory:
+            Whether to pin the memory of each `X`
+    """
+
+    # sentinel marking that the iterator is exhausted
+    _done = object()
+
+    def __init__(
+        self,
+        data_it: Iterable,
+        maxsize: int = 2,
+        pin_memory: bool = False,
+    ) -> None:
+        self.queue = Queue(maxsize)
+        self.pin_memory = pin_memory
+        self.stopped = threading.Event()
+        self.it = iter(data_it)
+        self.thread = threading.Thread(
+            target=self._produce, args=(self.it,), daemon=True
+        )
+        self.thread.start()
+
+    def _put(self, item) -> bool:
+        # time out periodically so that we
+        # can exit if the consumer has stopped
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+            except Full:
+                continue
+            return True
+        return False
+
+    def _produce(self, it: Iterator) -> None:
+        try:
+            for X, t0, ready in it:
+                if self.pin_memory and X is not None:
+                    X = X.pin_memory()
+                if not self._put((X, t0, ready)):
+                    return
+        except Exception as e:
+            self._put(e)
+        else:
+            self._put(self._done)
+        finally:
+            # the iterator can only be closed from the thread
+            # advancing it, so release any resources it holds
+            # here once it's exhausted or we've been stopped
+            if hasattr(it, "close"):
+                it.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+                break
+            except Empty:
+                if not self.thread.is_alive():
+                    raise StopIteration from None
+
+        if item is self._done:
+            raise StopIteration
+        elif isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self, timeout: float = 1.0) -> None:
+        """
+        Stop the producer thread, waiting up to `timeout`
+        seconds for it to exit. If it's blocked waiting on
+        the iterator, e.g. for the next frame to be written,
+        it's left to exit, and close the iterator, once
+        the iterator produces its next item.
+        """
+        self.stopped.set()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logging.warning(
+                "Prefetch thread didn't exit within {:0.1f}s, "
+                "leaving it to exit once its iterator "
+                "produces its next item".format(timeout)
+            )
+
+
 def parse_frame_name(fname: PATH_LIKE) -> tuple[str, int, int]:
     """Use the name of a frame file to infer its initial timestamp and length
 
@@ -0,0 +1,213 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Optional
+
+from online.dataloading.utils import fname_re, is_gwf
+
+# inotify event masks, see `man 7 inotify`
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+# wd, mask, cookie and name length of each event
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _init_inotify() -> Optional[tuple[ctypes.CDLL, int]]:
+    """
+    Create an inotify instance, returning the libc handle used
+    to add watches to it along with its file descriptor, or
+    `None` if inotify isn't available on this platform
+    """
+    libname = ctypes.util.find_library("c")
+    if libname is None:
+        return None
+
+    try:
+        libc = ctypes.CDLL(libname, use_errno=True)
+        init = libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+
+    fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    return libc, fd
+
+
+class FrameWatcher:
+    """
+    Keep an in-memory index of the frame files available in
+    the data directory of each interferometer, and wait for
+    new frames to become available.
+
+    On Linux, the index is kept up to date by inotify, which
+    reports frames as soon as they're closed for writing or
+    moved into a directory, without listing the directory.
+    Elsewhere, or if inotify can't be set up, the watcher
+    falls back to polling the filesystem for the frames it's
+    waiting on, backing off exponentially between checks
+    from `min_interval` to `max_interval` seconds.
+
+    Args:
+        directories:
+            Map from interferometer names to the directories
+            their frames are written to
+        min_interval:
+            Initial time between checks when polling
+        max_interval:
+            Maximum time between checks when polling
+    """
+
+    def __init__(
+        self,
+        directories: dict[str, Path],
+        min_interval: float = 1e-3,
+        max_interval: float = 0.05,
+    ) -> None:
+        self.directories = directories
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        # map from interferometer to the names
+        # and start times of its frame files
+        self.index = {ifo: {} for ifo in directories}
+        self.watches = {}
+
+        inotify = _init_inotify()
+        if inotify is not None:
+            libc, self.fd = inotify
+            for ifo, directory in directories.items():
+                wd = libc.inotify_add_watch(
+                    self.fd, str(directory).encode(), WATCH_MASK
+                )
+                if wd < 0:
+                    errno = ctypes.get_errno()
+                    logging.warning(
+                        "Couldn't watch frame directory {}: {}. "
+                        "Falling back to polling".format(
+                            directory, os.strerror(errno)
+                        )
+                    )
+                    os.close(self.fd)
+                    self.fd, self.watches = None, {}
+                    break
+                self.watches[wd] = ifo
+        else:
+            logging.warning(
+                "inotify not available, polling for new frames instead"
+            )
+            self.fd = None
+
+        # list the directories once after the watches are in
+        # place, so that no frames written in between are missed
+        self.scan()
+
+    @property
+    def inotify(self) -> bool:
+        return self.fd is not None
+
+    def scan(self, ifo: Optional[str] = None) -> None:
+        """
+        Rebuild the index by listing the frame directory of
+        `ifo`, or of every interferometer if `ifo` is `None`
+        """
+        ifos = self.directories if ifo is None else [ifo]
+        for ifo in ifos:
+            index = self.index[ifo] = {}
+            for path in self.directories[ifo].iterdir():
+                self._add(index, path.name)
+
+    def _add(self, index: dict[str, int], name: str) -> None:
+        match = fname_re.search(name)
+        if is_gwf(match):
+            index[name] = int(match.group("start"))
+
+    def _read_events(self, timeout: Optional[float]) -> None:
+        """
+        Wait up to `timeout` seconds for inotify events
+        and use them to update the frame index
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+
+        buf = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset : offset + length].rstrip(b"\0").decode()
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logging.warning("inotify queue overflowed, rescanning frames")
+                self.scan()
+                continue
+
+            ifo = self.watches.get(wd)
+            if ifo is None:
+                continue
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._add(self.index[ifo], name)
+            else:
+                self.index[ifo].pop(name, None)
+
+    def update(self) -> None:
+        """Apply any pending changes to the frame directories"""
+        if self.inotify:
+            self._read_events(0)
+        else:
+            self.scan()
+
+    def latest(self, ifo: str) -> Optional[int]:
+        """
+        Return the start time of the most recent frame
+        of `ifo`, or `None` if there aren't any
+        """
+        self.update()
+        index = self.index[ifo]
+        return max(index.values()) if index else None
+
+    def wait(self, ifo: str, name: str, timeout: Optional[float]) -> bool:
+        """
+        Wait up to `timeout` seconds for the frame file `name`
+        of `ifo` to become available, returning whether it did.
+        If `timeout` is `None`, wait indefinitely.
+        """
+        tick = time.time()
+        interval = self.min_interval
+        while True:
+            if self.inotify:
+                if name in self.index[ifo]:
+                    return True
+            elif (self.directories[ifo] / name).exists():
+                return True
+
+            remaining = None
+            if timeout is not None:
+                remaining = timeout - time.time() + tick
+                if remaining <= 0:
+                    return False
+
+            if self.inotify:
+                self._read_events(remaining)
+            else:
+                if remaining is not None:
+                    interval = min(interval, remaining)
+                time.sleep(interval)
+                interval = min(2 * interval, self.max_interval)
+
+    def close(self) -> None:
+        if self.inotify:
+            os.close(self.fd)
+            self.fd = None
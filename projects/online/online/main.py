@@ -21,6 +21,8 @@ from online.dataloading import (
     offline_data_iterator,
     ngdd_data_iterator,
 )
+from online.dataloading.utils import PrefetchIterator
+from online.utils.latency import LatencyTracer
 from online.utils.pe import run_amplfi, warmup_amplfi
 from online.utils.searcher import Searcher
 from online.utils.snapshotter import OnlineSnapshotter
@@ -30,6 +32,7 @@ from online.subprocesses import (
     pastro_subprocess,
     event_creation_subprocess,
     authenticate_subprocess,
+    latency_subprocess,
     setup_logging,
     cleanup_subprocesses,
     signal_handler,
@@ -169,7 +172,10 @@ def search(
     device: str,
     outdir: Path,
     emails: Optional[list[str]] = None,
+    tracer: Optional[LatencyTracer] = None,
 ):
+    # a tracer without a queue records nothing
+    tracer = tracer or LatencyTracer()
     significance_outputs, timing_outputs = None, None
 
     # flag that declares if the most previous frame
@@ -180,6 +186,9 @@ def search(
 
     state = snapshotter.initial_state
     for X, t0, ready in data_it:
+        # frames are traced by the GPS time at the end of their data
+        key = t0 + update_size
+
         # handle any subprocess
         try:
             name, error, tb = error_queue.get_nowait()
@@ -215,6 +224,7 @@ def search(
                     len(timing_outputs) - 1,
                 )
                 if event is not None:
+                    tracer.event(event.gpstime, "search")
                     # if virgo is available use it for amplfi
                     if all(virgo_ready) and len(ready) == 3:
                         amplfi_ifos = ["H1", "L1", "V1"]
@@ -277,7 +287,7 @@ def search(
         # we have a frame that is analysis ready,
         # so lets analyze it, taking the first two
         # channels, which correspond to H1/L1
-        X = X[:2].to(device)
+        X = X[:2].to(device, non_blocking=True)
 
         # update the snapshotter state and return
         # unfolded batch of overlapping windows
@@ -287,6 +297,7 @@ def search(
         # whiten the batch, and analyze with aframe
         logging.debug("Whitening data")
         whitened = whitener(batch)
+        tracer.frame(key, "whiten")
 
         # only actually perform inference
         # if HL is ready, otherwise use dummy values
@@ -303,6 +314,7 @@ def search(
         significance_outputs, timing_outputs = output_buffer.update(
             y.cpu(), t0
         )
+        tracer.frame(key, "infer")
 
         # if this frame was analysis ready,
         # and we had enough previous to build whitening filter
@@ -313,9 +325,11 @@ def search(
             event = searcher.search(
                 significance_outputs, timing_outputs, t0 + time_offset
             )
+        tracer.frame(key, "search")
 
         # if we found an event, process it!
         if event is not None:
+            tracer.event(event.gpstime, "search")
             if all(virgo_ready) and len(ready) == 3:
                 amplfi_ifos = ["H1", "L1", "V1"]
             else:
@@ -388,6 +402,10 @@ def main(
     device: str = "cpu",
     verbose: bool = False,
     mode: Literal["online", "offline"] = "online",
+    resample_mode: Literal["filtfilt", "streaming"] = "filtfilt",
+    incremental_psd: bool = False,
+    fast_replay: bool = False,
+    prefetch_frames: int = 2,
     matmul_precision: Literal["highest", "high", "medium"] = "highest",
 ):
     """
@@ -508,6 +526,37 @@ def main(
             are analyzed as if they were "streamed" online. Useful for
             mimicking an online analysis over mock data challenges with
             performance capabilities that are faster than realtime.
+        resample_mode:
+            How to resample frame data to `sample_rate`.
+            `filtfilt`, the default, filters a 3 second buffer of
+            frames on each update, while `streaming` carries the
+            state of the filter between frames so that each sample
+            is only filtered once, producing the same data at a
+            fraction of the cost. Both return each second of data
+            once the following frame has arrived, since its last
+            samples can't be filtered without the start of the
+            next frame. Only applies when `data_source` is `frames`.
+        incremental_psd:
+            If `True`, the PSDs used to whiten each update reuse
+            the spectra of the FFT segments shared with the last
+            update, so that only the segments covering the newest
+            data are computed. The PSDs are the same as those of
+            the default estimator, but reusing segments is only
+            faster for long `psd_length`s, e.g. a minute or more
+            on CPU, so check `libs/utils/benchmarks/psd.py` on
+            your hardware before enabling it.
+        fast_replay:
+            If `True` and `mode` is `offline`, resample each chunk
+            of frame data at once and compute the readiness of
+            each second in a single pass, rather than processing
+            the data one second at a time. The search sees the same
+            stream of data, always using the `streaming` resampler
+            regardless of `resample_mode`.
+        prefetch_frames:
+            Number of frames of data to read ahead on a background
+            thread, so that reading and resampling the next frames
+            overlaps with analyzing the current one. Set to 0 to
+            read frames on the main thread.
         matmul_precision:
             See https://docs.pytorch.org/docs/stable/generated/torch.set_float32_matmul_precision.html
             Setting precision to 'high' or 'medium' can significantly
@@ -520,6 +569,7 @@ def main(
     pastro_queue = Queue()
     event_queue = Queue()
     amplfi_queue = Queue()
+    latency_queue = Queue()
 
     # create subprocess list for responsibly
     # shuting down sbuprocesses if pipeline crashes
@@ -534,6 +584,22 @@ def main(
     )
     subprocesses.append(logging_subprocess)
 
+    # initialize subprocess which will record the latency
+    # of each stage of the pipeline traced by `tracer`,
+    # which is passed to the other subprocesses
+    args = (
+        error_queue,
+        level,
+        "latency",
+        log_queue,
+        latency_queue,
+        outdir / "latency" / "trace.bin",
+    )
+    latency_process = Process(target=latency_subprocess, args=args)
+    latency_process.start()
+    subprocesses.append(latency_process)
+    tracer = LatencyTracer(latency_queue)
+
     logging.info(f"Setting matmul precision to {matmul_precision}")
     torch.set_float32_matmul_precision(matmul_precision)
 
@@ -637,6 +703,7 @@ def main(
         outdir / "events",
         amplfi_queue,
         pastro_queue,
+        tracer,
     )
     event_process = Process(
         target=event_creation_subprocess,
@@ -666,6 +733,7 @@ def main(
         nside,
         min_samples_per_pix,
         use_distance,
+        tracer,
     )
 
     amplfi_process = Process(
@@ -691,6 +759,7 @@ def main(
         astro_event_rate,
         gdb,
         outdir,
+        tracer,
     )
     pastro_process = Process(
         target=pastro_subprocess,
@@ -722,6 +791,8 @@ def main(
                 ifo_suffix=ifo_suffix,
                 state_channels=state_channels,
                 timeout=10,
+                resample_mode=resample_mode,
+                tracer=tracer,
             )
         if mode == "offline":
             data_it = offline_data_iterator(
@@ -731,6 +802,8 @@ def main(
                 sample_rate=sample_rate,
                 ifo_suffix=ifo_suffix,
                 state_channels=state_channels,
+                resample_mode=resample_mode,
+                fast_replay=fast_replay,
             )
 
     else:
@@ -738,6 +811,13 @@ def main(
             f"Invalid data source {data_source}. Must be 'ngdd' or 'frames'"
         )
 
+    if prefetch_frames > 0:
+        data_it = PrefetchIterator(
+            data_it,
+            maxsize=prefetch_frames,
+            pin_memory=device.startswith("cuda"),
+        )
+
     # initialize a buffer for storing recent strain data,
     # and for storing integrated aframe outputs
     input_buffer = InputBuffer(
@@ -808,6 +888,7 @@ def main(
         fftlength=fftlength,
         highpass=highpass,
         lowpass=lowpass,
+        incremental_psd=incremental_psd,
     ).to(device)
 
     # Hard-coding number of channels until Aframe is generalized
@@ -896,6 +977,7 @@ def main(
             device=device,
             emails=emails,
             outdir=outdir,
+            tracer=tracer,
         )
     except Exception as e:
         # if error is from a subprocess,
@@ -904,6 +986,10 @@ def main(
             tb = traceback.format_exc()
             send_error_email("main", str(e), tb, emails)
         raise e
+    finally:
+        latency_queue.put(None)
+        if hasattr(data_it, "close"):
+            data_it.close()
 
     if mode == "offline":
         logging.info("Offline analysis complete")
@@ -6,6 +6,7 @@ from gwpy.time import tconvert
 from online.monitor.pages import MonitorPage
 from online.monitor.utils.plotting import (
     latency_plot,
+    stage_latency_plot,
     ifar_plot,
     event_rate_plots,
 )
@@ -25,11 +26,13 @@ class SummaryPage(MonitorPage):
         if not self.plots_dir.exists():
             self.plots_dir.mkdir(exist_ok=True, parents=True)
         self.html_file = self.out_dir / "summary.html"
+        self.trace_file = self.run_dir / "output" / "latency" / "trace.bin"
 
     @property
     def plot_name_dict(self) -> dict:
         return {
             "aframe_latency": "Aframe detection latency",
+            "stage_latency": "Latency of each stage of the pipeline",
             "event_rate_past_day": "Event rate over the past day",
             "event_rate_past_week": "Event rate over the past week",
             "event_rate_all_time": "Event rate over all time",
@@ -73,6 +76,10 @@ class SummaryPage(MonitorPage):
         """
         for name, caption in self.plot_name_dict.items():
             png = self.plots_dir / f"{name}.png"
+            # stage latencies are only plotted once
+            # the pipeline has recorded some
+            if not png.exists():
+                continue
             html_body += self.embed_image(png, caption)
 
         return html_body
@@ -86,6 +93,8 @@ class SummaryPage(MonitorPage):
         """
         df = pd.read_hdf(self.dataframe_file)
         latency_plot(self.plots_dir, df)
+        if self.trace_file.exists():
+            stage_latency_plot(self.plots_dir, self.trace_file)
         ifar_plot(self.plots_dir, df, tb)
         event_rate_plots(self.plots_dir, df)
 
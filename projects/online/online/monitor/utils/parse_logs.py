@@ -1,10 +1,14 @@
+import numpy as np
+import pandas as pd
 import psutil
 from pathlib import Path
 from gwpy.time import tconvert
 from datetime import datetime, timezone
 import pytz
 
-EXPECTED_PROCESS_COUNT = 6
+from online.utils.latency import KINDS, RECORD_DTYPE, STAGES
+
+EXPECTED_PROCESS_COUNT = 7
 
 
 def get_log_files(log_dir: Path, start_time: float) -> list:
@@ -135,3 +139,34 @@ def data_ready(run_dir: Path):
         if line.endswith(ready_line):
             return True
     return True
+
+
+def read_latencies(fname: Path) -> pd.DataFrame:
+    """
+    Read the records written by a latency subprocess into a
+    DataFrame with a row for each frame or event, indexed by
+    its kind and key, and a column with the latency of each
+    stage, in seconds since the frame's data ended or the
+    event occurred. Stages that weren't recorded are NaN.
+    """
+    # ignore any partially written record at the end of the file
+    data = np.fromfile(fname, dtype=np.uint8)
+    size = len(data) - len(data) % RECORD_DTYPE.itemsize
+    records = data[:size].view(RECORD_DTYPE)
+
+    df = pd.DataFrame(
+        {
+            "kind": np.array(KINDS)[records["kind"]],
+            "stage": np.array(STAGES)[records["stage"]],
+            "key": records["key"],
+            "latency": records["time"] - records["key"],
+        }
+    )
+    df = df.pivot_table(
+        index=["kind", "key"],
+        columns="stage",
+        values="latency",
+        aggfunc="first",
+    )
+    stages = [stage for stage in STAGES if stage in df.columns]
+    return df[stages]
@@ -10,6 +10,9 @@ import logging
 
 from datetime import datetime, timedelta, timezone
 
+from online.monitor.utils.parse_logs import read_latencies
+from online.utils.latency import KINDS
+
 IFOS = ["H1", "L1", "V1"]
 SECONDS_PER_YEAR = 365 * 86400
 
@@ -136,6 +139,40 @@ def latency_plot(plotsdir: Path, df: pd.DataFrame) -> None:
     plt.close()
 
 
+def stage_latency_plot(plotsdir: Path, trace_file: Path) -> None:
+    """
+    Plot percentiles of the latency of frames and events at
+    the end of each stage of the pipeline, as recorded by the
+    pipeline's latency subprocess
+
+    Args:
+        plotsdir: Directory to save the plots
+        trace_file: File of latency records written by the pipeline
+    """
+    df = read_latencies(trace_file)
+    fig, axs = plt.subplots(1, len(KINDS), figsize=(12, 6))
+    for ax, kind in zip(axs, KINDS):
+        if kind in df.index.get_level_values("kind"):
+            latency = df.loc[kind].dropna(axis=1, how="all")
+            for q, color in zip([0.5, 0.9, 0.99], ["C0", "C1", "C2"]):
+                quantiles = latency.quantile(q)
+                ax.plot(
+                    quantiles.index,
+                    quantiles.values,
+                    marker="o",
+                    color=color,
+                    label=f"{int(q * 100)}th percentile",
+                )
+            ax.legend()
+        ax.set_yscale("log")
+        ax.set_title(f"{kind.capitalize()} latency")
+        ax.set_xlabel("Stage")
+        ax.set_ylabel("Latency (s)")
+    plt.tight_layout()
+    plt.savefig(plotsdir / "stage_latency.png", dpi=150)
+    plt.close()
+
+
 def ifar_plot(plotsdir: Path, df: pd.DataFrame, tb: float) -> None:
     """
     Create a plot of the inverse false alarm rate (iFAR) vs the
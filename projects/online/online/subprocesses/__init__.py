@@ -2,6 +2,7 @@ from .amplfi import amplfi_subprocess
 from .p_astro import pastro_subprocess
 from .events import event_creation_subprocess
 from .authenticate import authenticate_subprocess
+from .latency import latency_subprocess
 from .utils import (
     cleanup_subprocesses,
     signal_handler,
@@ -12,6 +12,7 @@ from ligo.skymap.io.fits import gps_to_iso8601
 
 if TYPE_CHECKING:
     from online.utils.gdb import GraceDb
+    from online.utils.latency import LatencyTracer
 
 logger = logging.getLogger("amplfi-subprocess")
 
@@ -28,6 +29,7 @@ def amplfi_subprocess(
     nside: int = 64,
     min_samples_per_pix: int = 5,
     use_distance: bool = True,
+    tracer: Optional["LatencyTracer"] = None,
 ):
     logger.info("amplfi subprocess initialized")
     # override with subprocesses logger
@@ -74,6 +76,8 @@ def amplfi_subprocess(
                 graceid,
                 event,
             )
+            if tracer is not None:
+                tracer.event(event.gpstime, "amplfi")
 
             if emails is not None and event.far < email_far_threshold:
                 logger.info(f"Sending detection email for {graceid}")
@@ -131,6 +135,8 @@ def amplfi_subprocess(
                 graceid,
                 event,
             )
+            if tracer is not None:
+                tracer.event(event.gpstime, "amplfi")
 
             if emails is not None and event.far < email_far_threshold:
                 logger.info("Sending detection email")
@@ -1,12 +1,13 @@
 from queue import Queue
 import logging
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from .utils import subprocess_wrapper
 
 if TYPE_CHECKING:
     from online.utils.gdb import GraceDb
+    from online.utils.latency import LatencyTracer
 
 logger = logging.getLogger("event-creation-subprocess")
 
@@ -18,6 +19,7 @@ def event_creation_subprocess(
     outdir: Path,
     amplfi_queue: Queue,
     pastro_queue: Queue,
+    tracer: Optional["LatencyTracer"] = None,
 ):
     logger.info("event creation subprocess initialized")
 
@@ -32,6 +34,8 @@ def event_creation_subprocess(
         # and submit it to gracedb
         event.write(outdir)
         graceid = gdb.submit(event)
+        if tracer is not None:
+            tracer.event(event.gpstime, "submit")
 
         logger.debug(f"Putting graceid {graceid} in amplfi and pastro queues")
         amplfi_queue.put(graceid)
@@ -0,0 +1,83 @@
+import logging
+import time
+from pathlib import Path
+from queue import Empty
+
+import numpy as np
+from torch.multiprocessing import Queue
+
+from online.utils.latency import KINDS, RECORD_DTYPE, STAGES
+from .utils import subprocess_wrapper
+
+logger = logging.getLogger("latency-subprocess")
+
+
+def summarize(records: np.ndarray) -> None:
+    """
+    Log percentiles of the time from the end of each
+    frame's data to the end of the search over it
+    """
+    mask = records["kind"] == KINDS.index("frame")
+    mask &= records["stage"] == STAGES.index("search")
+    if not mask.any():
+        return
+
+    latency = records["time"][mask] - records["key"][mask]
+    latency = np.percentile(latency, [50, 90, 99])
+    logger.info(
+        "Latency of the last {} frames: median {:0.3f}s, "
+        "90th percentile {:0.3f}s, 99th percentile {:0.3f}s".format(
+            mask.sum(), *latency
+        )
+    )
+
+
+@subprocess_wrapper
+def latency_subprocess(
+    queue: Queue,
+    fname: Path,
+    flush_interval: float = 1,
+    summary_interval: float = 60,
+) -> None:
+    """
+    Collect records from `LatencyTracer`s in other processes
+    and append them to the binary file `fname`, writing any
+    collected records every `flush_interval` seconds. Latency
+    percentiles of the frames searched since the last summary
+    are logged every `summary_interval` seconds. Exits once
+    `None` is put on the queue.
+    """
+    fname.parent.mkdir(exist_ok=True, parents=True)
+    records, summary = [], []
+    last_flush = last_summary = time.time()
+    with open(fname, "ab") as f:
+        # drop any record left partially written by a previous
+        # run, so that the records appended here stay aligned
+        size = f.tell()
+        f.truncate(size - size % RECORD_DTYPE.itemsize)
+
+        while True:
+            try:
+                record = queue.get(timeout=flush_interval)
+            except Empty:
+                record = ()
+
+            if record is None:
+                break
+            elif record:
+                records.append(record)
+
+            now = time.time()
+            if records and now - last_flush >= flush_interval:
+                records = np.array(records, dtype=RECORD_DTYPE)
+                records.tofile(f)
+                f.flush()
+                summary.append(records)
+                records, last_flush = [], now
+
+            if summary and now - last_summary >= summary_interval:
+                summarize(np.concatenate(summary))
+                summary, last_summary = [], now
+
+        if records:
+            np.array(records, dtype=RECORD_DTYPE).tofile(f)
@@ -1,7 +1,7 @@
 import logging
 import time
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from torch.multiprocessing import Queue
 
@@ -18,6 +18,7 @@ from p_astro.p_astro import Pastro
 
 if TYPE_CHECKING:
     from online.utils.gdb import GraceDb
+    from online.utils.latency import LatencyTracer
 
 logger = logging.getLogger("pastro-process")
 
@@ -87,6 +88,7 @@ def pastro_subprocess(
     astro_event_rate,
     gdb: "GraceDb",
     outdir: Path,
+    tracer: Optional["LatencyTracer"] = None,
 ):
     logger.info("pastro subprocess initialized")
 
@@ -149,4 +151,6 @@ def pastro_subprocess(
 
         logger.info(f"Submitting p_astro: {probs} for {graceid}")
         gdb.submit_pastro(probs, graceid, event.event_dir)
+        if tracer is not None:
+            tracer.event(event.gpstime, "pastro")
         logger.info(f"Submitted p_astro for {graceid}")
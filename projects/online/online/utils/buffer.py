@@ -2,6 +2,66 @@ import h5py
 import numpy as np
 import torch
 
+from utils.integration import boxcar_integrate
+
+
+class RingBuffer:
+    """
+    Fixed-size circular buffer of the most recent samples
+    of a (possibly multichannel) timeseries. Storage is
+    allocated up front with two copies of the buffer laid
+    end to end, and every update is written to both copies,
+    so that the full buffer, in time order, is always a
+    contiguous view into the storage that doesn't wrap.
+    Updates therefore never allocate new storage, except
+    to promote its dtype to that of the first update, as
+    concatenating with the update would.
+
+    Args:
+        shape:
+            The shape of each sample in the buffer,
+            i.e. all but its last dimension
+        size:
+            The number of samples in the buffer
+        device:
+            The device on which to allocate the buffer
+    """
+
+    def __init__(self, shape: tuple[int, ...], size: int, device: str):
+        self.size = size
+        self.storage = torch.zeros(shape + (2 * size,), device=device)
+        self.head = 0
+
+    @property
+    def data(self) -> torch.Tensor:
+        """
+        View of the samples in the buffer from oldest to
+        newest, which will be overwritten by later updates
+        """
+        return self.storage[..., self.head : self.head + self.size]
+
+    def reset(self):
+        self.storage.zero_()
+        self.head = 0
+
+    def update(self, update: torch.Tensor):
+        dtype = torch.promote_types(self.storage.dtype, update.dtype)
+        if dtype != self.storage.dtype:
+            self.storage = self.storage.to(dtype)
+
+        # overwrite the oldest samples in the buffer, wrapping
+        # around to the start of each copy if necessary
+        update = update[..., -self.size :]
+        num = update.shape[-1]
+        first = min(num, self.size - self.head)
+        head, tail = update[..., :first], update[..., first:]
+        for offset in [0, self.size]:
+            start = offset + self.head
+            self.storage[..., start : start + first] = head
+            if num > first:
+                self.storage[..., offset : offset + num - first] = tail
+        self.head = (self.head + num) % self.size
+
 
 class InputBuffer(torch.nn.Module):
     """
@@ -43,30 +103,30 @@ class InputBuffer(torch.nn.Module):
         self.amplfi_kernel_length = amplfi_kernel_length
         self.event_position = event_position
 
-        self.input_buffer = torch.zeros(
-            (self.num_channels, self.buffer_size), device=device
-        )
+        self.ring = RingBuffer((self.num_channels,), self.buffer_size, device)
         self.reset()
 
+    @property
+    def input_buffer(self):
+        return self.ring.data
+
     def write(self, write_path, event_time):
         start = self.t0
         stop = self.t0 + self.buffer_length
         time = np.linspace(start, stop, self.buffer_size)
+        input_buffer = self.input_buffer.cpu()
         with h5py.File(write_path, "w") as f:
             f.attrs.create("event_time", data=event_time)
             f.create_dataset("time", data=time)
             for i, ifo in enumerate(self.ifos):
-                f.create_dataset(ifo, data=self.input_buffer[i, :].cpu())
+                f.create_dataset(ifo, data=input_buffer[i, :])
 
     def reset(self):
         self.t0 = None
-        self.input_buffer = torch.zeros(
-            (self.num_channels, self.buffer_size), device=self.device
-        )
+        self.ring.reset()
 
     def update(self, update, t0):
-        self.input_buffer = torch.cat([self.input_buffer, update], axis=-1)
-        self.input_buffer = self.input_buffer[:, -self.buffer_size :]
+        self.ring.update(update)
         update_duration = update.shape[-1] / self.sample_rate
         self.t0 = t0 - (self.buffer_length - update_duration)
 
@@ -84,8 +144,15 @@ class InputBuffer(torch.nn.Module):
 
         psd_start = window_start - int(psd_length * self.sample_rate)
 
-        # get indices in tensor corresponding to requested ifos
-        indices = torch.tensor([self.ifos.index(ifo) for ifo in ifos])
+        # get indices in tensor corresponding to requested ifos,
+        # using a slice if they're consecutive so that the data
+        # is returned as views into the buffer rather than copies.
+        # Either way, the data should be used before the next update
+        indices = [self.ifos.index(ifo) for ifo in ifos]
+        if indices == list(range(indices[0], indices[0] + len(indices))):
+            indices = slice(indices[0], indices[0] + len(indices))
+        else:
+            indices = torch.tensor(indices)
 
         psd_data = self.input_buffer[indices, psd_start:window_start]
         window = self.input_buffer[indices, window_start:window_end]
@@ -123,18 +190,9 @@ class OutputBuffer(torch.nn.Module):
         self.timing_integrator_size = (
             int(integration_window_length * online_inference_rate) + 1
         )
-        self.timing_window = torch.ones(
-            (1, 1, self.timing_integrator_size), device=device
-        )
-        self.timing_window /= self.timing_integrator_size
-
-        significance_integrator_size = (
+        self.significance_integrator_size = (
             int(integration_window_length * offline_inference_rate) + 1
         )
-        self.significance_window = torch.ones(
-            (1, 1, significance_integrator_size), device=device
-        )
-        self.significance_window /= significance_integrator_size
 
         self.online_offline_stride = int(
             online_inference_rate / offline_inference_rate
@@ -143,18 +201,22 @@ class OutputBuffer(torch.nn.Module):
         self.buffer_length = buffer_length
         self.buffer_size = int(buffer_length * online_inference_rate)
 
-        self.output_buffer = torch.zeros((self.buffer_size,), device=device)
-
+        self.output_ring = RingBuffer((), self.buffer_size, device)
+        self.integrated_ring = RingBuffer((), self.buffer_size, device)
         self.reset()
 
+    @property
+    def output_buffer(self):
+        return self.output_ring.data
+
+    @property
+    def integrated_buffer(self):
+        return self.integrated_ring.data
+
     def reset(self):
         self.t0 = None
-        self.output_buffer = torch.zeros(
-            (self.buffer_size,), device=self.device
-        )
-        self.integrated_buffer = torch.zeros(
-            (self.buffer_size,), device=self.device, requires_grad=False
-        )
+        self.output_ring.reset()
+        self.integrated_ring.reset()
 
     def write(self, path):
         start = self.t0
@@ -169,21 +231,23 @@ class OutputBuffer(torch.nn.Module):
             )
 
     def integrate(self, x: torch.Tensor):
-        x = x.view(1, 1, -1)
-        timing_output = torch.nn.functional.conv1d(
-            x, self.timing_window, padding="valid"
+        x = x.detach().cpu().numpy()
+        timing_output = boxcar_integrate(x, self.timing_integrator_size)
+        x = x[:: self.online_offline_stride]
+        significance_output = boxcar_integrate(
+            x, self.significance_integrator_size
         )
-        x = x[..., :: self.online_offline_stride]
-        significance_output = torch.nn.functional.conv1d(
-            x, self.significance_window, padding="valid"
-        )
-        return timing_output[0, 0, 1:], significance_output[0, 0, 1:]
+
+        # integration is done in float64, so cast
+        # back to the dtype of the network outputs
+        timing_output = timing_output[1:].astype(x.dtype)
+        significance_output = significance_output[1:].astype(x.dtype)
+        return timing_output, significance_output
 
     def update(self, update: torch.Tensor, t0: float):
-        # first append update to the output buffer
-        # and remove buffer_size samples from front
-        self.output_buffer = torch.cat([self.output_buffer, update])
-        self.output_buffer = self.output_buffer[-self.buffer_size :]
+        # first append update to the output buffer,
+        # overwriting its oldest samples
+        self.output_ring.update(update)
 
         # t0 corresponds to the time of the first sample in the update
         # self.t0 corresponds to the earliest time in the buffer
@@ -193,10 +257,6 @@ class OutputBuffer(torch.nn.Module):
         integration_size = self.timing_integrator_size + len(update)
         y = self.output_buffer[-integration_size:]
         timing_output, significance_output = self.integrate(y)
-        self.integrated_buffer = torch.cat(
-            [self.integrated_buffer, timing_output]
-        )
-        self.integrated_buffer = self.integrated_buffer[-self.buffer_size :]
-        timing_cpu = timing_output.detach().cpu().numpy()
-        significance_cpu = significance_output.detach().cpu().numpy()
-        return significance_cpu, timing_cpu
+        timing = torch.from_numpy(timing_output).to(self.integrated_buffer)
+        self.integrated_ring.update(timing)
+        return significance_output, timing_output
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from gwpy.time import tconvert
+
+if TYPE_CHECKING:
+    from multiprocessing import Queue
+
+# stages of the pipeline that frames and events pass through,
+# in the order they happen. Frames pass through `write` to
+# `search`, and events through `search` to `pastro`
+STAGES = (
+    "write",
+    "read",
+    "resample",
+    "whiten",
+    "infer",
+    "search",
+    "submit",
+    "amplfi",
+    "pastro",
+)
+KINDS = ("frame", "event")
+
+# each record notes the time, in GPS seconds, at which a
+# frame or event identified by its GPS `key` finished a stage
+RECORD_DTYPE = np.dtype(
+    [("kind", "u1"), ("stage", "u1"), ("key", "<f8"), ("time", "<f8")]
+)
+
+
+def gps_now() -> float:
+    return float(tconvert(datetime.now(tz=timezone.utc)))
+
+
+class LatencyTracer:
+    """
+    Record the time at which frames of data and detected events
+    finish each stage of the online pipeline. Frames are keyed by
+    the GPS time at the end of their data, and events by their
+    GPS time, so that the latency of each stage is the difference
+    between its time and the key. Records are put on a queue to be
+    written to disk by a latency subprocess, so tracers can be
+    passed to and used from any subprocess. A tracer without a
+    queue records nothing.
+
+    Stages which launch GPU work are recorded when the work has
+    been queued unless a later operation synchronizes with it.
+
+    Args:
+        queue:
+            Queue read by
+            `online.subprocesses.latency.latency_subprocess`
+    """
+
+    def __init__(self, queue: Optional["Queue"] = None) -> None:
+        self.queue = queue
+
+        # converting to GPS time is too slow to do for every
+        # record, so keep the offset from unix time instead
+        self.offset = gps_now() - time.time()
+
+    def now(self) -> float:
+        """The current GPS time"""
+        return time.time() + self.offset
+
+    def mark(
+        self, kind: str, key: float, stage: str, t: Optional[float] = None
+    ) -> None:
+        """
+        Record that the frame or event `key` finished `stage` at
+        GPS time `t`, or now if `t` isn't specified
+        """
+        if self.queue is None:
+            return
+        t = self.now() if t is None else t
+        record = (KINDS.index(kind), STAGES.index(stage), key, t)
+        self.queue.put(record)
+
+    def frame(self, key: float, stage: str, t: Optional[float] = None):
+        self.mark("frame", key, stage, t)
+
+    def event(self, key: float, stage: str, t: Optional[float] = None):
+        self.mark("event", key, stage, t)
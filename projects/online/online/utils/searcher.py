@@ -12,8 +12,6 @@ from gwpy.time import tconvert
 from ledger.events import EventSet
 from online.dataloading.online import get_prefix
 
-SECONDS_PER_YEAR = 31556952  # 60 * 60 * 24 * 365.2425
-
 
 def gps_from_timestamp(timestamp: float):
     return float(tconvert(datetime.fromtimestamp(timestamp, tz=timezone.utc)))
@@ -96,6 +94,50 @@ class Event:
         return path
 
 
+@dataclass(frozen=True)
+class FarTable:
+    """
+    Immutable lookup table for the FARs of detection statistic
+    values, built from the sorted detection statistics of a
+    background distribution and the livetime used to produce
+    it. Lookups are a single binary search, with none of the
+    validation done by `EventSet.far`.
+
+    Args:
+        stats:
+            Read-only detection statistics of the
+            background events, in ascending order
+        Tb:
+            Livetime of the background in seconds
+    """
+
+    stats: np.ndarray
+    Tb: float
+
+    @classmethod
+    def from_background(cls, background: EventSet) -> "FarTable":
+        stats = background.sorted_detection_statistic.copy()
+        stats.flags.writeable = False
+        return cls(stats, float(background.Tb))
+
+    def far(self, value: float) -> float:
+        """
+        FAR in Hz of an event with detection statistic `value`.
+        If `value` is above the loudest background event, return
+        the minimum FAR that can be resolved given the livetime.
+        """
+        # searching with a value of a different dtype would cast
+        # the whole table, so round the value up to the table's
+        # dtype, which preserves which statistics are >= it
+        dtype = self.stats.dtype.type
+        rounded = dtype(value)
+        if float(rounded) < value:
+            rounded = np.nextafter(rounded, dtype(np.inf))
+
+        nb = len(self.stats) - np.searchsorted(self.stats, rounded)
+        return max(int(nb), 1) / self.Tb
+
+
 class Searcher:
     """
     Object for managing aframe search state, building aframe events,
@@ -132,9 +174,10 @@ class Searcher:
         # calculate the detection statistic threshold
         # corresponding to the requested FAR threshold
         self.threshold = background.threshold_at_far(far_threshold)
-        # Speed up FAR calculation by excluding below-threshold events
+        # Speed up FAR calculation by excluding below-threshold events,
+        # and keep only what's needed to look up FARs
         mask = background.detection_statistic >= self.threshold
-        self.background = background[mask]
+        self.far_table = FarTable.from_background(background[mask])
 
     def check_refractory(self, timestamp, value):
         time_since_last = timestamp - self.last_detection_time
@@ -154,8 +197,7 @@ class Searcher:
             return None
 
         logging.debug("Computing FAR")
-        far = self.background.far(value)
-        far /= SECONDS_PER_YEAR
+        far = self.far_table.far(value)
         logging.debug("FAR computed")
 
         logging.info(
@@ -1,18 +1,20 @@
 import torch
 
-from utils.preprocessing import BackgroundSnapshotter
+from utils.preprocessing import RollingSnapshotter
 
 
-class OnlineSnapshotter(BackgroundSnapshotter):
+class OnlineSnapshotter(RollingSnapshotter):
     """
-    Light subclass of BackgroundSnapshotter that
+    Light subclass of RollingSnapshotter that
     registers the initial state as a buffer, and
     keeps track of contiguous update size to determine
     if there is enough data to calculate a PSD
     """
 
     def __init__(self, *args, num_channels: int, update_size: int, **kwargs):
-        super().__init__(*args, **kwargs)
+        super().__init__(
+            *args, update_size=update_size, num_channels=num_channels, **kwargs
+        )
         self.update_size = update_size
         self.num_channels = num_channels
         self.contiguous_update_size = 0
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from gwpy.timeseries import TimeSeries, TimeSeriesDict
+
+from online.dataloading.utils import GWF_SAMPLE_RATE
+
+
+@pytest.fixture
+def write_frame():
+    """
+    Write a one second frame to `directory` containing
+    random strain data for `channel`, and optionally a
+    state vector, named the way the pipeline expects
+    """
+
+    def write(directory, t0, channel, state_channel=None, state=3):
+        ifo = channel.split(":")[0]
+        data = {
+            channel: TimeSeries(
+                np.random.randn(GWF_SAMPLE_RATE),
+                t0=t0,
+                sample_rate=GWF_SAMPLE_RATE,
+                channel=channel,
+                name=channel,
+            )
+        }
+        if state_channel is not None:
+            data[state_channel] = TimeSeries(
+                np.full(16, state, dtype=np.int32),
+                t0=t0,
+                sample_rate=16,
+                channel=state_channel,
+                name=state_channel,
+            )
+
+        fname = directory / f"{ifo[0]}-{ifo}_llhoft-{t0}-1.gwf"
+        TimeSeriesDict(data).write(fname)
+        return fname
+
+    return write
@@ -0,0 +1,28 @@
+import numpy as np
+import torch
+
+from online.utils.buffer import OutputBuffer
+
+
+def test_output_buffer_update_keeps_dtype():
+    buffer = OutputBuffer(
+        online_inference_rate=128,
+        offline_inference_rate=4,
+        integration_window_length=1,
+        buffer_length=60,
+        device="cpu",
+    )
+    update = torch.rand(128)
+    significance, timing = buffer.update(update, 100.0)
+    assert significance.dtype == np.float32
+    assert timing.dtype == np.float32
+    assert buffer.integrated_buffer.dtype == torch.float32
+
+    # the update is integrated along with the zeros the buffer
+    # starts with, each output averaging over a window that ends
+    # at one of the update's samples
+    size = buffer.timing_integrator_size
+    y = np.concatenate([np.zeros(size), update.numpy()])
+    window = np.ones(size) / size
+    expected = np.convolve(y, window, mode="valid")[1:]
+    assert np.allclose(timing, expected, rtol=1e-6)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+from gwpy.timeseries import TimeSeriesDict
+
+import online.dataloading.online as online_module
+from online.dataloading.online import (
+    FrameReader,
+    data_iterator,
+    read_channel,
+    read_channels,
+)
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record the channels requested by each frame read"""
+    reads = []
+
+    class Recorder:
+        @staticmethod
+        def read(fname, channels, **kwargs):
+            reads.append(list(channels))
+            return TimeSeriesDict.read(fname, channels=channels, **kwargs)
+
+    monkeypatch.setattr(online_module, "TimeSeriesDict", Recorder)
+    return reads
+
+
+@pytest.fixture
+def get_channel_type(monkeypatch):
+    """Record the channels whose data types are looked up"""
+    lookups = []
+    get_channel_type = online_module.get_channel_type
+
+    def recorder(channel, fname):
+        lookups.append(channel)
+        return get_channel_type(channel, fname)
+
+    monkeypatch.setattr(online_module, "get_channel_type", recorder)
+    return lookups
+
+
+def test_read_channels(tmp_path, write_frame, reads):
+    fname = write_frame(tmp_path, 1234567890, "H1:STRAIN", "H1:STATE", 7)
+    expected = TimeSeriesDict.read(fname, ["H1:STRAIN", "H1:STATE"])
+
+    data = read_channels(fname, ["H1:STRAIN", "H1:STATE"])
+    assert reads == [["H1:STRAIN", "H1:STATE"]]
+    for channel in ["H1:STRAIN", "H1:STATE"]:
+        np.testing.assert_array_equal(
+            data[channel].value, expected[channel].value
+        )
+    assert (data["H1:STATE"].value == 7).all()
+
+    x = read_channel(fname, "H1:STRAIN")
+    np.testing.assert_array_equal(x.value, expected["H1:STRAIN"].value)
+
+
+def test_read_channels_retries(tmp_path, write_frame, monkeypatch):
+    fname = write_frame(tmp_path, 1234567890, "H1:STRAIN")
+    monkeypatch.setattr(online_module.time, "sleep", lambda _: None)
+
+    calls = []
+
+    class Flaky:
+        @staticmethod
+        def read(fname, channels, **kwargs):
+            calls.append(fname)
+            if len(calls) == 1:
+                raise RuntimeError("Failed to read the core of the file")
+            return TimeSeriesDict.read(fname, channels=channels, **kwargs)
+
+    monkeypatch.setattr(online_module, "TimeSeriesDict", Flaky)
+    data = read_channels(fname, ["H1:STRAIN"])
+    assert len(calls) == 2
+    assert len(data["H1:STRAIN"]) == 16384
+
+    # truncated data should be reread, and
+    # raise once the retries are exhausted
+    class Truncated:
+        @staticmethod
+        def read(fname, channels, **kwargs):
+            data = TimeSeriesDict.read(fname, channels=channels, **kwargs)
+            return TimeSeriesDict({k: v[:-1] for k, v in data.items()})
+
+    monkeypatch.setattr(online_module, "TimeSeriesDict", Truncated)
+    with pytest.raises(ValueError, match="Failed to read channels"):
+        read_channels(fname, ["H1:STRAIN"], num_retries=2)
+
+
+def test_frame_reader(tmp_path, write_frame, reads, get_channel_type):
+    directories = {}
+    for ifo in ["H1", "L1"]:
+        directories[ifo] = tmp_path / ifo
+        directories[ifo].mkdir()
+
+    reader = FrameReader()
+    for t0 in [1234567890, 1234567891]:
+        requests, expected = [], []
+        for ifo, directory in directories.items():
+            channels = [f"{ifo}:STRAIN", f"{ifo}:STATE"]
+            fname = write_frame(directory, t0, *channels)
+            requests.append((fname, channels))
+            expected.append(TimeSeriesDict.read(fname, channels))
+
+        data = reader.read(requests)
+        for x, y in zip(data, expected):
+            assert list(x) == list(y)
+            for channel in x:
+                np.testing.assert_array_equal(
+                    x[channel].value, y[channel].value
+                )
+
+    # each frame should be read in a single pass, and the
+    # channel types only looked up for the first frames
+    assert len(reads) == 4
+    assert sorted(get_channel_type) == [
+        "H1:STATE",
+        "H1:STRAIN",
+        "L1:STATE",
+        "L1:STRAIN",
+    ]
+    assert reader.types["H-H1_llhoft"] == {
+        "H1:STRAIN": "proc",
+        "H1:STATE": "proc",
+    }
+
+    assert reader.ex is not None
+    reader.close()
+    assert reader.ex is None
+
+
+def test_frame_reader_corrupted_types(tmp_path, write_frame):
+    # types can't be looked up in a corrupted frame,
+    # so they shouldn't be cached for the next one
+    fname = tmp_path / "H-H1_llhoft-1234567890-1.gwf"
+    fname.write_bytes(b"not a frame")
+
+    reader = FrameReader()
+    assert reader.get_types(fname, ["H1:STRAIN"]) is None
+    assert reader.types["H-H1_llhoft"] == {}
+
+    fname = write_frame(tmp_path, 1234567891, "H1:STRAIN")
+    assert reader.get_types(fname, ["H1:STRAIN"]) == {"H1:STRAIN": "proc"}
+
+
+def test_data_iterator_closes_reader(tmp_path, write_frame, monkeypatch):
+    readers = []
+
+    class RecordingReader(FrameReader):
+        def close(self):
+            super().close()
+            readers.append(self)
+
+    monkeypatch.setattr(online_module, "FrameReader", RecordingReader)
+
+    directory = tmp_path / "H1"
+    directory.mkdir()
+    write_frame(directory, 1234567890, "H1:STRAIN")
+
+    it = data_iterator(tmp_path, ["H1:STRAIN"], ["H1"], 2048, timeout=0)
+    next(it)
+    assert not readers
+    it.close()
+    assert len(readers) == 1
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from queue import Queue
+
+import numpy as np
+import pytest
+
+from online.monitor.utils.parse_logs import read_latencies
+from online.subprocesses.latency import latency_subprocess
+from online.utils.latency import RECORD_DTYPE, STAGES, LatencyTracer, gps_now
+
+
+def test_latency_tracer():
+    queue = Queue()
+    tracer = LatencyTracer(queue)
+    assert tracer.now() == pytest.approx(gps_now(), abs=0.1)
+
+    tracer.frame(1234567891, "read", 1234567891.5)
+    tracer.event(1234567890.25, "submit")
+    assert queue.get() == (0, STAGES.index("read"), 1234567891, 1234567891.5)
+    kind, stage, key, t = queue.get()
+    assert (kind, stage, key) == (1, STAGES.index("submit"), 1234567890.25)
+    assert t == pytest.approx(tracer.now(), abs=0.1)
+
+    # tracers without a queue shouldn't record anything
+    LatencyTracer().frame(1234567891, "read")
+
+
+def run_subprocess(queue, fname):
+    errors = Queue()
+    latency_subprocess(errors, logging.INFO, "latency", None, queue, fname)
+    assert errors.empty()
+
+
+def test_latency_round_trip(tmp_path):
+    fname = tmp_path / "latency" / "trace.bin"
+    queue = Queue()
+    tracer = LatencyTracer(queue)
+
+    latencies = {"write": 0.5, "read": 0.75, "resample": 1.5, "search": 2.0}
+    for key in [1234567891, 1234567892]:
+        for stage, latency in latencies.items():
+            tracer.frame(key, stage, key + latency)
+    tracer.event(1234567890.5, "search", 1234567892.5)
+    tracer.event(1234567890.5, "submit", 1234567893)
+    queue.put(None)
+    run_subprocess(queue, fname)
+    assert fname.stat().st_size == 10 * RECORD_DTYPE.itemsize
+
+    # simulate a record that was only partially
+    # written when the file was read
+    partial = np.array([(0, 1, 1234567893, 1234567894)], dtype=RECORD_DTYPE)
+    with open(fname, "ab") as f:
+        f.write(partial.tobytes()[:-5])
+
+    df = read_latencies(fname)
+    assert list(df.columns) == [
+        "write",
+        "read",
+        "resample",
+        "search",
+        "submit",
+    ]
+    assert len(df) == 3
+    for key in [1234567891, 1234567892]:
+        row = df.loc[("frame", key)]
+        for stage, latency in latencies.items():
+            assert row[stage] == latency
+        assert np.isnan(row["submit"])
+
+    row = df.loc[("event", 1234567890.5)]
+    assert row["search"] == 2
+    assert row["submit"] == 2.5
+    assert row[["write", "read", "resample"]].isna().all()
+
+    # later runs should append to the same file,
+    # replacing the partially written record
+    tracer.frame(1234567893, "write", 1234567893.25)
+    queue.put(None)
+    run_subprocess(queue, fname)
+    assert fname.stat().st_size == 11 * RECORD_DTYPE.itemsize
+    df = read_latencies(fname)
+    assert len(df) == 4
+    assert df.loc[("frame", 1234567893), "write"] == 0.25
+
+
+def test_latency_subprocess_flushes(tmp_path, caplog):
+    fname = tmp_path / "trace.bin"
+    queue = Queue()
+    tracer = LatencyTracer(queue)
+    for key in range(1234567891, 1234567896):
+        tracer.frame(key, "search", key + 1)
+
+    # records should be written to disk as they arrive, and
+    # summarized, rather than only once the subprocess exits
+    errors = Queue()
+    args = (errors, logging.INFO, "latency", None, queue, fname)
+    with caplog.at_level(logging.INFO, logger="latency-subprocess"):
+        thread = threading.Thread(
+            target=latency_subprocess,
+            args=args,
+            kwargs={"flush_interval": 0.01, "summary_interval": 0},
+        )
+        thread.start()
+        tick = time.time()
+        size = 5 * RECORD_DTYPE.itemsize
+        while not fname.exists() or fname.stat().st_size < size:
+            assert time.time() - tick < 5
+            time.sleep(0.01)
+        queue.put(None)
+        thread.join()
+
+    assert errors.empty()
+    assert "median 1.000s" in caplog.text
+    assert len(read_latencies(fname)) == 5
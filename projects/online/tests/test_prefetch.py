@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+
+import pytest
+import torch
+
+from online.dataloading.utils import PrefetchIterator
+
+
+def frames(num_frames, started=None):
+    for i in range(num_frames):
+        if started is not None:
+            started.append(i)
+        yield torch.full((2, 4), float(i)), i, [True, True]
+
+
+def test_prefetch_iterator():
+    it = PrefetchIterator(frames(10), maxsize=2)
+    outputs = list(it)
+    assert len(outputs) == 10
+    for i, (X, t0, ready) in enumerate(outputs):
+        assert t0 == i
+        assert (X == i).all()
+        assert ready == [True, True]
+
+    # exhausted iterators should keep raising StopIteration
+    with pytest.raises(StopIteration):
+        next(it)
+    it.close()
+
+
+def test_prefetch_iterator_is_bounded():
+    started = []
+    it = PrefetchIterator(frames(10, started), maxsize=2)
+    X, t0, _ = next(it)
+    assert t0 == 0
+
+    # the producer can read at most `maxsize` frames ahead,
+    # plus the one it's blocked trying to put on the queue
+    time.sleep(0.5)
+    assert len(started) == 4
+
+    it.close()
+    assert not it.thread.is_alive()
+
+
+def test_prefetch_iterator_raises():
+    def failing():
+        yield from frames(2)
+        raise ValueError("bad frame")
+
+    it = PrefetchIterator(failing())
+    assert next(it)[1] == 0
+    assert next(it)[1] == 1
+    with pytest.raises(ValueError, match="bad frame"):
+        next(it)
+    it.close()
+
+
+def test_prefetch_iterator_passes_none():
+    def with_gap():
+        yield None, 0, [False, False]
+        yield from frames(1)
+
+    it = PrefetchIterator(with_gap(), pin_memory=False)
+    X, t0, ready = next(it)
+    assert X is None
+    assert ready == [False, False]
+    assert next(it)[1] == 0
+    it.close()
+
+
+def test_prefetch_iterator_close_unblocks_producer():
+    # closing while the producer is blocked
+    # on a full queue should stop it promptly
+    it = PrefetchIterator(frames(100), maxsize=1)
+    next(it)
+    closer = threading.Thread(target=it.close)
+    closer.start()
+    closer.join(timeout=5)
+    assert not closer.is_alive()
+    assert not it.thread.is_alive()
+
+
+def test_prefetch_iterator_close_closes_iterator():
+    # resources held by the wrapped iterator, e.g. the
+    # frame watcher, should be released on close
+    closed = threading.Event()
+
+    def wrapped():
+        try:
+            yield from frames(100)
+        finally:
+            closed.set()
+
+    it = PrefetchIterator(wrapped(), maxsize=1)
+    next(it)
+    it.close()
+    assert closed.is_set()
+
+
+def test_prefetch_iterator_close_times_out(caplog):
+    # closing while the producer is blocked waiting
+    # on the iterator shouldn't wait for the iterator
+    release, closed = threading.Event(), threading.Event()
+
+    def blocked():
+        try:
+            yield from frames(1)
+            release.wait()
+            yield from frames(1)
+        finally:
+            closed.set()
+
+    it = PrefetchIterator(blocked(), maxsize=1)
+    next(it)
+    tick = time.perf_counter()
+    with caplog.at_level(logging.WARNING):
+        it.close(timeout=0.05)
+    assert time.perf_counter() - tick < 1
+    assert "didn't exit" in caplog.text
+    assert it.thread.is_alive()
+    assert not closed.is_set()
+
+    # once the iterator produces, the producer should
+    # exit and release the iterator's resources
+    release.set()
+    it.thread.join(timeout=5)
+    assert not it.thread.is_alive()
+    assert closed.is_set()
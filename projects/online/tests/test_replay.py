@@ -0,0 +1,145 @@
+import logging
+from queue import Queue
+
+import numpy as np
+import pytest
+import torch
+
+from online.dataloading.offline import (
+    STATE_VECTOR_SAMPLE_RATE,
+    get_ready,
+    offline_data_iterator,
+    replay_chunks,
+)
+from online.dataloading.utils import (
+    GWF_SAMPLE_RATE,
+    StreamingResampler,
+    build_resample_filter,
+)
+
+SAMPLE_RATE = 2048
+T0 = 1234567890
+
+
+def test_get_ready():
+    state = np.full((2, 4 * STATE_VECTOR_SAMPLE_RATE), 3)
+    # a single sample without either of the
+    # first two bits should mark the whole second
+    state[0, STATE_VECTOR_SAMPLE_RATE + 3] = 1
+    state[1, 2 * STATE_VECTOR_SAMPLE_RATE :] = 2
+    # other bits shouldn't matter
+    state[0, -1] = 7
+
+    ready = get_ready(state)
+    assert ready.dtype == bool
+    expected = [[True, False, True, True], [True, True, False, False]]
+    np.testing.assert_array_equal(ready, expected)
+
+
+def make_chunks(num_chunks, chunk_length):
+    rng = np.random.default_rng(0)
+    chunks = []
+    for i in range(num_chunks):
+        strain = rng.standard_normal((2, chunk_length * GWF_SAMPLE_RATE))
+        state = rng.choice(
+            [1, 3],
+            (2, chunk_length * STATE_VECTOR_SAMPLE_RATE),
+            p=[0.05, 0.95],
+        )
+        chunks.append((strain, state, T0 + i * chunk_length))
+    return chunks
+
+
+def one_second_stream(chunks, resampler):
+    """
+    Reproduce the default, one second at a time, path
+    of the offline iterator over the chunks of data
+    """
+    last_ready = [True, True]
+    for strain, state, t0 in chunks:
+        ready = get_ready(state)
+        for i in range(ready.shape[-1]):
+            slc = slice(i * GWF_SAMPLE_RATE, (i + 1) * GWF_SAMPLE_RATE)
+            x = resampler.update(strain[:, slc])
+            if x is not None:
+                yield torch.Tensor(x).double(), t0 + i - 1, last_ready
+            last_ready = ready[:, i].tolist()
+
+
+@pytest.mark.parametrize("chunk_length", [1, 2, 5])
+@pytest.mark.parametrize("use_state", [True, False])
+def test_replay_chunks(chunk_length, use_state):
+    b, a = build_resample_filter(GWF_SAMPLE_RATE // SAMPLE_RATE)
+    chunks = make_chunks(3, chunk_length)
+
+    queue = Queue()
+    for chunk in chunks:
+        queue.put(chunk)
+    queue.put(None)
+
+    resampler = StreamingResampler(8, b, a, GWF_SAMPLE_RATE)
+    outputs = list(
+        replay_chunks(queue, resampler, ["H1", "L1"], SAMPLE_RATE, use_state)
+    )
+
+    resampler.reset()
+    if not use_state:
+        chunks = [(x, np.full_like(s, 3), t) for x, s, t in chunks]
+    expected = list(one_second_stream(chunks, resampler))
+
+    # the first and last seconds are only used as filter state
+    assert len(outputs) == len(expected) == 3 * chunk_length - 2
+    for (X, t0, ready), (x, t, last_ready) in zip(outputs, expected):
+        assert X.shape == (2, SAMPLE_RATE)
+        torch.testing.assert_close(X, x, rtol=0, atol=1e-12)
+        assert t0 == t
+        assert ready == last_ready
+
+
+@pytest.fixture
+def datadir(tmp_path, write_frame):
+    rng = np.random.default_rng(0)
+    for ifo in ["H1", "L1"]:
+        directory = tmp_path / f"{ifo}_llhoft"
+        directory.mkdir()
+        for i in range(8):
+            state = rng.choice([1, 3], p=[0.2, 0.8])
+            write_frame(
+                directory, T0 + i, f"{ifo}:STRAIN", f"{ifo}:STATE", state
+            )
+    return tmp_path
+
+
+def replay(datadir, **kwargs):
+    return list(
+        offline_data_iterator(
+            datadir,
+            ["H1:STRAIN", "L1:STRAIN"],
+            ["H1", "L1"],
+            SAMPLE_RATE,
+            ifo_suffix="llhoft",
+            state_channels={"H1": "H1:STATE", "L1": "L1:STATE"},
+            chunk_length=4,
+            **kwargs,
+        )
+    )
+
+
+def test_fast_replay(datadir, caplog):
+    expected = replay(datadir, resample_mode="streaming")
+    with caplog.at_level(logging.WARNING):
+        outputs = replay(datadir, resample_mode="streaming", fast_replay=True)
+    assert not caplog.records
+
+    assert len(outputs) == len(expected) == 6
+    for (X, t0, ready), (x, t, last_ready) in zip(outputs, expected):
+        torch.testing.assert_close(X, x, rtol=0, atol=1e-12)
+        assert t0 == t
+        assert ready == [bool(r) for r in last_ready]
+
+    # asking for another resampler should
+    # warn that it's being overridden
+    with caplog.at_level(logging.WARNING):
+        outputs = replay(datadir, resample_mode="filtfilt", fast_replay=True)
+    assert "ignoring resample_mode filtfilt" in caplog.text
+    assert len(outputs) == 6
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from online.dataloading.utils import (
+    FiltfiltResampler,
+    StreamingResampler,
+    build_resample_filter,
+)
+
+
+@pytest.fixture(params=[2, 8])
+def factor(request):
+    return request.param
+
+
+@pytest.fixture
+def frame_size():
+    return 1024
+
+
+@pytest.fixture
+def frames(frame_size):
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((8, 2, frame_size))
+
+
+def test_streaming_resampler_matches_filtfilt(factor, frame_size, frames):
+    b, a = build_resample_filter(factor)
+    filtfilt = FiltfiltResampler(factor, b, a, frame_size)
+    streaming = StreamingResampler(factor, b, a, frame_size)
+
+    for i, frame in enumerate(frames):
+        expected = filtfilt.update(frame)
+        x = streaming.update(frame)
+
+        # both wait for a frame on either side of
+        # the one they return, discarding the first
+        if i < 2:
+            assert expected is None
+            assert x is None
+            continue
+        assert x.shape == (2, frame_size // factor)
+        assert np.allclose(x, expected, rtol=0, atol=1e-12)
+
+    # resetting should restart the warmup
+    filtfilt.reset()
+    streaming.reset()
+    assert streaming.update(frames[0]) is None
+    assert streaming.update(frames[1]) is None
+    x = streaming.update(frames[2])
+    filtfilt.update(frames[0])
+    filtfilt.update(frames[1])
+    assert np.allclose(x, filtfilt.update(frames[2]), rtol=0, atol=1e-12)
+
+
+def test_streaming_resampler_validation():
+    b, a = build_resample_filter(8)
+    with pytest.raises(ValueError):
+        StreamingResampler(8, b, [1, 0.5], 1024)
+    with pytest.raises(ValueError):
+        StreamingResampler(8, b, a, 1020)
+    with pytest.raises(ValueError):
+        StreamingResampler(8, b, a, 32)
+
+
+@pytest.mark.parametrize("splits", [[1, 3, 1, 2, 1], [2, 3, 1, 2], [4, 4]])
+def test_streaming_resampler_multiple_frames(
+    factor, frame_size, frames, splits
+):
+    b, a = build_resample_filter(factor)
+    streaming = StreamingResampler(factor, b, a, frame_size)
+    expected = []
+    for frame in frames:
+        x = streaming.update(frame)
+        if x is not None:
+            expected.append(x)
+    expected = np.concatenate(expected, axis=1)
+
+    # passing several frames to an update should return the
+    # data for all of the frames of the previous update, with
+    # the first frame of the stream only used as filter state
+    streaming.reset()
+    outputs, start = [], 0
+    for i, num_frames in enumerate(splits):
+        frame = np.concatenate(frames[start : start + num_frames], axis=1)
+        start += num_frames
+        x = streaming.update(frame)
+        num_returned = splits[i - 1] - (i == 1) if i else 0
+        if not num_returned:
+            assert x is None
+            continue
+        assert x.shape == (2, num_returned * frame_size // factor)
+        outputs.append(x)
+
+    outputs = np.concatenate(outputs, axis=1)
+    num_samples = (len(frames) - splits[-1] - 1) * frame_size // factor
+    assert outputs.shape[-1] == num_samples
+    assert np.allclose(outputs, expected[:, :num_samples], rtol=0, atol=1e-12)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from ledger.events import SECONDS_IN_YEAR, EventSet
+from online.utils.searcher import FarTable
+
+
+@pytest.fixture(params=[np.float32, np.float64])
+def background(request):
+    rng = np.random.default_rng(0)
+    num_events = 1000
+    stats = rng.standard_normal(num_events).astype(request.param)
+    # include some ties, which should all count as >= their value
+    stats[:10] = stats[10]
+    times = rng.uniform(0, 1e5, num_events)
+    shifts = np.zeros((num_events, 2))
+    return EventSet(stats, times, shifts, 1e5)
+
+
+def test_far_table(background):
+    table = FarTable.from_background(background)
+    assert table.stats.dtype == background.detection_statistic.dtype
+    assert not table.stats.flags.writeable
+    assert table.Tb == background.Tb
+
+    # look up FARs at the background statistics themselves,
+    # the nearest float64 values on either side of them, which
+    # round onto them in float32, and values beyond the extremes
+    stats = background.sorted_detection_statistic.astype(np.float64)
+    values = np.concatenate(
+        [
+            stats,
+            np.nextafter(stats, -np.inf),
+            np.nextafter(stats, np.inf),
+            stats - 1e-12,
+            stats + 1e-12,
+            [stats.min() - 1, stats.max() + 1],
+        ]
+    )
+    for value in values:
+        value = float(value)
+        expected = background.far(value) / SECONDS_IN_YEAR
+        assert table.far(value) == pytest.approx(expected, rel=1e-12)
+
+    # statistics above the loudest background event should
+    # get the minimum FAR that the livetime can resolve
+    assert table.far(stats.max() + 1) == 1 / background.Tb
+    assert table.far(stats.min() - 1) == len(stats) / background.Tb
@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+import online.dataloading.online as online_module
+import online.dataloading.watcher as watcher_module
+from online.dataloading.online import data_iterator
+from online.dataloading.watcher import FrameWatcher
+
+
+def fname(t0):
+    return f"H-H1_llhoft-{t0}-1.gwf"
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = tmp_path / "H1"
+    directory.mkdir()
+    (directory / fname(1234567890)).touch()
+    return directory
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def watcher(request, directory, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(watcher_module, "_init_inotify", lambda: None)
+    elif watcher_module._init_inotify() is None:
+        pytest.skip("inotify not available")
+
+    watcher = FrameWatcher({"H1": directory})
+    assert watcher.inotify == request.param
+    yield watcher
+    watcher.close()
+
+
+def test_frame_watcher_index(watcher, directory):
+    assert watcher.latest("H1") == 1234567890
+
+    # files that aren't frames shouldn't be indexed
+    (directory / "H-H1_llhoft-1234567891-1.hdf5").touch()
+    (directory / "notes.txt").touch()
+    assert watcher.latest("H1") == 1234567890
+
+    (directory / fname(1234567891)).touch()
+    assert watcher.latest("H1") == 1234567891
+
+    (directory / fname(1234567891)).unlink()
+    assert watcher.latest("H1") == 1234567890
+
+    (directory / fname(1234567890)).unlink()
+    assert watcher.latest("H1") is None
+
+
+def test_frame_watcher_moved_frames(watcher, directory, tmp_path):
+    # frames are often written elsewhere and
+    # moved into the directory once complete
+    tmp = tmp_path / fname(1234567891)
+    tmp.touch()
+    tmp.rename(directory / tmp.name)
+    assert watcher.wait("H1", tmp.name, timeout=1)
+    assert watcher.latest("H1") == 1234567891
+
+
+def test_frame_watcher_wait(watcher, directory):
+    assert watcher.wait("H1", fname(1234567890), timeout=0)
+    assert not watcher.wait("H1", fname(1234567891), timeout=0.05)
+
+    writer = threading.Timer(0.1, (directory / fname(1234567891)).touch)
+    writer.start()
+    assert watcher.wait("H1", fname(1234567891), timeout=5)
+    writer.join()
+
+
+def test_frame_watcher_backoff(directory, monkeypatch):
+    monkeypatch.setattr(watcher_module, "_init_inotify", lambda: None)
+
+    class Clock:
+        def __init__(self):
+            self.now = 0
+            self.sleeps = []
+
+        def time(self):
+            return self.now
+
+        def sleep(self, interval):
+            self.sleeps.append(interval)
+            self.now += interval
+
+    clock = Clock()
+    monkeypatch.setattr(watcher_module, "time", clock)
+
+    watcher = FrameWatcher(
+        {"H1": directory}, min_interval=0.01, max_interval=0.04
+    )
+    assert not watcher.wait("H1", fname(1234567891), timeout=0.1)
+
+    # the interval should double up to `max_interval`, and the
+    # last check should be made right as the timeout expires
+    assert clock.sleeps == pytest.approx([0.01, 0.02, 0.04, 0.03])
+
+
+class RecordingWatcher(FrameWatcher):
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        self.instances.append(self)
+
+    def close(self):
+        super().close()
+        self.closed = True
+
+
+@pytest.fixture
+def recording_watcher(monkeypatch):
+    RecordingWatcher.instances = []
+    monkeypatch.setattr(online_module, "FrameWatcher", RecordingWatcher)
+    return RecordingWatcher
+
+
+def test_data_iterator_closes_watcher(
+    tmp_path, write_frame, recording_watcher
+):
+    directory = tmp_path / "H1"
+    directory.mkdir()
+    write_frame(directory, 1234567890, "H1:STRAIN")
+
+    # the watcher should be closed when the iterator fails
+    it = data_iterator(directory.parent, ["H1:STRAIN"], ["H1"], 3000)
+    with pytest.raises(ValueError):
+        next(it)
+    (watcher,) = recording_watcher.instances
+    assert watcher.closed
+
+    # as well as when the consumer closes it, here
+    # while it's waiting on the frame after the first
+    it = data_iterator(
+        directory.parent, ["H1:STRAIN"], ["H1"], 2048, timeout=0
+    )
+    X, _, ready = next(it)
+    assert X is None
+    assert ready == [False]
+    it.close()
+    assert recording_watcher.instances[-1].closed
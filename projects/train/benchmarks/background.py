@@ -0,0 +1,140 @@
+"""
+Benchmark sampling batches of training background kernels with
+`Hdf5TimeSeriesDataset`, read by `DataLoader` workers and moved
+to the device, against sampling them on the device from the pool
+of segments kept by `DeviceTimeSeriesDataset`, with and without
+refreshing some of the segments each epoch.
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import jsonargparse
+import numpy as np
+import torch
+from ml4gw.dataloading import Hdf5TimeSeriesDataset
+
+from train.data.background import DeviceTimeSeriesDataset
+from utils.logging import configure_logging
+
+IFOS = ["H1", "L1"]
+
+
+def write_background(datadir, num_files, file_length, sample_rate):
+    fnames = []
+    size = int(file_length * sample_rate)
+    for i in range(num_files):
+        fname = datadir / f"background-{i}.hdf5"
+        with h5py.File(fname, "w") as f:
+            for ifo in IFOS:
+                f.create_dataset(
+                    ifo,
+                    data=np.random.randn(size).astype(np.float32),
+                    chunks=(sample_rate,),
+                )
+        fnames.append(fname)
+    return fnames
+
+
+def time_epochs(loader, device, num_epochs):
+    """
+    Return the mean time per batch of iterating through
+    `loader` for `num_epochs`, after a first warmup epoch
+    """
+    elapsed, num_batches = 0, 0
+    for epoch in range(num_epochs + 1):
+        tick = time.perf_counter()
+        for [X] in loader:
+            X = X.to(device)
+            num_batches += epoch > 0
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        if epoch > 0:
+            elapsed += time.perf_counter() - tick
+    return elapsed / num_batches * 1e3
+
+
+def main(
+    num_files: int = 4,
+    file_length: float = 4096,
+    sample_rate: float = 2048,
+    kernel_length: float = 10,
+    batch_size: int = 384,
+    batches_per_epoch: int = 50,
+    num_epochs: int = 3,
+    num_workers: int = 4,
+    segment_length: float = 1024,
+):
+    """
+    Args:
+        num_files:
+            Number of background files to sample from
+        file_length:
+            Length of each background file in seconds
+        sample_rate:
+            Sample rate of the background in Hz
+        kernel_length:
+            Length of each sampled kernel in seconds, including
+            the data used to whiten and estimate its PSD
+        batch_size:
+            Number of kernels in each batch
+        batches_per_epoch:
+            Number of batches to sample each epoch
+        num_epochs:
+            Number of epochs to time, after a warmup epoch
+        num_workers:
+            Number of `DataLoader` workers to read kernels with
+        segment_length:
+            Length in seconds of the segments kept on the device
+    """
+    configure_logging()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fnames = write_background(
+            Path(tmpdir), num_files, file_length, sample_rate
+        )
+        kwargs = {
+            "channels": IFOS,
+            "kernel_size": int(kernel_length * sample_rate),
+            "batch_size": batch_size,
+            "batches_per_epoch": batches_per_epoch,
+        }
+
+        dataset = Hdf5TimeSeriesDataset(fnames, coincident=False, **kwargs)
+        loader = torch.utils.data.DataLoader(
+            dataset,
+            num_workers=num_workers,
+            pin_memory=device.type == "cuda",
+        )
+        workers = time_epochs(loader, device, num_epochs)
+
+        segment_size = int(segment_length * sample_rate)
+        num_segments = num_files * int(file_length // segment_length)
+        pool = DeviceTimeSeriesDataset(
+            fnames, device=device, segment_size=segment_size, **kwargs
+        )
+        resident = time_epochs(pool, device, num_epochs)
+
+        # keep half the segments on the device, refreshing a quarter
+        pool = DeviceTimeSeriesDataset(
+            fnames,
+            device=device,
+            segment_size=segment_size,
+            num_segments=num_segments // 2,
+            num_refresh=num_segments // 4,
+            **kwargs,
+        )
+        refreshed = time_epochs(pool, device, num_epochs)
+
+    logging.info(
+        f"Per batch on {device}: {workers:0.2f}ms with {num_workers} "
+        f"workers, {resident:0.2f}ms from the device pool, "
+        f"{refreshed:0.2f}ms refreshing segments each epoch"
+    )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
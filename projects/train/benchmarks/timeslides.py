@@ -0,0 +1,108 @@
+"""
+Benchmark producing the background kernels of validation
+timeslides on the device. Compares iterating through each
+`TimeSlide` in turn, as done by a sequential `CombinedLoader`,
+transferring each batch of background to the device and
+unfolding it there, against gathering fused batches of kernels
+spanning every timeslide with `FusedTimeSlides`. For each,
+reports the number of batches and the time per validation pass.
+"""
+
+import itertools
+import logging
+import time
+
+import jsonargparse
+import torch
+from ml4gw.utils.slicing import unfold_windows
+
+from train.metrics import FusedTimeSlides, get_timeslides
+from utils.logging import configure_logging
+
+
+def time_passes(batches, device, num_passes):
+    """
+    Return the number of batches produced by `batches` and the
+    mean time of iterating through them, after a warmup pass
+    """
+    elapsed = 0
+    for i in range(num_passes + 1):
+        tick = time.perf_counter()
+        num_batches = 0
+        for _ in batches():
+            num_batches += 1
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        if i > 0:
+            elapsed += time.perf_counter() - tick
+    return num_batches, elapsed / num_passes
+
+
+def main(
+    num_segments: int = 8,
+    segment_length: float = 3600,
+    num_channels: int = 2,
+    sample_rate: float = 2048,
+    sample_length: float = 10,
+    stride: float = 0.5,
+    livetime: float = 3600 * 12,
+    batch_size: int = 384,
+    fused_batch_size: int = 2048,
+    num_passes: int = 2,
+):
+    """
+    Args:
+        num_segments:
+            Number of segments of validation background
+        segment_length:
+            Length of each segment in seconds
+        num_channels:
+            Number of channels in each segment
+        sample_rate:
+            Sample rate of the background in Hz
+        sample_length:
+            Length of each kernel in seconds, including the
+            data used to whiten and estimate its PSD
+        stride:
+            Stride in seconds between kernels
+        livetime:
+            Livetime in seconds of the timeslides
+        batch_size:
+            Number of kernels in each batch of each timeslide
+        fused_batch_size:
+            Number of kernels in each fused batch
+        num_passes:
+            Number of validation passes to time, after a warmup
+    """
+    configure_logging()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    size = int(segment_length * sample_rate)
+    background = [torch.randn(num_channels, size) for _ in range(num_segments)]
+    kernel_size = int(sample_length * sample_rate)
+    stride_size = int(stride * sample_rate)
+
+    timeslides, _ = get_timeslides(
+        background, livetime, sample_rate, sample_length, stride, batch_size
+    )
+
+    def sequential():
+        for X in itertools.chain(*timeslides):
+            X = X.to(device)
+            yield unfold_windows(X, kernel_size, stride=stride_size)
+
+    fused = FusedTimeSlides(timeslides, fused_batch_size, device)
+
+    def gathered():
+        for X, _ in fused:
+            yield X
+
+    for name, batches in [("sequential", sequential), ("fused", gathered)]:
+        num_batches, elapsed = time_passes(batches, device, num_passes)
+        logging.info(
+            f"{name}: {len(timeslides)} timeslides in {num_batches} "
+            f"batches on {device}, {elapsed:0.2f}s per validation pass"
+        )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
@@ -0,0 +1,153 @@
+"""
+Benchmark loading chunks of training waveforms with
+`Hdf5WaveformLoader`. Compares reading each chunk into a
+float64 array and copying it into a tensor, as the loader
+used to, against reading rows directly into float32 tensors,
+starting anywhere or on the file's HDF5 chunk boundaries,
+both in `DataLoader` workers and with a background prefetch
+thread. For each, reports waveforms
+loaded per second and the time a consumer spending
+`step_time` seconds on each chunk sat idle waiting for them.
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import jsonargparse
+import numpy as np
+import torch
+
+from train.data.waveforms.loader import Hdf5WaveformLoader
+from utils.logging import configure_logging
+
+
+class Float64WaveformLoader(Hdf5WaveformLoader):
+    """The previous, unaligned, float64 sampling of batches"""
+
+    def sample_batch(self, batch=None):
+        tick = time.perf_counter()
+        batch = np.zeros(
+            (self.batch_size, self.num_channels, self.waveform_size)
+        )
+        for i in range(self.chunks_per_batch):
+            fname = np.random.choice(self.fnames, p=self.probs)
+            chunk_size = min(
+                self.chunk_size, self.batch_size - i * self.chunk_size
+            )
+            max_start = self.sizes[fname] - chunk_size
+            start = np.random.randint(0, max_start + 1)
+
+            batch_start = i * self.chunk_size
+            batch_end = batch_start + chunk_size
+            for j, channel in enumerate(self.channels):
+                dataset = self.mmap_datasets[fname][channel]
+                batch[batch_start:batch_end, j, :] = dataset[
+                    start : start + chunk_size
+                ]
+        batch = torch.tensor(batch)
+        self.load_time += time.perf_counter() - tick
+        return batch
+
+
+def write_waveforms(fname, num_waveforms, waveform_size, block_size):
+    with h5py.File(fname, "w") as f:
+        group = f.create_group("waveforms")
+        for channel in ["cross", "plus"]:
+            group.create_dataset(
+                channel,
+                data=np.random.randn(num_waveforms, waveform_size),
+                chunks=(block_size, waveform_size),
+            )
+
+
+def consume(chunks, num_chunks, step_time):
+    """
+    Iterate through `chunks`, spending `step_time` seconds
+    on each, and return the time spent waiting for them
+    """
+    wait = 0
+    it = iter(chunks)
+    tick = time.perf_counter()
+    for _ in range(num_chunks):
+        start = time.perf_counter()
+        next(it)
+        wait += time.perf_counter() - start
+        time.sleep(step_time)
+    return wait, time.perf_counter() - tick
+
+
+def main(
+    num_waveforms: int = 20000,
+    waveform_size: int = 8192,
+    block_size: int = 100,
+    chunk_size: int = 2000,
+    read_size: int = 500,
+    chunks_per_epoch: int = 8,
+    step_time: float = 0.1,
+    prefetch: int = 2,
+):
+    """
+    Args:
+        num_waveforms:
+            Number of waveforms in the file to load from
+        waveform_size:
+            Number of samples in each waveform
+        block_size:
+            Number of waveforms in each chunk of the file's datasets
+        chunk_size:
+            Number of waveforms in each loaded chunk
+        read_size:
+            Number of consecutive waveforms read from
+            the file at a time to build each chunk
+        chunks_per_epoch:
+            Number of chunks to load
+        step_time:
+            Time in seconds the consumer spends on each chunk
+        prefetch:
+            Number of chunks to prefetch on a background thread
+    """
+    configure_logging()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fname = Path(tmpdir) / "waveforms.hdf5"
+        write_waveforms(fname, num_waveforms, waveform_size, block_size)
+
+        kwargs = {
+            "fnames": [fname],
+            "channels": ["cross", "plus"],
+            "batch_size": chunk_size,
+            "batches_per_epoch": chunks_per_epoch,
+            "chunk_size": read_size,
+            "path": "waveforms",
+        }
+        loaders = {
+            "float64": Float64WaveformLoader(**kwargs),
+            "float32": Hdf5WaveformLoader(**kwargs),
+            "aligned": Hdf5WaveformLoader(**kwargs, align_chunks=True),
+            "prefetch": Hdf5WaveformLoader(**kwargs, prefetch=prefetch),
+        }
+        for name, loader in loaders.items():
+            # time loading alone in this process
+            tick = time.perf_counter()
+            for _ in loader:
+                continue
+            rate = chunk_size * chunks_per_epoch / loader.load_time
+            total = time.perf_counter() - tick
+
+            if name == "prefetch":
+                chunks = loader
+            else:
+                chunks = torch.utils.data.DataLoader(
+                    loader, batch_size=None, num_workers=2
+                )
+            wait, elapsed = consume(chunks, chunks_per_epoch, step_time)
+            logging.info(
+                f"{name}: {rate:0.0f} waveforms/s loaded ({total:0.2f}s "
+                f"per epoch), consumer idle {wait:0.2f}s of {elapsed:0.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    jsonargparse.CLI(main, as_positional=False)
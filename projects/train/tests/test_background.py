@@ -0,0 +1,144 @@
+import h5py
+import numpy as np
+import pytest
+import torch
+
+from train.data.background import DeviceTimeSeriesDataset
+
+CHANNELS = ["H1", "L1"]
+# offset of the values of each file and channel, so
+# that each sample identifies where it was read from
+FILE_OFFSET = 10**6
+CHANNEL_OFFSET = 10**5
+
+
+@pytest.fixture
+def fnames(tmp_path):
+    fnames = []
+    for i, size in enumerate([100, 70]):
+        fname = tmp_path / f"background-{i}.hdf5"
+        with h5py.File(fname, "w") as f:
+            for j, channel in enumerate(CHANNELS):
+                offset = i * FILE_OFFSET + j * CHANNEL_OFFSET
+                f[channel] = np.arange(size, dtype=np.float32) + offset
+        fnames.append(fname)
+    return fnames
+
+
+def make_dataset(fnames, **kwargs):
+    kwargs = {
+        "channels": CHANNELS,
+        "kernel_size": 8,
+        "batch_size": 64,
+        "batches_per_epoch": 4,
+        "device": "cpu",
+        "segment_size": 32,
+        **kwargs,
+    }
+    return DeviceTimeSeriesDataset(fnames, **kwargs)
+
+
+def decode(windows):
+    """Map each window to the file and index that it starts at"""
+    windows = windows.numpy().astype(np.int64)
+    file_idx = windows[..., 0] // FILE_OFFSET
+    channel = windows[..., 0] % FILE_OFFSET // CHANNEL_OFFSET
+    start = windows[..., 0] % CHANNEL_OFFSET
+    return file_idx, channel, start
+
+
+def check_pool(dataset, fnames):
+    """Check that each slot of the pool holds its resident segment"""
+    for slot, segment in enumerate(dataset.resident):
+        fname, start = dataset.segments[segment]
+        stop = start + dataset.segment_size
+        with h5py.File(fname, "r") as f:
+            for j, channel in enumerate(CHANNELS):
+                expected = torch.from_numpy(f[channel][start:stop])
+                assert torch.equal(dataset.pool[slot, j], expected)
+
+
+def test_device_time_series_dataset_segments(fnames):
+    dataset = make_dataset(fnames)
+
+    # the last segment of each file should end at its end
+    starts = [0, 32, 64, 68, 0, 32, 38]
+    expected = [fnames[0]] * 4 + [fnames[1]] * 3
+    assert dataset.segments == list(zip(expected, starts))
+    assert len(dataset.resident) == len(dataset.segments)
+    check_pool(dataset, fnames)
+
+    # segments can't be longer than the shortest file
+    dataset = make_dataset(fnames, segment_size=128)
+    assert dataset.segment_size == 70
+
+
+def test_device_time_series_dataset_validation(fnames):
+    with pytest.raises(ValueError, match="Kernel size"):
+        make_dataset(fnames, kernel_size=71)
+    with pytest.raises(ValueError, match="at least one segment"):
+        make_dataset(fnames, num_segments=0)
+    with pytest.raises(ValueError, match="refresh"):
+        make_dataset(fnames, num_segments=5, num_refresh=3)
+
+
+def test_device_time_series_dataset_sampling(fnames):
+    dataset = make_dataset(fnames, num_segments=3, batches_per_epoch=16)
+    batches = list(dataset)
+    assert len(batches) == len(dataset) == 16
+    windows = torch.cat([batch[0] for batch in batches])
+    assert windows.shape == (1024, 2, 8)
+
+    # each window should be a contiguous run of samples
+    # from the channel it's stacked as
+    diffs = torch.diff(windows, dim=-1)
+    assert (diffs == 1).all()
+    file_idx, channel, start = decode(windows)
+    np.testing.assert_array_equal(channel, [[0, 1]] * len(windows))
+
+    # and lie within one of the segments on the device
+    resident = [dataset.segments[i] for i in dataset.resident]
+    bounds = {}
+    for fname, segment_start in resident:
+        i = fnames.index(fname)
+        bounds.setdefault(i, []).append(segment_start)
+    for i, s in zip(file_idx.flat, start.flat):
+        assert any(
+            lo <= s and s + 8 <= lo + dataset.segment_size for lo in bounds[i]
+        )
+
+    # windows should be sampled for each channel independently
+    same = (file_idx[:, 0] == file_idx[:, 1]) & (start[:, 0] == start[:, 1])
+    assert same.mean() < 0.5
+
+    # and reach both ends of the segments
+    offsets = set()
+    for i, s in zip(file_idx.flat, start.flat):
+        offsets.update(s - lo for lo in bounds[i] if 0 <= s - lo <= 24)
+    assert {0, 24} <= offsets
+
+
+def test_device_time_series_dataset_refresh(fnames):
+    dataset = make_dataset(fnames, num_segments=3, num_refresh=2)
+    check_pool(dataset, fnames)
+
+    for _ in range(5):
+        resident = dataset.resident.copy()
+        for _ in dataset:
+            # the next segments should be read during the epoch
+            assert dataset.refresh is not None
+        segments, future = dataset.refresh
+        assert not set(segments) & set(resident)
+
+        dataset.finish_refresh()
+        assert future.done()
+        assert dataset.refresh is None
+
+        # exactly `num_refresh` slots should have been replaced
+        # with the segments that were read, and the pool should
+        # hold the data of its new segments
+        replaced = dataset.resident != resident
+        assert replaced.sum() == 2
+        assert set(dataset.resident[replaced]) == set(segments)
+        assert len(set(dataset.resident)) == 3
+        check_pool(dataset, fnames)
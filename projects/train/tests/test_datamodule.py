@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from train.data.base import BaseAframeDataset
+from train.data.waveforms import ChunkedWaveformDataset
+
+SAMPLE_RATE = 128
+
+
+@pytest.fixture
+def datamodule(tmp_path):
+    return BaseAframeDataset(
+        background_dir=str(tmp_path),
+        waveforms_dir=str(tmp_path),
+        ifos=["H1", "L1"],
+        sample_rate=SAMPLE_RATE,
+        dec=None,
+        psi=None,
+        phi=None,
+        batches_per_epoch=6,
+        num_files_per_batch=1,
+        waveform_sampler=SimpleNamespace(right_pad=0.25),
+        batch_size=8,
+        kernel_length=1.5,
+        fduration=1,
+        psd_length=8,
+        left_pad=0.25,
+        right_pad=0.1,
+        waveforms_on_device=True,
+    )
+
+
+@pytest.mark.parametrize("waveform_length", [2, 4])
+def test_waveforms_to_device(datamodule, waveform_length):
+    chunks = [
+        torch.randn(20, 2, waveform_length * SAMPLE_RATE) for _ in range(2)
+    ]
+
+    # sample the same batches from each chunk
+    # by waveform on the host, and by index on
+    # chunks sliced as they're moved to the device
+    torch.manual_seed(0)
+    host = ChunkedWaveformDataset(chunks, batch_size=8, batches_per_chunk=3)
+    host = list(host)
+
+    torch.manual_seed(0)
+    device = ChunkedWaveformDataset(
+        chunks,
+        batch_size=8,
+        batches_per_chunk=3,
+        device="cpu",
+        transform=datamodule.slice_waveforms,
+    )
+    device = list(device)
+
+    assert len(host) == len(device) == 6
+    for waveforms, (chunk, idx) in zip(host, device):
+        assert idx.dtype == torch.int64
+        expected = datamodule.slice_waveforms(waveforms)
+        waveforms = datamodule.waveforms_to_device((chunk, idx))
+        assert waveforms.shape == expected.shape
+        assert torch.equal(waveforms, expected)
@@ -0,0 +1,114 @@
+import pytest
+import torch
+from ml4gw.utils.slicing import unfold_windows
+
+from train.metrics import FusedTimeSlides, TimeSlideAUROC, get_timeslides
+
+SAMPLE_RATE = 64
+SAMPLE_LENGTH = 2
+STRIDE = 0.25
+
+
+@pytest.fixture
+def background():
+    # segments of different lengths, so
+    # that timeslides have different sizes
+    return [torch.randn(2, length * SAMPLE_RATE) for length in [60, 45, 80]]
+
+
+@pytest.fixture(params=[200, 1000])
+def livetime(request):
+    # the lower livetime chops the last timeslide short
+    return request.param
+
+
+@pytest.fixture(params=[7, 32])
+def batch_size(request):
+    return request.param
+
+
+def make_timeslides(background, livetime, batch_size, fused=False):
+    return get_timeslides(
+        background,
+        livetime,
+        SAMPLE_RATE,
+        SAMPLE_LENGTH,
+        STRIDE,
+        batch_size,
+        fused=fused,
+    )
+
+
+def sequential(timeslides):
+    """
+    Unfold each batch of each timeslide in turn,
+    returning the windows along with their shifts
+    """
+    kernel_size = SAMPLE_LENGTH * SAMPLE_RATE
+    stride_size = int(STRIDE * SAMPLE_RATE)
+    windows, shifts = [], []
+    for timeslide in timeslides:
+        for X in timeslide:
+            X = unfold_windows(X, kernel_size, stride=stride_size)
+            windows.append(X)
+            shifts.append(torch.full((len(X),), timeslide.shift_size))
+    return windows, shifts
+
+
+def test_fused_timeslides(background, livetime, batch_size):
+    timeslides, _ = make_timeslides(background, livetime, batch_size)
+    assert len({timeslide.shift_size for timeslide in timeslides}) > 1
+    expected, expected_shifts = sequential(timeslides)
+    expected = torch.cat(expected)
+    expected_shifts = torch.cat(expected_shifts)
+
+    fused = FusedTimeSlides(timeslides, 3 * batch_size, "cpu")
+    batches = list(fused)
+    assert len(batches) == len(fused)
+
+    # every batch but the last should be full, and
+    # they should span several timeslides at once
+    for X, shifts in batches[:-1]:
+        assert len(X) == len(shifts) == 3 * batch_size
+    assert 0 < len(batches[-1][0]) <= 3 * batch_size
+
+    windows = torch.cat([X for X, _ in batches])
+    shifts = torch.cat([shifts for _, shifts in batches])
+    assert torch.equal(windows, expected)
+    assert torch.equal(shifts, expected_shifts)
+
+
+def test_get_timeslides_num_batches(background, livetime, batch_size):
+    timeslides, num_batches = make_timeslides(background, livetime, batch_size)
+    assert num_batches == sum(1 for ts in timeslides for _ in ts)
+
+    timeslides, num_batches = make_timeslides(
+        background, livetime, batch_size, fused=True
+    )
+    fused = FusedTimeSlides(timeslides, batch_size, "cpu")
+    assert num_batches == len(fused) == len(list(fused))
+
+
+def test_timeslide_auroc_per_window_shifts(background, batch_size):
+    timeslides, _ = make_timeslides(background, 1000, batch_size)
+    foreground = torch.randn(500) + 1
+
+    def score(X):
+        return X.mean(dim=(1, 2))
+
+    # updating with the shift of each window of fused batches
+    # should give the same metric as updating with the shift
+    # of each timeslide's batches
+    kwargs = {"max_fpr": 0.1, "stride": STRIDE, "pool_length": 4}
+    metric = TimeSlideAUROC(**kwargs)
+    windows, shifts = sequential(timeslides)
+    for X, shift in zip(windows, shifts):
+        metric.update(int(shift[0]), score(X), foreground)
+    torch.manual_seed(0)
+    expected = metric.compute()
+
+    metric = TimeSlideAUROC(**kwargs)
+    for X, shifts in FusedTimeSlides(timeslides, 3 * batch_size, "cpu"):
+        metric.update(shifts, score(X), foreground)
+    torch.manual_seed(0)
+    torch.testing.assert_close(metric.compute(), expected)
@@ -0,0 +1,150 @@
+import logging
+import time
+
+import h5py
+import numpy as np
+import pytest
+import torch
+
+from train.data.waveforms.loader import (
+    ChunkedWaveformDataset,
+    Hdf5WaveformLoader,
+)
+
+WAVEFORM_SIZE = 8
+
+
+def write_waveforms(fname, num_waveforms, block_size):
+    # label each waveform with its row, and each
+    # channel with its sign, so reads can be checked
+    rows = np.arange(num_waveforms, dtype=np.float64)
+    rows = np.repeat(rows[:, None], WAVEFORM_SIZE, axis=1)
+    with h5py.File(fname, "w") as f:
+        g = f.create_group("waveforms")
+        for channel, sign in [("cross", -1), ("plus", 1)]:
+            g.create_dataset(
+                channel,
+                data=sign * rows,
+                chunks=(block_size, WAVEFORM_SIZE),
+            )
+    return fname
+
+
+@pytest.fixture
+def loader_factory(tmp_path):
+    def factory(num_waveforms=20, block_size=4, **kwargs):
+        # loaders keep their files open, so give each its own
+        fname = tmp_path / f"waveforms-{len(list(tmp_path.iterdir()))}.hdf5"
+        write_waveforms(fname, num_waveforms, block_size)
+        kwargs = {
+            "channels": ["cross", "plus"],
+            "batch_size": 6,
+            "batches_per_epoch": 3,
+            "chunk_size": 3,
+            "path": "waveforms",
+            **kwargs,
+        }
+        return Hdf5WaveformLoader([fname], **kwargs)
+
+    return factory
+
+
+def check_batch(batch, chunk_size):
+    assert batch.dtype == torch.float32
+    batch = batch.numpy()
+    assert batch.shape[1:] == (2, WAVEFORM_SIZE)
+    np.testing.assert_array_equal(batch[:, 0], -batch[:, 1])
+
+    # each chunk should be a run of consecutive rows
+    rows = batch[:, 1, 0]
+    assert (batch[:, 1] == rows[:, None]).all()
+    for start in range(0, len(batch), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        np.testing.assert_array_equal(np.diff(chunk), 1)
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_hdf5_waveform_loader(loader_factory, prefetch):
+    loader = loader_factory(prefetch=prefetch)
+    batches = [batch.clone() for batch in loader]
+    assert len(batches) == len(loader) == 3
+    for batch in batches:
+        assert batch.shape == (6, 2, WAVEFORM_SIZE)
+        check_batch(batch, 3)
+    assert loader.load_time > 0
+
+
+def test_hdf5_waveform_loader_workers(loader_factory):
+    loader = loader_factory()
+    dataloader = torch.utils.data.DataLoader(
+        loader, batch_size=None, num_workers=1
+    )
+    batches = list(dataloader)
+    assert len(batches) == 3
+    for batch in batches:
+        assert batch.is_shared()
+        check_batch(batch, 3)
+
+
+def test_hdf5_waveform_loader_empty_epoch(loader_factory):
+    loader = loader_factory(batches_per_epoch=0)
+    assert list(loader) == []
+
+
+def sample_starts(loader, chunk_size, num_samples=2000):
+    fname = loader.fnames[0]
+    return {loader.sample_start(fname, chunk_size) for _ in range(num_samples)}
+
+
+def test_hdf5_waveform_loader_starts(loader_factory):
+    # every row should be reachable by default
+    loader = loader_factory(num_waveforms=22, block_size=4)
+    assert sample_starts(loader, 3) == set(range(20))
+
+    # aligned starts should fall on the files' chunks
+    loader = loader_factory(num_waveforms=22, block_size=4, align_chunks=True)
+    assert sample_starts(loader, 3) == {0, 4, 8, 12, 16}
+
+    # unless the file is too short to have more than one
+    loader = loader_factory(num_waveforms=6, block_size=4, align_chunks=True)
+    assert sample_starts(loader, 3) == {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize("prefetch", [1, 3])
+def test_hdf5_waveform_loader_prefetch_buffers(loader_factory, prefetch):
+    loader = loader_factory(prefetch=prefetch, batches_per_epoch=12)
+    ring_size = prefetch + 2
+
+    ptrs = []
+    for batch in loader:
+        # give the loader time to fill its queue, which
+        # shouldn't overwrite the batch we're holding
+        expected = batch.clone()
+        time.sleep(0.05)
+        torch.testing.assert_close(batch, expected)
+        ptrs.append(batch.data_ptr())
+
+    # batches should cycle through a ring of `prefetch + 2` tensors
+    assert len(set(ptrs)) == ring_size
+    for i, ptr in enumerate(ptrs):
+        window = ptrs[i : i + ring_size]
+        assert len(set(window)) == len(window)
+        if i + ring_size < len(ptrs):
+            assert ptrs[i + ring_size] == ptr
+
+
+def test_chunked_waveform_dataset_wait_time(caplog):
+    def chunks():
+        for _ in range(3):
+            time.sleep(0.05)
+            yield torch.randn(10, 2, WAVEFORM_SIZE)
+
+    dataset = ChunkedWaveformDataset(
+        chunks(), batch_size=4, batches_per_chunk=2
+    )
+    with caplog.at_level(logging.INFO):
+        for _ in dataset:
+            # time spent on batches shouldn't count as waiting
+            time.sleep(0.05)
+    assert 0.15 <= dataset.wait_time < 0.3
+    assert "for 3 chunks of waveforms" in caplog.text
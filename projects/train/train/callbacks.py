@@ -47,7 +47,7 @@ class ModelCheckpoint(pl.callbacks.ModelCheckpoint):
         if trainer.datamodule.waveforms_from_disk:
             [X], waveforms = next(iter(trainer.train_dataloader))
             X = X.to(device)
-            waveforms = waveforms.to(device)
+            waveforms = trainer.datamodule.waveforms_to_device(waveforms)
             X, y = trainer.datamodule.inject(X, waveforms)
         else:
             [X] = next(iter(trainer.train_dataloader))
@@ -86,7 +86,7 @@ class SaveAugmentedBatch(Callback):
             if trainer.datamodule.waveforms_from_disk:
                 [X], waveforms = next(iter(trainer.train_dataloader))
                 X = X.to(device)
-                waveforms = waveforms.to(device)
+                waveforms = trainer.datamodule.waveforms_to_device(waveforms)
                 X, y = trainer.datamodule.inject(X, waveforms)
             else:
                 [X] = next(iter(trainer.train_dataloader))
@@ -98,7 +98,7 @@ class SaveAugmentedBatch(Callback):
                 X = (X,)
 
             # build val batch by hand
-            [background, _, _], [signals] = next(
+            [background, *_], [signals] = next(
                 iter(trainer.datamodule.val_dataloader())
             )
             background = background.to(device)
@@ -0,0 +1,222 @@
+import logging
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import h5py
+import numpy as np
+import torch
+
+
+class DeviceTimeSeriesDataset(torch.utils.data.IterableDataset):
+    """
+    Iterable dataset that samples windows of timeseries data
+    from a pool of segments of a set of HDF5 files kept in
+    device memory. Each file is split into segments of
+    `segment_size` samples, the last of which ends at the
+    end of the file and so may overlap the one before it.
+
+    Windows are sampled for each channel independently, as
+    with `ml4gw.dataloading.Hdf5TimeSeriesDataset` using
+    `coincident=False`, but entirely on the device: the
+    windows of each segment are viewed with `unfold` and the
+    sampled ones gathered, so no data is read or transferred
+    during iteration. Windows don't span segment boundaries.
+
+    If the pool holds fewer than all the segments, some of
+    them can be swapped out for ones that aren't on the device
+    at the start of each epoch. The replacements are read on
+    a background thread during the epoch before.
+
+    Batches are yielded with a leading dimension of 1, like
+    batches of a `DataLoader` collating an `Hdf5TimeSeriesDataset`,
+    so that the two are interchangeable.
+
+    Args:
+        fnames:
+            Paths to HDF5 files from which to sample data.
+        channels:
+            Datasets to read from the indicated files, which
+            will be stacked along dim 1 of the generated batches.
+        kernel_size:
+            Size of the windows to sample, in number of samples.
+        batch_size:
+            Number of windows to sample at each iteration.
+        batches_per_epoch:
+            Number of batches to generate during each call
+            to `__iter__`.
+        device:
+            Device to keep the pool of segments on
+        segment_size:
+            Number of samples in each segment. Capped at the
+            length of the shortest file.
+        num_segments:
+            Number of segments to keep on the device. If `None`,
+            all of the segments of every file are kept.
+        num_refresh:
+            Number of segments on the device to replace with
+            segments that aren't at the start of each epoch.
+    """
+
+    def __init__(
+        self,
+        fnames: Sequence[str],
+        channels: Sequence[str],
+        kernel_size: int,
+        batch_size: int,
+        batches_per_epoch: int,
+        device: torch.device,
+        segment_size: int,
+        num_segments: Optional[int] = None,
+        num_refresh: int = 0,
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.channels = channels
+        self.kernel_size = kernel_size
+        self.batch_size = batch_size
+        self.batches_per_epoch = batches_per_epoch
+        self.device = torch.device(device)
+        self.num_refresh = num_refresh
+
+        sizes = []
+        for fname in fnames:
+            with h5py.File(fname, "r") as f:
+                sizes.append(len(f[channels[0]]))
+        self.segment_size = min(segment_size, *sizes)
+        if self.segment_size < kernel_size:
+            raise ValueError(
+                f"Kernel size {kernel_size} is longer than "
+                f"the shortest file, of length {self.segment_size}"
+            )
+
+        # split each file into segments, with the last
+        # one ending at the end of the file
+        self.segments = []
+        for fname, size in zip(fnames, sizes):
+            stop = size - self.segment_size
+            starts = list(range(0, stop, self.segment_size)) + [stop]
+            self.segments.extend([(fname, start) for start in starts])
+
+        if num_segments is None:
+            num_segments = len(self.segments)
+        elif num_segments < 1:
+            raise ValueError(
+                "Must keep at least one segment on the device, "
+                f"got {num_segments}"
+            )
+        if num_segments + num_refresh > len(self.segments):
+            raise ValueError(
+                "Can't keep {} segments on the device and refresh {} "
+                "of them each epoch with only {} segments".format(
+                    num_segments, num_refresh, len(self.segments)
+                )
+            )
+
+        # indices of the segments in each slot of the pool,
+        # read one at a time to avoid staging all of them
+        pin_memory = self.device.type == "cuda"
+        self.resident = np.random.choice(
+            len(self.segments), size=num_segments, replace=False
+        )
+        self.pool = torch.empty(
+            (num_segments, len(channels), self.segment_size),
+            device=self.device,
+        )
+        staging = self.allocate(1, pin_memory)
+        for slot, segment in enumerate(self.resident):
+            self.read_segments([segment], staging)
+            self.pool[slot] = staging[0].to(self.device)
+
+        self.staging = self.allocate(num_refresh, pin_memory)
+        self.refresh = None
+        self.logger.info(
+            "Keeping {} of {} background segments of {} samples on {}, "
+            "refreshing {} each epoch".format(
+                num_segments,
+                len(self.segments),
+                self.segment_size,
+                self.device,
+                num_refresh,
+            )
+        )
+
+    def __len__(self):
+        return self.batches_per_epoch
+
+    def allocate(self, num_segments: int, pin_memory: bool) -> torch.Tensor:
+        shape = (num_segments, len(self.channels), self.segment_size)
+        return torch.empty(shape, pin_memory=pin_memory)
+
+    def read_segments(self, segments: Sequence[int], out: torch.Tensor):
+        """
+        Read the segments at the indices `segments`
+        of `self.segments` into the host tensor `out`
+        """
+        out = out.numpy()
+        for i, segment in enumerate(segments):
+            fname, start = self.segments[segment]
+            with h5py.File(fname, "r") as f:
+                for j, channel in enumerate(self.channels):
+                    f[channel].read_direct(
+                        out[i, j],
+                        source_sel=np.s_[start : start + self.segment_size],
+                    )
+
+    def start_refresh(self) -> None:
+        """
+        Choose segments to swap onto the device at the start
+        of the next epoch and read them on a background thread
+        """
+        candidates = np.setdiff1d(np.arange(len(self.segments)), self.resident)
+        segments = np.random.choice(
+            candidates, size=self.num_refresh, replace=False
+        )
+
+        # shut the executor down once the read is submitted,
+        # so that its thread exits as soon as the read is done
+        # rather than outliving the dataset
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.read_segments, segments, self.staging)
+        executor.shutdown(wait=False)
+        self.refresh = segments, future
+
+    def finish_refresh(self) -> None:
+        """
+        Wait for the segments being read to be loaded and
+        swap them onto the device in place of random ones
+        """
+        segments, future = self.refresh
+        future.result()
+        slots = np.random.choice(
+            len(self.resident), size=self.num_refresh, replace=False
+        )
+
+        # copy synchronously, since the staging buffer
+        # gets reused as soon as the next refresh starts
+        self.pool[torch.from_numpy(slots)] = self.staging.to(self.device)
+        self.resident[slots] = segments
+        self.refresh = None
+
+    def sample_batch(self) -> torch.Tensor:
+        num_segments, num_channels, _ = self.pool.shape
+        size = (self.batch_size, num_channels)
+        segments = torch.randint(num_segments, size, device=self.device)
+        starts = torch.randint(
+            self.segment_size - self.kernel_size + 1, size, device=self.device
+        )
+        channels = torch.arange(num_channels, device=self.device)
+        channels = channels.expand(size)
+
+        # view every window of each segment without copying
+        # them, then gather the windows that were sampled
+        windows = self.pool.unfold(-1, self.kernel_size, 1)
+        return windows[segments, channels, starts]
+
+    def __iter__(self):
+        if self.refresh is not None:
+            self.finish_refresh()
+        if self.num_refresh:
+            self.start_refresh()
+
+        for _ in range(self.batches_per_epoch):
+            yield self.sample_batch()[None]
@@ -15,8 +15,9 @@ from ml4gw.transforms import Whiten
 from ml4gw.utils.slicing import unfold_windows
 
 from train import augmentations as aug
+from train.data.background import DeviceTimeSeriesDataset
 from train.data.utils import fs as fs_utils
-from train.metrics import get_timeslides
+from train.metrics import FusedTimeSlides, get_timeslides
 from train.data.waveforms import (
     ChunkedWaveformDataset,
     Hdf5WaveformLoader,
@@ -137,6 +138,15 @@ class BaseAframeDataset(pl.LightningDataModule):
         valid_livetime:
             Total livetime in seconds of the validation data
             to be generated via timeslides.
+        valid_batch_size:
+            Number of background kernels in each validation
+            batch. If `None`, will use `batch_size`.
+        timeslides_on_device:
+            If `True`, keep the validation background on the
+            device and gather the kernels of every timeslide
+            there in batches of `valid_batch_size` that span
+            shifts and segments, rather than transferring and
+            unfolding each batch of each timeslide in turn.
         chunks_per_epoch:
             Number of chunks of waveforms to load from disk
             each epoch. Not used if generating waveforms
@@ -144,6 +154,41 @@ class BaseAframeDataset(pl.LightningDataModule):
         chunk_size:
             Number of waveforms to load in each chunk.
             Not used if generating waveforms during training.
+        prefetch_chunks:
+            If greater than 0, load chunks of waveforms on a
+            background thread of the training process, keeping
+            up to this many loaded ahead, into reused (pinned,
+            if training on GPU) buffers. Otherwise, chunks are
+            loaded by `DataLoader` worker processes. Not used if
+            generating waveforms during training.
+        align_waveform_chunks:
+            Whether to start each chunk of waveforms on a boundary
+            of the HDF5 chunks that the waveform files are stored
+            in. Reads no partially used HDF5 chunks, but never
+            samples the last waveforms of each file that don't
+            fill a whole HDF5 chunk. Not used if generating
+            waveforms during training.
+        background_on_device:
+            If `True`, keep the training background on the device
+            and sample kernels from it there, rather than reading
+            them with `DataLoader` worker processes each batch.
+            `num_files_per_batch` isn't used if so.
+        background_segment_length:
+            Length in seconds of the segments that the training
+            background is split into when kept on the device.
+        num_background_segments:
+            Number of segments of the training background to keep
+            on the device. If `None`, all of the background is kept.
+        refresh_background_segments:
+            Number of the segments of training background on the
+            device to replace with segments that aren't each epoch.
+        waveforms_on_device:
+            If `True`, keep each chunk of training waveforms on
+            the device, sliced to the length used for training,
+            and only transfer the indices of the waveforms used
+            by each batch. Requires enough device memory for
+            two chunks while moving to the next one. Not used
+            if generating waveforms during training.
         verbose:
             Whether to log debug information during training.
     """
@@ -181,10 +226,19 @@ class BaseAframeDataset(pl.LightningDataModule):
         num_valid_views: int = 4,
         min_valid_duration: float = 15000,
         valid_livetime: float = (3600 * 12),
+        valid_batch_size: Optional[int] = None,
+        timeslides_on_device: bool = False,
         max_num_workers: int = 6,
         # dataloading args
         chunks_per_epoch: int = 1,
         chunk_size: int = 10000,
+        prefetch_chunks: int = 0,
+        align_waveform_chunks: bool = False,
+        background_on_device: bool = False,
+        background_segment_length: float = 2048,
+        num_background_segments: Optional[int] = None,
+        refresh_background_segments: int = 0,
+        waveforms_on_device: bool = False,
         verbose: bool = False,
     ) -> None:
         super().__init__()
@@ -369,7 +423,7 @@ class BaseAframeDataset(pl.LightningDataModule):
     @property
     def val_batch_size(self):
         """Use larger batch sizes when we don't need gradients."""
-        return int(1 * self.hparams.batch_size)
+        return self.hparams.valid_batch_size or self.hparams.batch_size
 
     @property
     def num_workers(self):
@@ -511,7 +565,12 @@ class BaseAframeDataset(pl.LightningDataModule):
             self.sample_length,
             self.hparams.valid_stride,
             self.val_batch_size,
+            fused=self.hparams.timeslides_on_device,
         )
+        if self.hparams.timeslides_on_device:
+            self.timeslides = FusedTimeSlides(
+                self.timeslides, self.val_batch_size, self.device
+            )
 
         self.val_waveforms = self.waveform_sampler.get_val_waveforms(
             world_size, rank
@@ -531,17 +590,33 @@ class BaseAframeDataset(pl.LightningDataModule):
     def on_before_batch_transfer(self, batch, _):
         """
         Slice loaded waveforms before sending to device
-        if not generating waveforms during training
-        """
-        # TODO: maybe pass indices as argument to
-        # waveform loader to reduce quantity of data
-        # we need to load
-        if self.trainer.training and self.waveforms_from_disk:
+        if not generating waveforms during training. If
+        waveforms are kept on the device, they've already
+        been sliced and only their indices are transferred.
+        """
+        if (
+            self.trainer.training
+            and self.waveforms_from_disk
+            and not self.hparams.waveforms_on_device
+        ):
             X, waveforms = batch
             waveforms = self.slice_waveforms(waveforms)
             batch = X, waveforms
         return batch
 
+    def waveforms_to_device(self, waveforms):
+        """
+        Move the training waveforms loaded by the training
+        dataloader to the device. If waveforms are kept on
+        the device, `waveforms` is the chunk of waveforms on
+        the device along with the indices of the batch's
+        waveforms in it, and those waveforms are gathered.
+        """
+        if self.hparams.waveforms_on_device:
+            chunk, idx = waveforms
+            return chunk[idx.to(chunk.device)]
+        return waveforms.to(self.device)
+
     # ============================================== #
     # Utilities for doing augmentation/preprocessing #
     # after tensors have been transferred to GPU     #
@@ -559,6 +634,7 @@ class BaseAframeDataset(pl.LightningDataModule):
             # on input data and use it to impact labels
             if self.waveforms_from_disk:
                 [batch], waveforms = batch
+                waveforms = self.waveforms_to_device(waveforms)
                 batch = self.inject(batch, waveforms)
             else:
                 [batch] = batch
@@ -568,14 +644,19 @@ class BaseAframeDataset(pl.LightningDataModule):
             # on the local device, the relevant tensors will be
             # empty, so just pass them through with a 0 shift to
             # indicate that this should be ignored
-            [background, _, timeslide_idx], [signals] = batch
+            if self.hparams.timeslides_on_device:
+                # kernels were gathered on the device along
+                # with the shift of each of them
+                [background, shift], [signals] = batch
+            else:
+                [background, _, timeslide_idx], [signals] = batch
+                shift = self.timeslides[timeslide_idx].shift_size
 
             # If we're validating, unfold the background
             # data into a batch of overlapping kernels now that
             # we're on the GPU so that we're not transferring as
             # much data from CPU to GPU. Once everything is
             # on-device, pre-inject signals into background.
-            shift = self.timeslides[timeslide_idx].shift_size
             X_bg, X_fg = self.build_val_batches(background, signals)
             batch = (shift, X_bg, X_fg)
         return batch
@@ -604,7 +685,9 @@ class BaseAframeDataset(pl.LightningDataModule):
         into these timeseries.
 
         Args:
-            background: A tensor of background data
+            background:
+                A tensor of background data, or of background
+                kernels if it's already been unfolded
             signals: A tensor of signals to inject
 
         Returns:
@@ -612,9 +695,10 @@ class BaseAframeDataset(pl.LightningDataModule):
         """
 
         # unfold the background data into kernels
-        sample_size = int(self.sample_length * self.hparams.sample_rate)
-        stride = int(self.hparams.valid_stride * self.hparams.sample_rate)
-        background = unfold_windows(background, sample_size, stride=stride)
+        if background.ndim == 2:
+            sample_size = int(self.sample_length * self.hparams.sample_rate)
+            stride = int(self.hparams.valid_stride * self.hparams.sample_rate)
+            background = unfold_windows(background, sample_size, stride=stride)
 
         # split data into kernel and psd data and estimate psd
         X, psd = self.psd_estimator(background)
@@ -665,10 +749,13 @@ class BaseAframeDataset(pl.LightningDataModule):
         Validation dataloader will iterate through batches
         in timeslides, returning both
         """
-        background_dataset = pl.utilities.combined_loader.CombinedLoader(
-            self.timeslides, mode="sequential"
-        )
-        iter(background_dataset)  # gives it a __len__ property
+        if self.hparams.timeslides_on_device:
+            background_dataset = self.timeslides
+        else:
+            background_dataset = pl.utilities.combined_loader.CombinedLoader(
+                self.timeslides, mode="sequential"
+            )
+            iter(background_dataset)  # gives it a __len__ property
 
         # Figure out how many batches of background
         # we're going to go through, then batch the
@@ -691,28 +778,45 @@ class BaseAframeDataset(pl.LightningDataModule):
         return dataset
 
     def train_dataloader(self) -> torch.utils.data.DataLoader:
-        # build our strain dataset and dataloader
-        dataset = Hdf5TimeSeriesDataset(
-            self.train_fnames,
-            channels=self.hparams.ifos,
-            kernel_size=int(self.hparams.sample_rate * self.sample_length),
-            batch_size=self.hparams.batch_size,
-            batches_per_epoch=self.batches_per_epoch,
-            coincident=False,
-            num_files_per_batch=self.hparams.num_files_per_batch,
-        )
-
         pin_memory = isinstance(
             self.trainer.accelerator, pl.accelerators.CUDAAccelerator
         )
-        self._logger.debug(
-            f"Using {self.num_workers} workers for strain data loading"
-        )
-        dataloader = torch.utils.data.DataLoader(
-            dataset,
-            num_workers=self.num_workers,
-            pin_memory=pin_memory,
-        )
+        kernel_size = int(self.hparams.sample_rate * self.sample_length)
+
+        # build our strain dataset and dataloader, or if we're
+        # keeping the background on the device, a dataset that
+        # samples it there without any workers
+        if self.hparams.background_on_device:
+            segment_length = self.hparams.background_segment_length
+            dataloader = DeviceTimeSeriesDataset(
+                self.train_fnames,
+                channels=self.hparams.ifos,
+                kernel_size=kernel_size,
+                batch_size=self.hparams.batch_size,
+                batches_per_epoch=self.batches_per_epoch,
+                device=self.device,
+                segment_size=int(self.hparams.sample_rate * segment_length),
+                num_segments=self.hparams.num_background_segments,
+                num_refresh=self.hparams.refresh_background_segments,
+            )
+        else:
+            dataset = Hdf5TimeSeriesDataset(
+                self.train_fnames,
+                channels=self.hparams.ifos,
+                kernel_size=kernel_size,
+                batch_size=self.hparams.batch_size,
+                batches_per_epoch=self.batches_per_epoch,
+                coincident=False,
+                num_files_per_batch=self.hparams.num_files_per_batch,
+            )
+            self._logger.debug(
+                f"Using {self.num_workers} workers for strain data loading"
+            )
+            dataloader = torch.utils.data.DataLoader(
+                dataset,
+                num_workers=self.num_workers,
+                pin_memory=pin_memory,
+            )
 
         # If we're not loading waveforms from disk, just return
         # the background dataloader
@@ -728,6 +832,9 @@ class BaseAframeDataset(pl.LightningDataModule):
             batches_per_epoch=self.hparams.chunks_per_epoch or 1,
             channels=["cross", "plus"],
             path="waveforms",
+            prefetch=self.hparams.prefetch_chunks,
+            pin_memory=pin_memory,
+            align_chunks=self.hparams.align_waveform_chunks,
         )
         # calculate how many batches we'll sample from each chunk
         # based on requested chunks per epoch and batches per epoch
@@ -743,21 +850,35 @@ class BaseAframeDataset(pl.LightningDataModule):
             f"of size {self.hparams.chunk_size} each epoch"
         )
 
-        # multiprocess waveform chunk loader
-        # so we don't have to wait for waveforms
-        waveform_loader = torch.utils.data.DataLoader(
-            waveform_loader,
-            num_workers=2,
-            pin_memory=pin_memory,
-            persistent_workers=True,
-        )
+        # multiprocess waveform chunk loader so we don't
+        # have to wait for waveforms, unless we're already
+        # prefetching them in this process. Chunks are already
+        # batches, so don't collate them into another batch.
+        # Chunks are handed over in shared memory, and batches
+        # are gathered out of them into unpinned memory anyway,
+        # so pinning them would only add a copy of each chunk
+        if not self.hparams.prefetch_chunks:
+            waveform_loader = torch.utils.data.DataLoader(
+                waveform_loader,
+                batch_size=None,
+                num_workers=2,
+                pin_memory=False,
+                persistent_workers=True,
+            )
 
         # build a dataset that will sample from
         # iterator of chunks of waveforms
+        # if we're keeping waveforms on the device, slice
+        # each chunk there once rather than slicing each batch
+        device, transform = None, None
+        if self.hparams.waveforms_on_device:
+            device, transform = self.device, self.slice_waveforms
         waveform_dataset = ChunkedWaveformDataset(
             waveform_loader,
             batch_size=self.hparams.batch_size,
             batches_per_chunk=batches_per_chunk,
+            device=device,
+            transform=transform,
         )
 
         return ZippedDataset(dataloader, waveform_dataset)
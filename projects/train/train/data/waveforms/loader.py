@@ -2,8 +2,11 @@ from pathlib import Path
 
 import logging
 import math
+import queue
+import threading
+import time
 import warnings
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
 
 import h5py
 import numpy as np
@@ -38,7 +41,7 @@ class WaveformLoader(WaveformSampler):
             self.training_waveform_files = [training_waveform_path]
 
         waveform_set = WaveformPolarizationSet.read(
-            self.training_waveform_files[0]
+            self.training_waveform_files[0], lazy=True
         )
         if waveform_set.right_pad != self.right_pad:
             raise ValueError(
@@ -81,6 +84,29 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
             Optional path to location of datasets in hdf5 files.
             `path` should be delimited by forward slashes. If `None`
             it is assumed the datasets are at the root of the file.
+        prefetch:
+            If greater than 0, load batches on a background thread,
+            keeping up to this many loaded ahead of the consumer.
+            Batches are loaded into a ring of `prefetch + 2`
+            reused tensors, so each batch is only valid until
+            the next one is requested, and its tensor is reused
+            for the batch `prefetch + 2` after it.
+        pin_memory:
+            Whether to allocate batches in page-locked memory
+            for faster transfer to GPU. Only applies when loading
+            batches outside of `DataLoader` worker processes, e.g.
+            with `prefetch`. In worker processes, batches are
+            allocated in shared memory so that they're handed to
+            the main process without being copied.
+        align_chunks:
+            Whether to start each chunk on a boundary of the
+            HDF5 chunks that the datasets are stored in, so that
+            no partially used chunks are read. The last rows of
+            each file that don't fill a whole chunk are then never
+            sampled, so this is best used with `chunk_size` a
+            multiple of the files' chunks. Files too short to
+            have more than one aligned start are sampled without
+            alignment.
     """
 
     def __init__(
@@ -91,12 +117,19 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
         batches_per_epoch: int,
         chunk_size: int = 1000,
         path: Optional[Path] = None,
+        prefetch: int = 0,
+        pin_memory: bool = False,
+        align_chunks: bool = False,
     ):
+        self.logger = logging.getLogger(__name__)
         self.fnames = fnames
         self.channels = channels
         self.batch_size = batch_size
         self.batches_per_epoch = batches_per_epoch
         self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.pin_memory = pin_memory
+        self.align_chunks = align_chunks
 
         if path is not None:
             self.path = path.split("/")
@@ -104,6 +137,7 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
             self.path = None
 
         self.sizes = {}
+        self.block_sizes = {}
         self.mmap_files = {}
         self.mmap_datasets = {}
 
@@ -123,6 +157,7 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
             # like size and chunking behavior
             dset = self.mmap_datasets[fname][self.channels[0]]
             self.sizes[fname] = len(dset)
+            self.block_sizes[fname] = dset.chunks[0] if dset.chunks else 1
             if dset.chunks is None:
                 warnings.warn(
                     "File {} contains datasets that were generated "
@@ -138,6 +173,9 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
         self.waveform_size = dset.shape[1]
         self.probs = np.array([i / self.total for i in self.sizes.values()])
 
+        # time spent loading batches during the current epoch
+        self.load_time = 0.0
+
     @property
     def num_channels(self):
         return len(self.channels)
@@ -165,18 +203,60 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
                 group = group[path]
         return f, group
 
-    def load_chunk(self, fname, start, size):
-        end = min(start + size, self.sizes[fname])
-        return {
-            channel: self.mmap_datasets[fname][channel][start:end]
-            for channel in self.channels
-        }
-
-    def sample_batch(self):
-        # allocate batch up front
-        batch = np.zeros(
-            (self.batch_size, self.num_channels, self.waveform_size)
-        )
+    def load_chunk(self, fname, start, out: np.ndarray) -> None:
+        """
+        Read the waveforms starting at `start` directly into
+        `out`, which has shape `(num_channels, size, waveform_size)`,
+        converting them to its dtype
+        """
+        size = out.shape[1]
+        for i, channel in enumerate(self.channels):
+            self.mmap_datasets[fname][channel].read_direct(
+                out[i], source_sel=np.s_[start : start + size]
+            )
+
+    def allocate_batch(self) -> torch.Tensor:
+        """
+        Allocate a float32 batch of waveforms. Batches are stored
+        channel-major, with the returned tensor a transposed view,
+        so that HDF5 can read waveforms into contiguous memory.
+        Reading into strided memory is an order of magnitude slower.
+        """
+        shape = (self.num_channels, self.batch_size, self.waveform_size)
+        if torch.utils.data.get_worker_info() is None:
+            batch = torch.empty(
+                shape, dtype=torch.float32, pin_memory=self.pin_memory
+            )
+        else:
+            # move the batch to shared memory before it's filled,
+            # so that it's handed to the main process without a copy
+            batch = torch.empty(shape, dtype=torch.float32).share_memory_()
+        return batch.transpose(0, 1)
+
+    def sample_start(self, fname: Path, chunk_size: int) -> int:
+        """
+        Select a random starting index for a chunk of `chunk_size`
+        waveforms from `fname`, aligned with the chunks that its
+        datasets are stored in if `align_chunks` is `True`
+        """
+        max_start = self.sizes[fname] - chunk_size
+        block_size = self.block_sizes[fname]
+        if self.align_chunks and max_start >= block_size:
+            num_starts = max_start // block_size + 1
+            return np.random.randint(0, num_starts) * block_size
+        return np.random.randint(0, max_start + 1)
+
+    def sample_batch(self, batch: Optional[torch.Tensor] = None):
+        """
+        Load a batch of waveforms from randomly selected chunks
+        of the files into `batch`, a tensor returned by
+        `allocate_batch`, or into a newly allocated one if
+        `batch` isn't specified
+        """
+        tick = time.perf_counter()
+        if batch is None:
+            batch = self.allocate_batch()
+        out = batch.transpose(0, 1).numpy()
 
         for i in range(self.chunks_per_batch):
             fname = np.random.choice(self.fnames, p=self.probs)
@@ -185,23 +265,78 @@ class Hdf5WaveformLoader(torch.utils.data.IterableDataset):
                 self.chunk_size, self.batch_size - i * self.chunk_size
             )
 
-            # select a random starting index for the chunk
-            max_start = self.sizes[fname] - chunk_size
-            start = np.random.randint(0, max_start + 1)
+            start = self.sample_start(fname, chunk_size)
 
-            # load the chunk and insert it into the batch
-            chunk = self.load_chunk(fname, start, chunk_size)
+            # load the chunk directly into the batch
             batch_start = i * self.chunk_size
             batch_end = batch_start + chunk_size
-
-            for i, channel in enumerate(self.channels):
-                batch[batch_start:batch_end, i, :] = chunk[channel]
-
-        return torch.tensor(batch)
+            self.load_chunk(fname, start, out[:, batch_start:batch_end])
+
+        self.load_time += time.perf_counter() - tick
+        return batch
+
+    def _prefetch(self):
+        """
+        Load batches on a background thread into a bounded
+        queue, yielding them as they're requested
+        """
+        stop = threading.Event()
+        buffers = [self.allocate_batch() for _ in range(self.prefetch + 2)]
+        q = queue.Queue(maxsize=self.prefetch)
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def target():
+            try:
+                for i in range(self.batches_per_epoch):
+                    batch = self.sample_batch(buffers[i % len(buffers)])
+                    if not put(batch):
+                        return
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        try:
+            for _ in range(self.batches_per_epoch):
+                batch = q.get()
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
 
     def __iter__(self):
-        for _ in range(self.batches_per_epoch):
-            yield self.sample_batch()
+        self.load_time = 0.0
+        if self.prefetch > 0:
+            yield from self._prefetch()
+        else:
+            for _ in range(self.batches_per_epoch):
+                yield self.sample_batch()
+
+        # report how quickly waveforms were loaded so that
+        # `chunk_size` and `batches_per_epoch` can be tuned.
+        # In `DataLoader` workers this only covers the worker's
+        # own batches; the time the consumer spent waiting for
+        # them is reported by `ChunkedWaveformDataset`
+        num_waveforms = self.batch_size * self.batches_per_epoch
+        if not num_waveforms:
+            return
+        self.logger.info(
+            "Loaded {} waveforms in {:0.2f}s ({:0.0f} waveforms/s)".format(
+                num_waveforms,
+                self.load_time,
+                num_waveforms / self.load_time,
+            )
+        )
 
 
 class ChunkedWaveformDataset(torch.utils.data.IterableDataset):
@@ -223,6 +358,17 @@ class ChunkedWaveformDataset(torch.utils.data.IterableDataset):
         batches_per_chunk:
             Number of batches of waveforms to sample from
             each chunk before moving on to the next one.
+        device:
+            If specified, move each chunk to this device as it's
+            loaded and yield the chunk along with the indices of
+            each batch's waveforms in it, rather than the waveforms
+            themselves. Only the indices then need to be transferred
+            to the device with each batch. The chunk is already on
+            the device, so transferring it is a no-op.
+        transform:
+            Callable applied to each chunk once it's on `device`,
+            e.g. to slice its waveforms down to the length used
+            for training. Only used if `device` is specified.
     """
 
     def __init__(
@@ -230,28 +376,70 @@ class ChunkedWaveformDataset(torch.utils.data.IterableDataset):
         chunk_it: Iterable,
         batch_size: int,
         batches_per_chunk: int,
+        device: Optional[torch.device] = None,
+        transform: Optional[Callable] = None,
     ) -> None:
         self.logger = logging.getLogger(__name__)
         self.chunk_it = chunk_it
         self.batch_size = batch_size
         self.batches_per_chunk = batches_per_chunk
+        self.device = device
+        self.transform = transform
 
     def __len__(self):
         return len(self.chunk_it) * self.batches_per_chunk
 
+    def to_device(self, chunk: torch.Tensor) -> torch.Tensor:
+        # loaded chunks may be reused by the loader once we
+        # move on to the next one, so don't copy asynchronously
+        chunk = chunk.to(self.device)
+        if self.transform is not None:
+            # make the result contiguous so that slices
+            # don't keep the full chunk in memory
+            chunk = self.transform(chunk).contiguous()
+        return chunk
+
+    def next_chunk(self, it) -> Optional[torch.Tensor]:
+        """
+        Get the next chunk from `it`, or `None` if it's exhausted,
+        recording how long we sat waiting for it to be loaded
+        """
+        tick = time.perf_counter()
+        try:
+            chunk = next(it)
+        except StopIteration:
+            chunk = None
+        self.wait_time += time.perf_counter() - tick
+        return chunk
+
     def __iter__(self):
+        self.wait_time = 0.0
+        num_chunks = 0
         it = iter(self.chunk_it)
-        [chunk] = next(it)
+        chunk = self.next_chunk(it)
+
+        while chunk is not None:
+            num_chunks += 1
+            if self.device is not None:
+                chunk = self.to_device(chunk)
 
-        num_waveforms, _, _ = chunk.shape
-        while True:
             # generate batches from the current chunk
+            num_waveforms, _, _ = chunk.shape
             for _ in range(self.batches_per_chunk):
                 idx = torch.randperm(num_waveforms)[: self.batch_size]
-                yield chunk[idx]
-
-            try:
-                [chunk] = next(it)
-            except StopIteration:
-                break
-            num_waveforms, _, _ = chunk.shape
+                if self.device is not None:
+                    yield chunk, idx
+                else:
+                    yield chunk[idx]
+
+            # drop our reference to the current chunk
+            # before the next one is moved to the device
+            del chunk
+            chunk = self.next_chunk(it)
+
+        # report how long training sat idle waiting for chunks,
+        # so that `chunk_size` and `chunks_per_epoch` can be tuned
+        self.logger.info(
+            f"Waited {self.wait_time:0.2f}s for "
+            f"{num_chunks} chunks of waveforms to load"
+        )
@@ -35,7 +35,10 @@ class WaveformSampler(torch.nn.Module):
         self.sample_rate = sample_rate
         self.val_waveform_file = val_waveform_file
 
-        waveform_set = self.waveform_set_cls.read(val_waveform_file)
+        # only read the metadata of the validation waveforms
+        # here, the waveforms themselves are loaded by each
+        # device in `get_val_waveforms`
+        waveform_set = self.waveform_set_cls.read(val_waveform_file, lazy=True)
         self.num_val_waveforms = len(waveform_set)
         self.right_pad = waveform_set.right_pad
 
@@ -67,8 +70,11 @@ class WaveformSampler(torch.nn.Module):
         start, stop = self.get_slice_bounds(
             self.num_val_waveforms, world_size, rank
         )
-        waveform_set = self.waveform_set_cls.read(self.val_waveform_file)
-        return torch.Tensor(waveform_set.waveforms[start:stop])
+        # read just the rows of this device's slice from disk
+        waveform_set = self.waveform_set_cls.read(
+            self.val_waveform_file, lazy=True
+        )
+        return torch.Tensor(waveform_set[start:stop].waveforms)
 
     def get_test_waveforms(self):
         raise NotImplementedError
@@ -1,6 +1,6 @@
 import itertools
-from collections import defaultdict
-from typing import Optional
+from collections.abc import Sequence
+from typing import Optional, Union
 
 import torch
 from torchmetrics import Metric
@@ -24,7 +24,9 @@ class TimeSlideAUROC(Metric):
     events from within a given timeslide. For this reason,
     metric is iteratively updated with both foreground
     and background predictions, as well as an index indicating
-    the shift the predictions were made on.
+    the shift the predictions were made on, or a tensor of the
+    shift of each background prediction if they were made on
+    more than one.
 
     Torch metrics handles aggregating the predictions from
     multiple workers on the backend, so this is automatically
@@ -47,22 +49,28 @@ class TimeSlideAUROC(Metric):
         self.add_state("foreground", default=[])
 
     def update(
-        self, shift: int, background: torch.Tensor, foreground: torch.Tensor
+        self,
+        shift: Union[int, torch.Tensor],
+        background: torch.Tensor,
+        foreground: torch.Tensor,
     ) -> None:
-        self.shifts.append(torch.Tensor([shift]).to(background.device))
+        shift = torch.as_tensor(shift, device=background.device)
+        self.shifts.append(shift.view(-1).float())
         self.background.append(background)
         self.foreground.append(foreground)
 
     def compute(self):
-        foreground, background = [], defaultdict(list)
-        for i, bg, fg in zip(self.shifts, self.background, self.foreground):
-            foreground.append(fg)
-            background[i.item()].append(bg)
-        foreground = torch.cat(foreground)
+        foreground = torch.cat(self.foreground)
+        background = torch.cat(self.background)
+        shifts = [
+            shift.expand(len(bg))
+            for shift, bg in zip(self.shifts, self.background)
+        ]
+        shifts = torch.cat(shifts)
 
         pooled_background = []
-        for bg in background.values():
-            bg = torch.cat(bg).view(1, 1, -1)
+        for shift in torch.unique(shifts):
+            bg = background[shifts == shift].view(1, 1, -1)
             bg = self.pool(bg).view(-1)
             pooled_background.append(bg)
         background = torch.cat(pooled_background)
@@ -201,6 +209,77 @@ class TimeSlide(torch.utils.data.IterableDataset):
             yield torch.stack(X)
 
 
+class FusedTimeSlides(torch.utils.data.IterableDataset):
+    """
+    Iterate through the windows of a set of timeslides in
+    batches of `batch_size` windows which, unlike batches of
+    `TimeSlide`, can span several timeslides and so several
+    shifts and segments. The timeseries of the timeslides are
+    moved to `device` once up front, along with the index of
+    the first sample of each channel of every window, and each
+    batch is gathered from a strided view of them, so that no
+    data is sliced or transferred during iteration.
+
+    Batches of `(batch_size, num_channels, kernel_size)` windows
+    are yielded along with a tensor of the shift of each window,
+    in the same order as iterating through the timeslides
+    one after another.
+
+    Args:
+        timeslides:
+            Timeslides whose windows to iterate through. Each
+            must have the same kernel size.
+        batch_size:
+            The maximum number of windows in each batch.
+            The last batch may be smaller than this.
+        device:
+            Device to keep the timeseries and window indices on
+    """
+
+    def __init__(
+        self,
+        timeslides: Sequence[TimeSlide],
+        batch_size: int,
+        device: torch.device,
+    ) -> None:
+        self.kernel_size = timeslides[0].kernel_size
+        self.batch_size = batch_size
+
+        # timeslides with different shifts share the timeseries
+        # of their segments, so only concatenate each of them once
+        timeseries, offsets, size = [], {}, 0
+        starts, shifts = [], []
+        for timeslide in timeslides:
+            key = id(timeslide.timeseries)
+            if key not in offsets:
+                offsets[key] = size
+                timeseries.append(timeslide.timeseries)
+                size += timeslide.timeseries.size(-1)
+
+            num_steps = max(timeslide.num_steps, 0)
+            start = offsets[key] + timeslide.start
+            start += torch.arange(num_steps) * timeslide.stride_size
+            start = start[:, None] + torch.tensor(timeslide.shifts)
+            starts.append(start)
+            shifts.append(torch.full((num_steps,), timeslide.shift_size))
+
+        self.timeseries = torch.cat(timeseries, dim=-1).to(device)
+        self.starts = torch.cat(starts).to(device)
+        self.shifts = torch.cat(shifts).to(device)
+
+    def __len__(self) -> int:
+        return x_per_y(len(self.starts), self.batch_size)
+
+    def __iter__(self):
+        # view every window of each channel without copying
+        # them, then gather the windows of each batch
+        windows = self.timeseries.unfold(-1, self.kernel_size, 1)
+        channels = torch.arange(len(self.timeseries), device=windows.device)
+        for i in range(len(self)):
+            batch = slice(i * self.batch_size, (i + 1) * self.batch_size)
+            yield windows[channels, self.starts[batch]], self.shifts[batch]
+
+
 def get_timeslides(
     timeseries: torch.Tensor,
     livetime: float,
@@ -208,6 +287,7 @@ def get_timeslides(
     sample_length: float,
     stride: float,
     batch_size: int,
+    fused: bool = False,
 ):
     """
     Generate timeslides of the provided `timeseries` until
@@ -215,9 +295,17 @@ def get_timeslides(
     For distributed evaluation, timelides are broken up to ensure
     each device performs and equal amount of inference.
 
-    `timeseries` is a (n_val_segments, n_channels, n_samples) tensor
+    `timeseries` is a (n_val_segments, n_channels, n_samples) tensor.
+    If `fused` is `True`, the returned number of batches is that of
+    iterating through the timeslides with `FusedTimeSlides`.
     """
 
+    def num_batches(timeslides):
+        if fused:
+            num_steps = sum([max(ts.num_steps, 0) for ts in timeslides])
+            return x_per_y(num_steps, batch_size)
+        return sum([len(ts) for ts in timeslides])
+
     kernel_size = int(sample_length * sample_rate)
     stride_size = int(stride * sample_rate)
 
@@ -258,9 +346,9 @@ def get_timeslides(
     try:
         world_size = torch.distributed.get_world_size()
     except ValueError:
-        return timeslides, sum([len(ts) for ts in timeslides])
+        return timeslides, num_batches(timeslides)
     if world_size == 1:
-        return timeslides, sum([len(ts) for ts in timeslides])
+        return timeslides, num_batches(timeslides)
 
     # if we're running with more than one device,
     # break up the timeslides such that we do
@@ -317,12 +405,7 @@ def get_timeslides(
     # to hanging when validating with distributed training;
     # we should probably just move to a simpler method
     # for distributing the timeslides
-    lengths = []
-    for dev in timeslides_per_dev:
-        length = 0
-        for ts in dev:
-            length += len(ts)
-        lengths.append(length)
+    lengths = [num_batches(dev) for dev in timeslides_per_dev]
     minimum = min(lengths)
 
     global_rank = torch.distributed.get_rank()